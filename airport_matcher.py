@@ -0,0 +1,136 @@
+import re
+from typing import Dict, List, Mapping, NamedTuple, Optional, Set
+from response_cache import ResponseCache
+
+
+class AirportMatch(NamedTuple):
+    code: str
+    name: str          # the indexed name that matched, e.g. 'hyderabad'
+    confidence: float  # 1.0 exact, lower for partial and fuzzy matches
+    method: str        # 'exact', 'partial' or 'fuzzy'
+
+
+_NO_MATCH = object()
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+
+
+def normalize_name(name: str) -> str:
+    """
+    Lowercase, drop punctuation and collapse whitespace ('New  Delhi,' -> 'new delhi')
+    """
+    return ' '.join(_NON_ALNUM.sub(' ', name.lower()).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Character trigrams of text padded with two leading and one trailing space, so prefixes weigh more
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AirportMatcher:
+    """
+    Resolves free-text city/airport names to airport codes through a trigram inverted index
+    Lookups, in order of preference:
+      exact    the normalized name is indexed (confidence 1.0)
+      partial  an indexed name contains the input or appears as whole words inside it
+      fuzzy    best trigram Dice similarity above min_similarity (typos like 'hydrabad')
+    Candidates come from the posting lists of the input's trigrams, so a lookup touches only names
+    sharing trigrams with it rather than scanning the whole table; results are memoized in an LRU cache.
+    Equal scores go to the name listed first in the index, as with the previous dict-order scan.
+    """
+    MAX_NAME_WORDS = 4
+
+    def __init__(self, names: Mapping[str, str], min_similarity: float = 0.5, cache_entries: int = 1024):
+        self.min_similarity = min_similarity
+        self._names: List[str] = []
+        self._codes: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self._trigram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+
+        for name, code in names.items():
+            normalized = normalize_name(name)
+            if not normalized or normalized in self._name_ids:
+                continue
+            name_id = len(self._names)
+            self._names.append(normalized)
+            self._codes.append(code)
+            self._name_ids[normalized] = name_id
+            grams = trigrams(normalized)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(name_id)
+
+        self.cache = ResponseCache(ttl=None, max_entries=cache_entries)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def match(self, name: str) -> Optional[AirportMatch]:
+        """
+        Best match for a city/airport name, or None when nothing is close enough
+        """
+        query = normalize_name(name or '')
+        if not query:
+            return None
+
+        cached = self.cache.get(query)
+        if cached is None:
+            cached = self._match_uncached(query) or _NO_MATCH
+            self.cache.set(query, cached)
+        return None if cached is _NO_MATCH else cached
+
+    def _match_uncached(self, query: str) -> Optional[AirportMatch]:
+        name_id = self._name_ids.get(query)
+        if name_id is not None:
+            return self._result(name_id, 1.0, 'exact')
+
+        query_grams = trigrams(query)
+        shared: Dict[int, int] = {}
+        for gram in query_grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        partial = self._partial_match(query, shared)
+        if partial is not None:
+            return partial
+
+        best_id, best_score = None, 0.0
+        for candidate, count in shared.items():
+            score = 2.0 * count / (len(query_grams) + self._trigram_counts[candidate])
+            if score > best_score or (score == best_score and best_id is not None and candidate < best_id):
+                best_id, best_score = candidate, score
+        if best_id is not None and best_score >= self.min_similarity:
+            return self._result(best_id, round(best_score, 3), 'fuzzy')
+        return None
+
+    def _partial_match(self, query: str, shared: Dict[int, int]) -> Optional[AirportMatch]:
+        """
+        An indexed name containing the query ('kuala' -> 'kuala lumpur'), or one appearing as whole
+        words inside the query ('new delhi airport' -> 'new delhi')
+        """
+        matches = []
+        if len(query) >= 3:
+            # Every trigram of the unpadded query also occurs in any name containing it
+            inner_count = len({query[i:i + 3] for i in range(len(query) - 2)})
+            for candidate, count in shared.items():
+                if count >= inner_count and query in self._names[candidate]:
+                    matches.append((candidate, len(query) / len(self._names[candidate])))
+
+        words = query.split()
+        for size in range(min(len(words), self.MAX_NAME_WORDS), 0, -1):
+            for start in range(len(words) - size + 1):
+                name_id = self._name_ids.get(' '.join(words[start:start + size]))
+                if name_id is not None:
+                    matches.append((name_id, len(self._names[name_id]) / len(query)))
+
+        if not matches:
+            return None
+        # Most of the longer string covered wins ('new delhi airport' -> 'new delhi', not 'delhi')
+        name_id, coverage = min(matches, key=lambda m: (-m[1], m[0]))
+        return self._result(name_id, round(0.5 + 0.5 * coverage, 3), 'partial')
+
+    def _result(self, name_id: int, confidence: float, method: str) -> AirportMatch:
+        return AirportMatch(self._codes[name_id], self._names[name_id], confidence, method)
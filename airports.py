@@ -0,0 +1,302 @@
+"""
+Immutable airport reference data shared by the whole process
+Built once at import from a single table; every lookup (city name to code, code to city,
+timezone label and country) reads these read-only mappings instead of rebuilding dicts per call.
+"""
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+DEFAULT_TIMEZONE = 'Local Time'
+
+
+class Airport(NamedTuple):
+    code: str
+    city: str
+    country: str
+    timezone: Optional[str]  # display label, None when unknown
+
+
+# (code, display city, country, timezone display label)
+_AIRPORT_TABLE = (
+    # India
+    ('BLR', 'Bangalore', 'India', 'Indian Time (IST)'),
+    ('DEL', 'Delhi', 'India', 'Indian Time (IST)'),
+    ('BOM', 'Mumbai', 'India', 'Indian Time (IST)'),
+    ('MAA', 'Chennai', 'India', 'Indian Time (IST)'),
+    ('CCU', 'Kolkata', 'India', 'Indian Time (IST)'),
+    ('HYD', 'Hyderabad', 'India', 'Indian Time (IST)'),
+    ('AMD', 'Ahmedabad', 'India', 'Indian Time (IST)'),
+    ('COK', 'Kochi', 'India', 'Indian Time (IST)'),
+    ('GOI', 'Goa', 'India', 'Indian Time (IST)'),
+    ('PNQ', 'Pune', 'India', 'Indian Time (IST)'),
+    ('TRV', 'Trivandrum', 'India', 'Indian Time (IST)'),
+    ('JAI', 'Jaipur', 'India', 'Indian Time (IST)'),
+    ('UDR', 'Udaipur', 'India', 'Indian Time (IST)'),
+    ('JDH', 'Jodhpur', 'India', 'Indian Time (IST)'),
+    ('IXC', 'Chandigarh', 'India', None),
+    ('LKO', 'Lucknow', 'India', None),
+    ('NAG', 'Nagpur', 'India', None),
+    ('IXB', 'Bagdogra', 'India', None),
+
+    # Southeast Asia
+    ('SIN', 'Singapore', 'Singapore', 'Singapore Time (SGT)'),
+    ('KUL', 'Kuala Lumpur', 'Malaysia', 'Malaysia Time (MYT)'),
+    ('BKK', 'Bangkok', 'Thailand', 'Thailand Time (ICT)'),
+    ('CGK', 'Jakarta', 'Indonesia', 'Indonesia Time (WIB)'),
+    ('DPS', 'Bali', 'Indonesia', None),
+    ('MNL', 'Manila', 'Philippines', 'Philippines Time (PHT)'),
+    ('HAN', 'Hanoi', 'Vietnam', 'Vietnam Time (ICT)'),
+    ('SGN', 'Ho Chi Minh City', 'Vietnam', 'Vietnam Time (ICT)'),
+    ('RGN', 'Yangon', 'Myanmar', None),
+    ('PNH', 'Phnom Penh', 'Cambodia', None),
+    ('VTE', 'Vientiane', 'Laos', None),
+    ('BWN', 'Bandar Seri Begawan', 'Brunei', None),
+
+    # Middle East
+    ('DXB', 'Dubai', 'United Arab Emirates', 'UAE Time (GST)'),
+    ('AUH', 'Abu Dhabi', 'United Arab Emirates', 'UAE Time (GST)'),
+    ('DOH', 'Doha', 'Qatar', 'Qatar Time (AST)'),
+    ('KWI', 'Kuwait City', 'Kuwait', 'Kuwait Time (AST)'),
+    ('RUH', 'Riyadh', 'Saudi Arabia', 'Saudi Time (AST)'),
+    ('JED', 'Jeddah', 'Saudi Arabia', 'Saudi Time (AST)'),
+    ('BAH', 'Manama', 'Bahrain', None),
+    ('MCT', 'Muscat', 'Oman', 'Oman Time (GST)'),
+    ('TLV', 'Tel Aviv', 'Israel', 'Israel Time (IST)'),
+    ('AMM', 'Amman', 'Jordan', 'Jordan Time (EET)'),
+    ('BEY', 'Beirut', 'Lebanon', 'Lebanon Time (EET)'),
+    ('DAM', 'Damascus', 'Syria', None),
+    ('BGW', 'Baghdad', 'Iraq', None),
+    ('IKA', 'Tehran', 'Iran', None),
+    ('TBS', 'Tbilisi', 'Georgia', None),
+    ('EVN', 'Yerevan', 'Armenia', None),
+
+    # Europe
+    ('LHR', 'London', 'United Kingdom', 'UK Time (GMT/BST)'),
+    ('LGW', 'London', 'United Kingdom', 'UK Time (GMT/BST)'),
+    ('MAN', 'Manchester', 'United Kingdom', 'UK Time (GMT/BST)'),
+    ('EDI', 'Edinburgh', 'United Kingdom', None),
+    ('GLA', 'Glasgow', 'United Kingdom', None),
+    ('CDG', 'Paris', 'France', 'France Time (CET/CEST)'),
+    ('ORY', 'Paris', 'France', 'France Time (CET/CEST)'),
+    ('AMS', 'Amsterdam', 'Netherlands', 'Netherlands Time (CET/CEST)'),
+    ('FRA', 'Frankfurt', 'Germany', 'Germany Time (CET/CEST)'),
+    ('MUC', 'Munich', 'Germany', 'Germany Time (CET/CEST)'),
+    ('BER', 'Berlin', 'Germany', None),
+    ('HAM', 'Hamburg', 'Germany', None),
+    ('CGN', 'Cologne', 'Germany', None),
+    ('ZUR', 'Zurich', 'Switzerland', 'Switzerland Time (CET/CEST)'),
+    ('GVA', 'Geneva', 'Switzerland', None),
+    ('BSL', 'Basel', 'Switzerland', None),
+    ('MAD', 'Madrid', 'Spain', 'Spain Time (CET/CEST)'),
+    ('BCN', 'Barcelona', 'Spain', 'Spain Time (CET/CEST)'),
+    ('LIS', 'Lisbon', 'Portugal', None),
+    ('FCO', 'Rome', 'Italy', 'Italy Time (CET/CEST)'),
+    ('MXP', 'Milan', 'Italy', 'Italy Time (CET/CEST)'),
+    ('VCE', 'Venice', 'Italy', None),
+    ('NAP', 'Naples', 'Italy', None),
+    ('VIE', 'Vienna', 'Austria', 'Austria Time (CET/CEST)'),
+    ('BRU', 'Brussels', 'Belgium', None),
+    ('CPH', 'Copenhagen', 'Denmark', None),
+    ('ARN', 'Stockholm', 'Sweden', None),
+    ('OSL', 'Oslo', 'Norway', None),
+    ('HEL', 'Helsinki', 'Finland', None),
+    ('KEF', 'Reykjavik', 'Iceland', None),
+    ('WAW', 'Warsaw', 'Poland', None),
+    ('PRG', 'Prague', 'Czech Republic', None),
+    ('BUD', 'Budapest', 'Hungary', None),
+    ('ATH', 'Athens', 'Greece', 'Greece Time (EET)'),
+    ('IST', 'Istanbul', 'Turkey', 'Turkey Time (TRT)'),
+    ('ESB', 'Ankara', 'Turkey', None),
+    ('SVO', 'Moscow', 'Russia', 'Russia Time (MSK)'),
+    ('LED', 'St Petersburg', 'Russia', None),
+
+    # North America
+    ('JFK', 'New York', 'United States', 'US Eastern Time (EST/EDT)'),
+    ('LGA', 'New York', 'United States', 'US Eastern Time (EST/EDT)'),
+    ('EWR', 'Newark', 'United States', 'US Eastern Time (EST/EDT)'),
+    ('LAX', 'Los Angeles', 'United States', 'US Pacific Time (PST/PDT)'),
+    ('SFO', 'San Francisco', 'United States', 'US Pacific Time (PST/PDT)'),
+    ('ORD', 'Chicago', 'United States', 'US Central Time (CST/CDT)'),
+    ('MIA', 'Miami', 'United States', None),
+    ('LAS', 'Las Vegas', 'United States', None),
+    ('SEA', 'Seattle', 'United States', None),
+    ('BOS', 'Boston', 'United States', None),
+    ('DCA', 'Washington', 'United States', None),
+    ('ATL', 'Atlanta', 'United States', None),
+    ('DEN', 'Denver', 'United States', None),
+    ('PHX', 'Phoenix', 'United States', None),
+    ('DFW', 'Dallas', 'United States', 'US Central Time (CST/CDT)'),
+    ('IAH', 'Houston', 'United States', None),
+    ('PHL', 'Philadelphia', 'United States', None),
+    ('DTW', 'Detroit', 'United States', None),
+    ('YYZ', 'Toronto', 'Canada', 'Canada Eastern Time (EST/EDT)'),
+    ('YVR', 'Vancouver', 'Canada', 'Canada Pacific Time (PST/PDT)'),
+    ('YUL', 'Montreal', 'Canada', None),
+    ('YYC', 'Calgary', 'Canada', None),
+    ('YOW', 'Ottawa', 'Canada', None),
+    ('YWG', 'Winnipeg', 'Canada', None),
+    ('MEX', 'Mexico City', 'Mexico', None),
+    ('CUN', 'Cancun', 'Mexico', None),
+    ('GDL', 'Guadalajara', 'Mexico', None),
+
+    # East Asia
+    ('NRT', 'Tokyo', 'Japan', 'Japan Time (JST)'),
+    ('HND', 'Tokyo', 'Japan', 'Japan Time (JST)'),
+    ('KIX', 'Osaka', 'Japan', 'Japan Time (JST)'),
+    ('NGO', 'Nagoya', 'Japan', None),
+    ('ICN', 'Seoul', 'South Korea', 'Korea Time (KST)'),
+    ('GMP', 'Seoul', 'South Korea', 'Korea Time (KST)'),
+    ('PUS', 'Busan', 'South Korea', None),
+    ('PEK', 'Beijing', 'China', 'China Time (CST)'),
+    ('PVG', 'Shanghai', 'China', 'China Time (CST)'),
+    ('SHA', 'Shanghai', 'China', 'China Time (CST)'),
+    ('CAN', 'Guangzhou', 'China', None),
+    ('SZX', 'Shenzhen', 'China', None),
+    ('CTU', 'Chengdu', 'China', None),
+    ('HKG', 'Hong Kong', 'Hong Kong', 'Hong Kong Time (HKT)'),
+    ('MFM', 'Macau', 'Macau', None),
+    ('TPE', 'Taipei', 'Taiwan', 'Taiwan Time (CST)'),
+    ('KHH', 'Kaohsiung', 'Taiwan', None),
+
+    # Oceania
+    ('SYD', 'Sydney', 'Australia', 'Australia Eastern Time (AEST/AEDT)'),
+    ('MEL', 'Melbourne', 'Australia', 'Australia Eastern Time (AEST/AEDT)'),
+    ('BNE', 'Brisbane', 'Australia', 'Australia Eastern Time (AEST/AEDT)'),
+    ('PER', 'Perth', 'Australia', 'Australia Western Time (AWST)'),
+    ('ADL', 'Adelaide', 'Australia', None),
+    ('DRW', 'Darwin', 'Australia', None),
+    ('AKL', 'Auckland', 'New Zealand', 'New Zealand Time (NZST/NZDT)'),
+    ('WLG', 'Wellington', 'New Zealand', None),
+    ('CHC', 'Christchurch', 'New Zealand', None),
+    ('NAN', 'Nadi', 'Fiji', None),
+
+    # Africa
+    ('CAI', 'Cairo', 'Egypt', 'Egypt Time (EET)'),
+    ('CMN', 'Casablanca', 'Morocco', None),
+    ('JNB', 'Johannesburg', 'South Africa', 'South Africa Time (SAST)'),
+    ('CPT', 'Cape Town', 'South Africa', 'South Africa Time (SAST)'),
+    ('NBO', 'Nairobi', 'Kenya', 'Kenya Time (EAT)'),
+    ('LOS', 'Lagos', 'Nigeria', None),
+    ('ADD', 'Addis Ababa', 'Ethiopia', 'Ethiopia Time (EAT)'),
+    ('TUN', 'Tunis', 'Tunisia', None),
+    ('ALG', 'Algiers', 'Algeria', None),
+
+    # South America
+    ('GRU', 'Sao Paulo', 'Brazil', None),
+    ('GIG', 'Rio de Janeiro', 'Brazil', None),
+    ('BSB', 'Brasilia', 'Brazil', None),
+    ('EZE', 'Buenos Aires', 'Argentina', None),
+    ('LIM', 'Lima', 'Peru', None),
+    ('BOG', 'Bogota', 'Colombia', None),
+    ('SCL', 'Santiago', 'Chile', None),
+    ('CCS', 'Caracas', 'Venezuela', None),
+    ('UIO', 'Quito', 'Ecuador', None),
+)
+
+# Lowercase names (cities, former names, airports) users may type, in matching priority order
+CITY_TO_CODE: Mapping[str, str] = MappingProxyType({
+    # India
+    'mumbai': 'BOM', 'bombay': 'BOM',
+    'delhi': 'DEL', 'new delhi': 'DEL',
+    'bangalore': 'BLR', 'bengaluru': 'BLR',
+    'hyderabad': 'HYD', 'hyd': 'HYD',
+    'chennai': 'MAA', 'madras': 'MAA',
+    'kolkata': 'CCU', 'calcutta': 'CCU',
+    'pune': 'PNQ', 'poona': 'PNQ',
+    'goa': 'GOI', 'panaji': 'GOI',
+    'ahmedabad': 'AMD', 'kochi': 'COK', 'cochin': 'COK',
+    'trivandrum': 'TRV', 'thiruvananthapuram': 'TRV',
+    'jaipur': 'JAI', 'udaipur': 'UDR', 'jodhpur': 'JDH',
+
+    # Southeast Asia
+    'singapore': 'SIN', 'bangkok': 'BKK', 'kuala lumpur': 'KUL',
+    'jakarta': 'CGK', 'manila': 'MNL', 'ho chi minh': 'SGN',
+    'hanoi': 'HAN', 'phnom penh': 'PNH', 'yangon': 'RGN',
+    'denpasar': 'DPS', 'bali': 'DPS',
+
+    # Middle East
+    'dubai': 'DXB', 'abu dhabi': 'AUH', 'doha': 'DOH',
+    'kuwait': 'KWI', 'riyadh': 'RUH', 'jeddah': 'JED',
+    'muscat': 'MCT', 'tehran': 'IKA', 'baghdad': 'BGW',
+    'beirut': 'BEY', 'amman': 'AMM', 'tel aviv': 'TLV',
+
+    # Europe
+    'london': 'LHR', 'heathrow': 'LHR', 'gatwick': 'LGW',
+    'manchester': 'MAN', 'edinburgh': 'EDI', 'glasgow': 'GLA',
+    'paris': 'CDG', 'charles de gaulle': 'CDG', 'orly': 'ORY',
+    'amsterdam': 'AMS', 'frankfurt': 'FRA', 'munich': 'MUC',
+    'berlin': 'BER', 'hamburg': 'HAM', 'cologne': 'CGN',
+    'zurich': 'ZUR', 'geneva': 'GVA', 'basel': 'BSL',
+    'madrid': 'MAD', 'barcelona': 'BCN', 'lisbon': 'LIS',
+    'rome': 'FCO', 'fiumicino': 'FCO', 'milan': 'MXP',
+    'venice': 'VCE', 'naples': 'NAP', 'vienna': 'VIE',
+    'brussels': 'BRU', 'stockholm': 'ARN', 'copenhagen': 'CPH',
+    'oslo': 'OSL', 'helsinki': 'HEL', 'reykjavik': 'KEF',
+    'athens': 'ATH', 'istanbul': 'IST', 'ankara': 'ESB',
+    'moscow': 'SVO', 'st petersburg': 'LED',
+
+    # North America
+    'new york': 'JFK', 'jfk': 'JFK', 'laguardia': 'LGA', 'newark': 'EWR',
+    'los angeles': 'LAX', 'san francisco': 'SFO', 'chicago': 'ORD',
+    'miami': 'MIA', 'las vegas': 'LAS', 'seattle': 'SEA',
+    'boston': 'BOS', 'washington': 'DCA', 'atlanta': 'ATL',
+    'denver': 'DEN', 'phoenix': 'PHX', 'dallas': 'DFW',
+    'houston': 'IAH', 'philadelphia': 'PHL', 'detroit': 'DTW',
+    'toronto': 'YYZ', 'vancouver': 'YVR', 'montreal': 'YUL',
+    'calgary': 'YYC', 'ottawa': 'YOW', 'winnipeg': 'YWG',
+    'mexico city': 'MEX', 'cancun': 'CUN', 'guadalajara': 'GDL',
+
+    # East Asia
+    'tokyo': 'NRT', 'narita': 'NRT', 'haneda': 'HND',
+    'osaka': 'KIX', 'kyoto': 'KIX', 'nagoya': 'NGO',
+    'seoul': 'ICN', 'incheon': 'ICN', 'gimpo': 'GMP',
+    'busan': 'PUS', 'beijing': 'PEK', 'capital': 'PEK',
+    'shanghai': 'PVG', 'pudong': 'PVG', 'hongqiao': 'SHA',
+    'guangzhou': 'CAN', 'shenzhen': 'SZX', 'chengdu': 'CTU',
+    'hong kong': 'HKG', 'macau': 'MFM', 'taipei': 'TPE',
+    'kaohsiung': 'KHH',
+
+    # Oceania
+    'sydney': 'SYD', 'melbourne': 'MEL', 'brisbane': 'BNE',
+    'perth': 'PER', 'adelaide': 'ADL', 'darwin': 'DRW',
+    'auckland': 'AKL', 'wellington': 'WLG', 'christchurch': 'CHC',
+    'fiji': 'NAN', 'nadi': 'NAN',
+
+    # Africa
+    'cairo': 'CAI', 'casablanca': 'CMN', 'johannesburg': 'JNB',
+    'cape town': 'CPT', 'nairobi': 'NBO', 'lagos': 'LOS',
+    'addis ababa': 'ADD', 'tunis': 'TUN', 'algiers': 'ALG',
+
+    # South America
+    'sao paulo': 'GRU', 'rio de janeiro': 'GIG', 'brasilia': 'BSB',
+    'buenos aires': 'EZE', 'lima': 'LIM', 'bogota': 'BOG',
+    'santiago': 'SCL', 'caracas': 'CCS', 'quito': 'UIO'
+})
+
+AIRPORTS: Mapping[str, Airport] = MappingProxyType({row[0]: Airport(*row) for row in _AIRPORT_TABLE})
+CODE_TO_CITY: Mapping[str, str] = MappingProxyType({code: airport.city for code, airport in AIRPORTS.items()})
+CODE_TO_TIMEZONE: Mapping[str, str] = MappingProxyType(
+    {code: airport.timezone for code, airport in AIRPORTS.items() if airport.timezone}
+)
+CODE_TO_COUNTRY: Mapping[str, str] = MappingProxyType({code: airport.country for code, airport in AIRPORTS.items()})
+
+
+def city_for_code(airport_code: str) -> str:
+    """
+    Display city for an airport code (the code itself when unknown)
+    """
+    return CODE_TO_CITY.get(airport_code, airport_code)
+
+
+def timezone_for_code(airport_code: str) -> str:
+    """
+    Timezone display label for an airport code ('Local Time' when unknown)
+    """
+    return CODE_TO_TIMEZONE.get(airport_code, DEFAULT_TIMEZONE)
+
+
+def country_for_code(airport_code: str) -> Optional[str]:
+    """
+    Country for an airport code (None when unknown)
+    """
+    return CODE_TO_COUNTRY.get(airport_code)
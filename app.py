@@ -1,82 +1,233 @@
+import os
+import time
+import asyncio
+import logging
 import gradio as gr
+from concurrent.futures import ThreadPoolExecutor
 from text_parser import TravelTextParser
 from flight_search import FlightSearcher
+from response_cache import ResponseCache, request_fingerprint
+from logging_config import configure_logging
+
+logger = logging.getLogger(__name__)
 
 class FlightAI:
+    """
+    One instance serves every browser session: the searcher, parser and caches are shared and thread-safe,
+    while each session's parsed approval travels through gr.State and is passed into the handlers
+    """
     def __init__(self):
-        self.parser = TravelTextParser()
         self.flight_searcher = FlightSearcher()
-        self.travel_details = {}
+        self.parser = TravelTextParser(self.flight_searcher)
+        
+        # Opt-in speculative search: start searching as soon as the approval text is parsed
+        self.speculative_prefetch = os.getenv('SPECULATIVE_PREFETCH', 'false').lower() in ('1', 'true', 'yes')
+        self.prefetched_searches = ResponseCache(
+            ttl=float(os.getenv('SPECULATIVE_PREFETCH_TTL_SECONDS', '300')),
+            max_entries=int(os.getenv('SPECULATIVE_PREFETCH_MAX_ENTRIES', '8'))
+        )
+        # Debounce so typing into the approval box does not launch a search per keystroke
+        self.speculative_prefetch_delay = float(os.getenv('SPECULATIVE_PREFETCH_DELAY_SECONDS', '0.75'))
+        # Newest prefetch key per session, so one user's typing never cancels another user's prefetch
+        self._latest_prefetch_keys = ResponseCache(ttl=None, max_entries=int(os.getenv('SESSION_MAX_ENTRIES', '1024')))
+        self._prefetch_executor = None
+        if self.speculative_prefetch:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='speculative-search')
+        
+        # Every .change event re-submits the whole approval text; parse each distinct text once and resolve
+        # its airports once per from location, so a stops/class change only re-renders the summary
+        approval_cache_entries = int(os.getenv('APPROVAL_CACHE_MAX_ENTRIES', '128'))
+        self.parsed_approvals = ResponseCache(ttl=None, max_entries=approval_cache_entries)
+        self.resolved_routes = ResponseCache(ttl=None, max_entries=approval_cache_entries)
+    
+    def _build_search_preferences(self, from_location, stops_preference, travel_class, sort_order="departure"):
+        """
+        Search preferences dict shared by speculative and user-triggered searches
+        """
+        return {
+            'from_location': from_location if from_location and from_location.strip() else "Bangalore",
+            'stops': int(stops_preference),
+            'travel_class': int(travel_class),
+            'sort_by': sort_order or "departure"
+        }
     
-    def process_travel_approval(self, approval_text, from_location="Bangalore", flight_preference="0", travel_class="1"):
+    def _prefetch_key(self, travel_details, search_preferences):
+        # sort_by only changes how the same flights are shown, so a parked search serves every sort order
+        return request_fingerprint({**travel_details, **{k: v for k, v in search_preferences.items() if k != 'sort_by'}})
+    
+    def _start_speculative_search(self, travel_details, search_preferences, session_id):
+        """
+        Kick off a background search for the parsed route and park its future for search_flights_with_status
+        """
+        travel_details = dict(travel_details)
+        if not self.flight_searcher.has_searchable_route(travel_details, search_preferences):
+            return
+        
+        key = self._prefetch_key(travel_details, search_preferences)
+        # Mark as latest even when already parked (text A -> B -> A), so A's pending worker is not dropped
+        self._latest_prefetch_keys.set(session_id, key)
+        if self.prefetched_searches.get(key) is not None:
+            return
+        
+        future = self._prefetch_executor.submit(self._run_speculative_search, key, session_id, travel_details, search_preferences)
+        self.prefetched_searches.set(key, future)
+    
+    def _run_speculative_search(self, key, session_id, travel_details, search_preferences):
+        """
+        Background worker: search unless a newer parse in the same session superseded this one during the debounce delay
+        """
+        if self.speculative_prefetch_delay > 0:
+            time.sleep(self.speculative_prefetch_delay)
+        if key != self._latest_prefetch_keys.get(session_id):
+            self.prefetched_searches.pop(key)
+            return None
+        
+        logger.debug("Starting speculative flight search %s", key[:12])
+        return self.flight_searcher.search_flights_with_preferences(travel_details, search_preferences)
+    
+    async def _take_prefetched_search(self, travel_details, search_preferences):
+        """
+        Await a matching speculative search if one was started; None when there is none or it failed
+        """
+        if not self.speculative_prefetch:
+            return None
+        
+        future = self.prefetched_searches.get(self._prefetch_key(travel_details, search_preferences))
+        if future is None:
+            return None
+        
+        try:
+            # Shield so a cancelled click does not cancel a prefetch still queued on the executor
+            result = await asyncio.shield(asyncio.wrap_future(future))
+        except Exception as e:
+            logger.info("Speculative search failed, searching again: %s", e)
+            return None
+        
+        if not result or result.get('error'):
+            return None
+        if self._result_sort_by(result) != search_preferences.get('sort_by', 'departure'):
+            # Parsed legs are cached by the prefetch, so the regular search only re-ranks them locally
+            logger.debug("Speculative search sorted differently, re-ranking from parsed results")
+            return None
+        logger.debug("Using speculative search result")
+        return result
+    
+    def _result_sort_by(self, search_result):
+        """
+        Sort order a search result was built with (taken from the outbound leg of round trips)
+        """
+        leg = search_result.get('outbound', search_result)
+        return leg.get('search_info', {}).get('sort_by', 'departure')
+    
+    def _parse_approval(self, approval_text):
+        """
+        (content key, extracted details) of the approval text, extracting only on the first sight of a text
+        """
+        text_key = request_fingerprint({'approval_text': approval_text.strip()})
+        details = self.parsed_approvals.get(text_key)
+        if details is None:
+            details = self.parser.extract_travel_details(approval_text)
+            self.parsed_approvals.set(text_key, details)
+        return text_key, dict(details)
+    
+    def _resolve_route(self, text_key, travel_details, from_location):
+        """
+        Airport resolution for a parsed approval and from location, memoized on both
+        """
+        # resolve_route title-cases the from location, so case differences share an entry
+        route_key = request_fingerprint({'approval_text': text_key, 'from_location': from_location.strip().lower()})
+        resolved = self.resolved_routes.get(route_key)
+        if resolved is None:
+            resolved = self.parser.resolve_route(travel_details, from_location)
+            self.resolved_routes.set(route_key, resolved)
+        return resolved
+    
+    def process_travel_approval(self, approval_text, from_location="Bangalore", flight_preference="0", travel_class="1",
+                                sort_order="departure", request: gr.Request = None):
         """
         Process the travel approval text and extract details
+        Returns (status message, details markdown, travel details for the session's gr.State)
         """
         if not approval_text.strip():
-            return "Please paste your travel approval text above.", ""
+            return "Please paste your travel approval text above.", "", {}
         
-        # Extract travel details
-        self.travel_details = self.parser.extract_travel_details(approval_text)
+        # Extract travel details (memoized on the approval text)
+        text_key, travel_details = self._parse_approval(approval_text)
         
         # Use Bangalore as default if from_location is empty
         effective_from_location = from_location if from_location.strip() else "Bangalore"
         
-        # Format for display with selected preferences
-        details_display = self.parser.format_details_for_display(
-            self.travel_details, effective_from_location, flight_preference, travel_class
-        )
+        # Format for display with selected preferences; only the rendering depends on stops and class
+        if travel_details:
+            details_display = self.parser.render_details(
+                travel_details,
+                self._resolve_route(text_key, travel_details, effective_from_location),
+                flight_preference, travel_class
+            )
+        else:
+            details_display = self.parser.format_details_for_display(travel_details)
+        
+        if self.speculative_prefetch:
+            try:
+                self._start_speculative_search(
+                    travel_details,
+                    self._build_search_preferences(effective_from_location, flight_preference, travel_class, sort_order),
+                    getattr(request, 'session_hash', None) or 'default'
+                )
+            except Exception as e:
+                logger.warning("Could not start speculative search: %s", e)
         
         # Success message
         success_msg = "✅ **Travel Details Extracted Successfully!**"
         
-        return success_msg, details_display
+        return success_msg, details_display, travel_details
     
-    def search_flights_with_status(self, from_location, stops_preference, travel_class, progress=gr.Progress()):
+    async def search_flights_with_status(self, travel_details, from_location, stops_preference, travel_class, sort_order="departure", progress=gr.Progress()):
         """
-        Search for flights with status updates and progress indication
+        Search for flights, yielding (results HTML, status HTML) as each stage completes
+        Round trips show the outbound leg as soon as it is parsed and append the return leg when it lands;
+        awaits the asyncio searcher so no worker thread is held during SerpAPI calls
         """
-        if not self.travel_details:
-            return """
+        if not travel_details:
+            yield """
             <div style="color: orange; padding: 20px; text-align: center;">
                 <h3>⚠️ No Travel Details</h3>
                 <p>Please extract travel details first by pasting your travel approval text.</p>
             </div>
             """, ""
+            return
         
         try:
-            # Show initial progress
-            progress(0.0, desc="🔍 Starting flight search...")
+            progress(0.0, desc="✈️ Getting flights info...")
+            yield "", """
+            <div class="loading-indicator">
+                <span class="loading-spinner"></span> <strong>Searching flights...</strong>
+            </div>
+            """
             
             # Update search preferences with user inputs
-            search_preferences = {
-                'from_location': from_location,
-                'stops': int(stops_preference),
-                'travel_class': int(travel_class)
-            }
-            
-            progress(0.2, desc="⚙️ Setting up search parameters...")
-            
-            # Search for real flights using SerpAPI with preferences
-            progress(0.4, desc="✈️ Getting flights info...")
-            search_result = self.flight_searcher.search_flights_with_preferences(
-                self.travel_details, 
-                search_preferences
-            )
-            
-            progress(0.7, desc="📊 Processing flight data...")
-            
-            # Format results for display
-            flight_results = self.flight_searcher.format_flights_for_display(search_result)
-            
-            progress(0.9, desc="🎯 Formatting results...")
-            
-            # Small delay to show final progress
-            import time
-            time.sleep(0.5)
-            
-            progress(1.0, desc="✅ Flight search completed!")
-            
-            return flight_results, """
+            search_preferences = self._build_search_preferences(from_location, stops_preference, travel_class, sort_order)
+            
+            # A finished speculative search is shown in one step; otherwise stream the legs as they land
+            search_result = await self._take_prefetched_search(travel_details, search_preferences)
+            if search_result is not None:
+                results = self._single_result(search_result)
+            else:
+                results = self.flight_searcher.search_flights_progressive_async(travel_details, search_preferences)
+            
+            async for search_result in results:
+                if search_result.get('return', {}).get('pending'):
+                    progress(0.5, desc="🛬 Outbound flights ready, searching return flights...")
+                    yield self.flight_searcher.format_flights_for_display(search_result), """
+            <div class="loading-indicator">
+                <span class="loading-spinner"></span> <strong>Outbound flights ready</strong>, searching return flights...
+            </div>
+            """
+                    continue
+                
+                flight_results = self.flight_searcher.format_flights_for_display(search_result)
+                progress(1.0, desc="✅ Flight search completed!")
+                yield flight_results, """
             <div class="loading-indicator" style="background: #d4edda; border-color: #c3e6cb; color: #155724;">
                 ✅ <strong>Flight search completed successfully!</strong>
             </div>
@@ -91,17 +242,23 @@ class FlightAI:
                 <p><small>Please check your SerpAPI configuration and try again.</small></p>
             </div>
             """
-            return error_html, f"""
+            yield error_html, f"""
             <div class="loading-indicator" style="background: #f8d7da; border-color: #f5c6cb; color: #721c24;">
                 ❌ <strong>Search failed:</strong> {str(e)}
             </div>
             """
+    
+    async def _single_result(self, search_result):
+        """
+        Async generator yielding one already complete search result
+        """
+        yield search_result
 
-    def search_flights(self, from_location, stops_preference, travel_class, progress=gr.Progress()):
+    def search_flights(self, travel_details, from_location, stops_preference, travel_class, sort_order="departure", progress=gr.Progress()):
         """
         Search for flights based on extracted travel details and user preferences using SerpAPI
         """
-        if not self.travel_details:
+        if not travel_details:
             return """
             <div style="color: orange; padding: 20px; text-align: center;">
                 <h3>⚠️ No Travel Details</h3>
@@ -114,18 +271,14 @@ class FlightAI:
             progress(0.1, desc="🔍 Initializing flight search...")
             
             # Update search preferences with user inputs
-            search_preferences = {
-                'from_location': from_location,
-                'stops': int(stops_preference),
-                'travel_class': int(travel_class)
-            }
+            search_preferences = self._build_search_preferences(from_location, stops_preference, travel_class, sort_order)
             
             progress(0.3, desc="⚙️ Setting up search parameters...")
             
             # Search for real flights using SerpAPI with preferences
             progress(0.5, desc="✈️ Searching flights with SerpAPI...")
             search_result = self.flight_searcher.search_flights_with_preferences(
-                self.travel_details, 
+                travel_details, 
                 search_preferences
             )
             
@@ -169,21 +322,21 @@ class FlightAI:
                 else:
                     full_url = f"{url}?{post_data}"
                 
-                print(f"DEBUG: Using SerpAPI booking_request for {book_with}: {full_url[:100]}...")
+                logger.debug("Using SerpAPI booking_request for %s: %s...", book_with, full_url[:100])
                 return full_url
             elif url:
                 # If we have URL but no post_data, use URL directly
-                print(f"DEBUG: Using SerpAPI booking URL (no post_data) for {book_with}: {url}")
+                logger.debug("Using SerpAPI booking URL (no post_data) for %s: %s", book_with, url)
                 return url
         
         # Second priority: Skip incomplete Google redirect URLs 
         # These come as just "https://www.google.com/travel/clk/f" without the actual redirect data
         if raw_url and raw_url.startswith('https://www.google.com/travel/clk') and len(raw_url) > 50:
             # Only use Google URLs if they have substantial query parameters
-            print(f"DEBUG: Using complete Google redirect URL for {book_with}: {raw_url}")
+            logger.debug("Using complete Google redirect URL for %s: %s", book_with, raw_url)
             return raw_url
         elif raw_url and raw_url.startswith('https://www.google.com/travel/clk'):
-            print(f"DEBUG: Skipping incomplete Google redirect URL for {book_with}: {raw_url}")
+            logger.debug("Skipping incomplete Google redirect URL for %s: %s", book_with, raw_url)
             # Fall through to platform-specific URLs
         
         # Third priority: If we have a valid external URL, use it
@@ -612,6 +765,11 @@ def create_flight_ai_interface():
     """
     app = FlightAI()
     
+    # Queue limits: parsing is cheap and CPU-bound (worker threads); searches are async and mostly wait on SerpAPI
+    parse_concurrency_limit = int(os.getenv('PARSE_CONCURRENCY_LIMIT', '8'))
+    search_concurrency_limit = int(os.getenv('SEARCH_CONCURRENCY_LIMIT', '16'))
+    queue_max_size = int(os.getenv('QUEUE_MAX_SIZE', '100'))
+    
     # Sample travel approval text
     sample_text = """Your Travel Request Has Been Approved.
 Dear Ankit , Kapur,
@@ -755,6 +913,16 @@ Singapore"""
                         interactive=True
                     )
                 
+                sort_order = gr.Dropdown(
+                    label="📊 Sort Results",
+                    choices=[
+                        ("Earliest departure (all flights)", "departure"),
+                        ("Best value (top picks by price, duration & stops)", "best")
+                    ],
+                    value="departure",
+                    interactive=True
+                )
+                
                 success_msg = gr.Markdown("")
                 details_output = gr.Markdown("")
         
@@ -772,49 +940,65 @@ Singapore"""
         gr.Markdown("## ✈️ Flight Search Results")
         flight_results = gr.HTML("")
         
+        # Parsed approval of this browser session (each session gets its own copy)
+        travel_details_state = gr.State({})
+        
         # Note: Booking options are now available directly on flight cards via clickable buttons
         
         # Event handlers
         approval_input.change(
             fn=app.process_travel_approval,
-            inputs=[approval_input, from_location, stops_preference, travel_class],
-            outputs=[success_msg, details_output]
+            inputs=[approval_input, from_location, stops_preference, travel_class, sort_order],
+            outputs=[success_msg, details_output, travel_details_state],
+            concurrency_limit=parse_concurrency_limit,
+            concurrency_id="parse_approval"
         )
         
         from_location.change(
             fn=app.process_travel_approval,
-            inputs=[approval_input, from_location, stops_preference, travel_class],
-            outputs=[success_msg, details_output]
+            inputs=[approval_input, from_location, stops_preference, travel_class, sort_order],
+            outputs=[success_msg, details_output, travel_details_state],
+            concurrency_limit=parse_concurrency_limit,
+            concurrency_id="parse_approval"
         )
         
         stops_preference.change(
             fn=app.process_travel_approval,
-            inputs=[approval_input, from_location, stops_preference, travel_class],
-            outputs=[success_msg, details_output]
+            inputs=[approval_input, from_location, stops_preference, travel_class, sort_order],
+            outputs=[success_msg, details_output, travel_details_state],
+            concurrency_limit=parse_concurrency_limit,
+            concurrency_id="parse_approval"
         )
         
         travel_class.change(
             fn=app.process_travel_approval,
-            inputs=[approval_input, from_location, stops_preference, travel_class],
-            outputs=[success_msg, details_output]
+            inputs=[approval_input, from_location, stops_preference, travel_class, sort_order],
+            outputs=[success_msg, details_output, travel_details_state],
+            concurrency_limit=parse_concurrency_limit,
+            concurrency_id="parse_approval"
         )
         
-        def search_and_update_status(from_location, stops_preference, travel_class):
-            """Wrapper to handle search with status updates"""            
-            flight_results, status_msg = app.search_flights_with_status(
-                from_location, stops_preference, travel_class
-            )
-            return flight_results, status_msg
+        async def search_and_update_status(travel_details, from_location, stops_preference, travel_class, sort_order, progress=gr.Progress()):
+            """Wrapper to stream search results with status updates"""            
+            async for flight_results, status_msg in app.search_flights_with_status(
+                travel_details, from_location, stops_preference, travel_class, sort_order, progress
+            ):
+                yield flight_results, status_msg
         
         search_btn.click(
             fn=search_and_update_status,
-            inputs=[from_location, stops_preference, travel_class],
-            outputs=[flight_results, search_status]
+            inputs=[travel_details_state, from_location, stops_preference, travel_class, sort_order],
+            outputs=[flight_results, search_status],
+            concurrency_limit=search_concurrency_limit,
+            concurrency_id="flight_search"
         )
     
+    interface.queue(max_size=queue_max_size)
     return interface
 
 if __name__ == "__main__":
+    configure_logging()
+    
     # Create and launch the interface
     demo = create_flight_ai_interface()
     demo.launch(
@@ -0,0 +1,237 @@
+"""
+Batch ingestion of travel approval emails
+Streams messages from an mbox file, a directory of .eml files or a JSONL file through
+TravelTextParser.extract_travel_details on a process pool and writes one JSONL record per approval:
+
+    {"id": "...", "source": "...", "status": "ok", "details": {...}, "missing": []}
+
+status is ok (destination and departure found), incomplete (some fields found), no_match
+(nothing recognised) or error (the message could not be read or parsed). Messages are read one
+at a time and at most --workers * --window chunks are in flight, so memory stays flat however
+large the mailbox is; records are written in input order.
+
+Usage:
+    python batch_ingest.py approvals.mbox -o approvals.jsonl
+    python batch_ingest.py exports/eml/ --workers 8
+    python batch_ingest.py requests.jsonl --text-field body --id-field ticket -o parsed.jsonl
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from email import message_from_bytes, policy
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fields an approval needs before a flight search can run
+REQUIRED_FIELDS = ('destination', 'departure')
+# A message where none of these were found is not an approval
+MATCH_FIELDS = ('traveler', 'reference', 'destination', 'departure', 'return')
+
+_TAG = re.compile(r'<[^>]+>')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+
+def _email_text(raw: bytes) -> Tuple[Optional[str], str]:
+    """
+    (Message-ID, plain-text body) of a raw RFC 822 message; HTML-only bodies are reduced to text
+    """
+    message = message_from_bytes(raw, policy=policy.default)
+    body = message.get_body(preferencelist=('plain', 'html'))
+    text = body.get_content() if body is not None else ''
+    if body is not None and body.get_content_type() == 'text/html':
+        text = _BLANK_LINES.sub('\n', _TAG.sub('\n', text))
+    return message.get('Message-ID'), text
+
+
+def iter_mbox(path: str) -> Iterator[Tuple[str, Optional[str], Optional[bytes]]]:
+    """
+    Yield (source, None, raw message) for each message of an mbox file, reading it line by line
+    (mailbox.mbox indexes the whole file up front)
+    """
+    index = 0
+    lines: List[bytes] = []
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.startswith(b'From ') and (not lines or lines[-1] in (b'\n', b'\r\n')):
+                if lines:
+                    yield f"{path}#{index}", None, b''.join(lines)
+                    index += 1
+                lines = []
+                continue
+            # mboxrd quoting: '>From ' at the start of a body line stands for 'From '
+            if line.startswith(b'>') and line.lstrip(b'>').startswith(b'From '):
+                line = line[1:]
+            lines.append(line)
+    if lines:
+        yield f"{path}#{index}", None, b''.join(lines)
+
+
+def iter_eml_dir(path: str) -> Iterator[Tuple[str, Optional[str], Optional[bytes]]]:
+    """
+    Yield (source, None, raw message) for each .eml file in a directory, in directory order
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith('.eml'):
+                with open(entry.path, 'rb') as f:
+                    yield entry.path, None, f.read()
+
+
+def iter_jsonl(path: str, text_field: str, id_field: str) -> Iterator[Tuple[str, Optional[str], Optional[bytes]]]:
+    """
+    Yield (source, id, text encoded as UTF-8) for each line of a JSONL file (optionally gzipped)
+    Lines that are not valid JSON objects with a text field are yielded with a None payload
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            source = f"{path}:{line_number}"
+            try:
+                record = json.loads(line)
+                text = record[text_field]
+            except (ValueError, KeyError, TypeError):
+                yield source, None, None
+                continue
+            record_id = record.get(id_field)
+            yield source, str(record_id) if record_id is not None else None, str(text).encode('utf-8')
+
+
+def detect_format(path: str) -> str:
+    if os.path.isdir(path):
+        return 'eml'
+    if path.endswith(('.jsonl', '.jsonl.gz', '.ndjson')):
+        return 'jsonl'
+    return 'mbox'
+
+
+def iter_messages(path: str, fmt: str = 'auto', text_field: str = 'text', id_field: str = 'id'):
+    fmt = detect_format(path) if fmt == 'auto' else fmt
+    if fmt == 'eml':
+        return iter_eml_dir(path)
+    if fmt == 'jsonl':
+        return iter_jsonl(path, text_field, id_field)
+    return iter_mbox(path)
+
+
+_parser = None
+
+
+def _worker_parser():
+    global _parser
+    if _parser is None:
+        from text_parser import TravelTextParser
+        _parser = TravelTextParser()
+    return _parser
+
+
+def parse_record(source: str, record_id: Optional[str], payload: Optional[bytes], is_email: bool) -> Dict:
+    """
+    Parse one message into an output record (runs in a worker process)
+    """
+    record = {"id": record_id, "source": source}
+    if payload is None:
+        record.update(status="error", error="Unreadable record (invalid JSON or missing text field)")
+        return record
+    try:
+        if is_email:
+            message_id, text = _email_text(payload)
+            record["id"] = record_id or message_id
+        else:
+            text = payload.decode('utf-8')
+
+        details = _worker_parser().extract_travel_details(text)
+        if all(details.get(field, 'Not specified') == 'Not specified' for field in MATCH_FIELDS):
+            record.update(status="no_match", details={}, missing=list(REQUIRED_FIELDS))
+            return record
+
+        missing = [field for field in REQUIRED_FIELDS if details.get(field, 'Not specified') == 'Not specified']
+        record.update(status="incomplete" if missing else "ok", details=details, missing=missing)
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    return record
+
+
+def parse_chunk(chunk: List[Tuple[str, Optional[str], Optional[bytes]]], is_email: bool) -> List[Dict]:
+    return [parse_record(source, record_id, payload, is_email) for source, record_id, payload in chunk]
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ingest(messages: Iterable, is_email: bool, workers: int = 0, chunk_size: int = 64, window: int = 4) -> Iterator[Dict]:
+    """
+    Parse messages on a process pool, yielding records in input order
+    At most workers * window chunks are queued, so a slow consumer never makes the reader run ahead
+    workers=0 uses os.cpu_count(); workers=1 parses in-process
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunked(messages, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from parse_chunk(chunk, is_email)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(parse_chunk, chunk, is_email))
+            if len(pending) >= workers * window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Parse travel approval emails in bulk into JSONL records')
+    parser.add_argument('input', help='mbox file, directory of .eml files, or JSONL file')
+    parser.add_argument('-o', '--output', help='Output JSONL path (default: stdout)')
+    parser.add_argument('--format', choices=['auto', 'mbox', 'eml', 'jsonl'], default='auto')
+    parser.add_argument('--text-field', default='text', help='JSONL field holding the approval text')
+    parser.add_argument('--id-field', default='id', help='JSONL field holding the record id')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (default: CPU count; 1 = no pool)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Messages per worker task')
+    parser.add_argument('--window', type=int, default=4, help='Chunks in flight per worker')
+    args = parser.parse_args(argv)
+
+    from logging_config import configure_logging
+    configure_logging()
+
+    fmt = detect_format(args.input) if args.format == 'auto' else args.format
+    messages = iter_messages(args.input, fmt, args.text_field, args.id_field)
+
+    counts: Dict[str, int] = {}
+    started = time.perf_counter()
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for record in ingest(messages, fmt != 'jsonl', args.workers, args.chunk_size, args.window):
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    logger.info("Parsed %s approvals in %.2fs (%.0f/s): %s", total, elapsed, total / elapsed if elapsed else 0, counts)
+
+
+if __name__ == "__main__":
+    main()
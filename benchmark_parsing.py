@@ -0,0 +1,99 @@
+"""
+Reproducible benchmark of flight result parsing and rendering
+Replays search responses from a fixture archive (recorded with SERPAPI_RECORD_PATH) through
+FlightSearcher._parse_flight_results and format_flights_for_display, without any network calls.
+Also reports the memory still held by the parsed flights once the API response is dropped.
+Falls back to synthetic serpapi_stub payloads when no archive is given.
+
+Usage:
+    SERPAPI_RECORD_PATH=fixtures.jsonl.gz python app.py     # capture real traffic first
+    python benchmark_parsing.py --archive fixtures.jsonl.gz --repeat 20
+    python benchmark_parsing.py --synthetic-flights 200
+"""
+import gc
+import os
+import json
+import time
+import tracemalloc
+import argparse
+import statistics
+from typing import Dict, List, Optional
+
+
+def load_search_payloads(archive_path: Optional[str], synthetic_flights: int) -> List[Dict]:
+    """
+    Successful search responses (those with flight lists) from the archive, or one synthetic payload
+    """
+    if archive_path:
+        from serpapi_fixtures import FixtureArchive
+        payloads = []
+        for record in FixtureArchive(archive_path).records():
+            body = record.get("body")
+            if record.get("status") == 200 and isinstance(body, dict) and ('best_flights' in body or 'other_flights' in body):
+                payloads.append({"params": record.get("params", {}), "body": body})
+        return payloads
+
+    from serpapi_stub import synthetic_search
+    params = {'engine': 'google_flights', 'departure_id': 'BLR', 'arrival_id': 'LHR',
+              'outbound_date': '2027-06-15', 'travel_class': '1', 'stops': '0', 'type': '2'}
+    return [{"params": params, "body": synthetic_search(params, synthetic_flights)}]
+
+
+def time_call(fn, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def retained_bytes(searcher, body: Dict) -> int:
+    """
+    Bytes still allocated by parsed flights after the response they came from is released
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        response = json.loads(json.dumps(body))
+        flights = searcher._parse_flight_results(response)
+        del response
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del flights
+    return retained
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark FlightAI result parsing and rendering on recorded responses')
+    parser.add_argument('--archive', help='Fixture archive written by SERPAPI_RECORD_PATH')
+    parser.add_argument('--synthetic-flights', type=int, default=120, help='Flights per synthetic payload when no archive is given')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('SERPAPI_KEY', 'benchmark')
+    from flight_search import FlightSearcher
+    searcher = FlightSearcher()
+
+    payloads = load_search_payloads(args.archive, args.synthetic_flights)
+    if not payloads:
+        parser.error("No successful search responses found in the archive")
+
+    print(f"{'route':<22}{'flights':>8}{'parse ms (median)':>20}{'render ms (median)':>20}{'retained KB':>14}")
+    for payload in payloads:
+        params, body = payload["params"], payload["body"]
+        # Logging is left unconfigured (WARNING and above only), as at production log level
+        flights = searcher._parse_flight_results(body)
+        result = searcher._build_one_way_result(params, searcher._parse_leg_response(body), {}, 'outbound')
+        parse_times = time_call(lambda: searcher._parse_flight_results(body), args.repeat)
+        render_times = time_call(lambda: searcher.format_flights_for_display(result), args.repeat)
+        retained = retained_bytes(searcher, body)
+
+        route = f"{params.get('departure_id', '?')}->{params.get('arrival_id', '?')} {params.get('outbound_date', '')}"
+        print(f"{route:<22}{len(flights):>8}{statistics.median(parse_times) * 1000:>20.2f}{statistics.median(render_times) * 1000:>20.2f}{retained / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
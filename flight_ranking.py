@@ -0,0 +1,112 @@
+import os
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+from flight_table import FlightTable
+
+DEFAULT_WEIGHTS = {'price': 0.5, 'duration': 0.3, 'stops': 0.2, 'departure': 0.0}
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """
+    Parse 'price=0.5,duration=0.3,stops=0.2' into a weights dict (unknown names are ignored)
+    """
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in spec.split(','):
+        name, _, value = part.partition('=')
+        name = name.strip()
+        if name in weights and value.strip():
+            try:
+                weights[name] = float(value)
+            except ValueError:
+                pass
+    return weights
+
+
+class FlightRanker:
+    """
+    Ranks parsed flights on price, total duration and stops (and optionally closeness to a preferred departure time)
+    Provides the Pareto frontier (flights no other flight beats on every criterion), a weighted score over
+    min-max normalised columns, and top-k selection with np.argpartition so large result sets are never fully sorted.
+    """
+    PARETO_CRITERIA = ('price', 'duration', 'stops')
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, preferred_departure_minute: int = 9 * 60):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.preferred_departure_minute = preferred_departure_minute
+
+    @classmethod
+    def from_env(cls) -> 'FlightRanker':
+        return cls(
+            weights=parse_weights(os.getenv('RANK_WEIGHTS', '')),
+            preferred_departure_minute=int(os.getenv('RANK_PREFERRED_DEPARTURE_MINUTE', str(9 * 60)))
+        )
+
+    def pareto_mask(self, table: FlightTable, criteria: Sequence[str] = PARETO_CRITERIA, chunk: int = 256) -> np.ndarray:
+        """
+        Boolean mask (in table order) of flights on the Pareto frontier, all criteria minimised
+        Dominance is checked with broadcasting in row chunks to bound memory on large tables
+        """
+        values = np.column_stack([table.column(name).astype(np.float64) for name in criteria]) if len(table) else np.empty((0, len(criteria)))
+        dominated = np.zeros(len(values), dtype=bool)
+        for start in range(0, len(values), chunk):
+            block = values[start:start + chunk, None, :]  # (block, 1, criteria)
+            no_worse = np.all(values[None, :, :] <= block, axis=2)
+            better = np.any(values[None, :, :] < block, axis=2)
+            dominated[start:start + chunk] = np.any(no_worse & better, axis=1)
+        return ~dominated
+
+    def scores(self, table: FlightTable) -> np.ndarray:
+        """
+        Weighted score per flight in table order (lower is better)
+        """
+        total = np.zeros(len(table), dtype=np.float64)
+        if not len(table):
+            return total
+
+        columns = {
+            'price': table.column('price').astype(np.float64),
+            'duration': table.column('duration').astype(np.float64),
+            'stops': table.column('stops').astype(np.float64)
+        }
+        if self.weights.get('departure'):
+            departure = table.column('departure_minute').astype(np.float64)
+            distance = np.abs(departure - self.preferred_departure_minute)
+            columns['departure'] = np.where(departure < 0, 720.0, np.minimum(distance, 1440 - distance))
+
+        for name, values in columns.items():
+            weight = self.weights.get(name, 0.0)
+            if not weight:
+                continue
+            spread = values.max() - values.min()
+            total += weight * ((values - values.min()) / spread if spread > 0 else 0.0)
+        return total
+
+    def top_k(self, table: FlightTable, k: int) -> FlightTable:
+        """
+        The k best flights by weighted score, best first (argpartition, then a sort of only those k)
+        """
+        scores = self.scores(table)
+        if k <= 0 or k >= len(scores):
+            return table.take(np.argsort(scores, kind='stable'))
+        candidates = np.argpartition(scores, k - 1)[:k]
+        return table.take(candidates[np.argsort(scores[candidates], kind='stable')])
+
+    def badges(self, table: FlightTable) -> Dict[int, List[str]]:
+        """
+        Value badges keyed by id() of the Flight record: BEST VALUE, CHEAPEST, FASTEST and OPTIMAL (Pareto frontier)
+        """
+        if not len(table):
+            return {}
+        flights = table.to_list()
+        labels: Dict[int, List[str]] = {}
+
+        def add(position: int, label: str):
+            labels.setdefault(id(flights[position]), []).append(label)
+
+        add(int(np.argmin(self.scores(table))), 'BEST VALUE')
+        add(int(np.argmin(table.column('price'))), 'CHEAPEST')
+        add(int(np.argmin(table.column('duration'))), 'FASTEST')
+        for position in np.flatnonzero(self.pareto_mask(table)):
+            if id(flights[position]) not in labels:
+                add(int(position), 'OPTIMAL')
+        return labels
@@ -0,0 +1,81 @@
+from typing import Any, Dict, Optional, Tuple
+
+class Flight:
+    """
+    Compact record for one parsed flight option
+    Holds only what the results UI and booking flow need, using __slots__ instead of a per-flight
+    dict. The raw SerpAPI flight object is kept only when requested (KEEP_RAW_FLIGHT_DATA), so a
+    search result no longer pins the whole API response in memory.
+    Supports dict-style reads (flight['price_display'], flight.get('airline')) for existing callers.
+    """
+    __slots__ = (
+        'airline', 'flight_number', 'route', 'departure_time', 'arrival_time', 'duration',
+        'price_display', 'price_value', 'stops', 'booking_token', 'departure_token',
+        'raw_departure_time', 'raw_arrival_time', 'departure_id', 'arrival_id',
+        'duration_minutes', 'stop_count', 'layover_ids', 'flight_data'
+    )
+
+    def __init__(self, airline: str, flight_number: str, route: str, departure_time: str, arrival_time: str,
+                 duration: str, price_display: str, price_value: float, stops: str, booking_token: str,
+                 departure_token: str, raw_departure_time: str, raw_arrival_time: str, departure_id: str,
+                 arrival_id: str, duration_minutes: int, stop_count: int, layover_ids: Tuple[str, ...] = (),
+                 flight_data: Optional[Dict] = None):
+        self.airline = airline
+        self.flight_number = flight_number
+        self.route = route
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.duration = duration
+        self.price_display = price_display
+        self.price_value = price_value
+        self.stops = stops
+        self.booking_token = booking_token
+        self.departure_token = departure_token
+        self.raw_departure_time = raw_departure_time
+        self.raw_arrival_time = raw_arrival_time
+        self.departure_id = departure_id
+        self.arrival_id = arrival_id
+        self.duration_minutes = duration_minutes
+        self.stop_count = stop_count
+        self.layover_ids = layover_ids
+        self.flight_data = flight_data
+
+    @property
+    def primary_token(self) -> Optional[str]:
+        """
+        The token to actually use for booking lookups (booking_token preferred, None if unavailable)
+        """
+        return self.booking_token or self.departure_token or None
+
+    def _has_field(self, key: str) -> bool:
+        return key in self.__slots__ or key == 'primary_token'
+
+    def __getitem__(self, key: str) -> Any:
+        if not isinstance(key, str) or not self._has_field(key):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if not isinstance(key, str) or not self._has_field(key):
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return isinstance(key, str) and self._has_field(key)
+
+    def keys(self):
+        return list(self.__slots__) + ['primary_token']
+
+    def to_dict(self) -> Dict:
+        """
+        Plain dict copy (e.g. for JSON output); flight_data is included only when it was kept
+        """
+        data = {key: getattr(self, key) for key in self.__slots__ if key != 'flight_data'}
+        data['layover_ids'] = list(self.layover_ids)
+        data['primary_token'] = self.primary_token
+        if self.flight_data is not None:
+            data['flight_data'] = self.flight_data
+        return data
+
+    def __repr__(self) -> str:
+        return f"Flight({self.flight_number!r}, {self.route!r}, {self.departure_time!r}, {self.price_display!r})"
@@ -1,17 +1,97 @@
 import os
+import time
+import asyncio
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import json
+import logging
 from typing import Dict, List, Optional
+import httpx
+from serpapi_transport import SerpApiTransport, TransportError, CircuitOpenError
+from serpapi_keys import SerpApiKeyPool
+from flight_record import Flight
+from flight_table import FlightTable
+from flight_ranking import FlightRanker
+from airports import CITY_TO_CODE, city_for_code, country_for_code, timezone_for_code
+from airport_matcher import AirportMatcher, AirportMatch
+from response_cache import ResponseCache, DiskResponseStore, SingleFlight, request_fingerprint
+
+logger = logging.getLogger(__name__)
+# Per-flight and per-booking-source detail, sampled by logging_config.SamplingFilter
+flight_logger = logging.getLogger('flight_search.flights')
+source_logger = logging.getLogger('flight_search.booking_sources')
 
 class FlightSearcher:
     def __init__(self):
-        # SerpAPI configuration
-        self.api_key = os.getenv('SERPAPI_KEY', 'your_serpapi_key_here')
-        self.base_url = "https://serpapi.com/search"
+        # SerpAPI configuration: SERPAPI_KEYS (comma-separated) or a single SERPAPI_KEY
+        self.key_pool = SerpApiKeyPool.from_env()
+        self.api_key = self.key_pool.primary_key
+        # SERPAPI_BASE_URL can point at a local stand-in (serpapi_stub.py) for offline load testing
+        self.base_url = os.getenv('SERPAPI_BASE_URL', "https://serpapi.com/search")
+        
+        # Pooled keep-alive transport shared by every SerpAPI call (timeout from API_TIMEOUT)
+        # The transport draws the api_key of each request from the key pool
+        self.transport = SerpApiTransport(self.base_url, key_pool=self.key_pool)
+        
+        # In-process TTL + LRU cache of SerpAPI responses keyed by normalized request parameters
+        self.response_cache = ResponseCache(
+            ttl=float(os.getenv('CACHE_TTL_SECONDS', '900')),
+            max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '256')),
+            max_bytes=int(os.getenv('CACHE_MAX_BYTES', '0'))
+        )
+        
+        # Optional persistent response store shared across restarts and processes on this host
+        store_path = os.getenv('RESPONSE_STORE_PATH', '').strip()
+        self.response_store = DiskResponseStore(
+            store_path,
+            ttl=float(os.getenv('RESPONSE_STORE_TTL_SECONDS', '3600')),
+            max_rows=int(os.getenv('RESPONSE_STORE_MAX_ROWS', '10000')),
+            compact_interval=float(os.getenv('RESPONSE_STORE_COMPACT_SECONDS', '300'))
+        ) if store_path else None
+        
+        # Single-flight coalescing of identical in-flight searches and booking lookups
+        self.single_flight = SingleFlight()
         self.default_departure_city = "Bangalore"
         self.default_departure_code = "BLR"
         
+        # Fetch each leg with the widest stops setting once and derive narrower stop filters locally
+        self.superset_stops_search = os.getenv('SUPERSET_STOPS_SEARCH', 'true').lower() in ('1', 'true', 'yes')
+        self.parsed_results_cache = ResponseCache(
+            ttl=float(os.getenv('CACHE_TTL_SECONDS', '900')),
+            max_entries=int(os.getenv('PARSED_CACHE_MAX_ENTRIES', '64'))
+        )
+        
+        # Ranking of parsed flights (Pareto frontier + weighted score from RANK_WEIGHTS) for the "best value" view
+        self.ranker = FlightRanker.from_env()
+        self.ranked_display_limit = int(os.getenv('RANKED_DISPLAY_LIMIT', '10'))
+        
+        # Bounded worker pool shared by all searches (e.g. outbound and return legs run in parallel)
+        self.max_search_workers = int(os.getenv('SEARCH_WORKERS', '4'))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_search_workers, thread_name_prefix='flight-search')
+        
+        # Booking options keyed by booking token; expiry kept below SerpAPI's booking token lifetime
+        self.booking_cache = ResponseCache(
+            ttl=float(os.getenv('BOOKING_CACHE_TTL_SECONDS', '600')),
+            max_entries=int(os.getenv('BOOKING_CACHE_MAX_ENTRIES', '128'))
+        )
+        
+        # Optional background prefetch of booking options for the top N flights of each leg (0 disables)
+        self.booking_prefetch_top_n = int(os.getenv('BOOKING_PREFETCH_TOP_N', '0'))
+        self.booking_prefetch_max_pending = int(os.getenv('BOOKING_PREFETCH_MAX_PENDING', '8'))
+        self._booking_prefetch_pending = 0
+        self._booking_prefetch_lock = threading.Lock()
+        self._booking_prefetch_executor = None
+        if self.booking_prefetch_top_n > 0:
+            self._booking_prefetch_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('BOOKING_PREFETCH_WORKERS', '2')),
+                thread_name_prefix='booking-prefetch'
+            )
+        
+        # Keep each flight's raw SerpAPI object on parsed results (off: only the fields the UI needs are kept)
+        self.keep_raw_flight_data = os.getenv('KEEP_RAW_FLIGHT_DATA', 'false').lower() in ('1', 'true', 'yes')
+        
         # Search preferences (can be customized later)
         self.search_preferences = {
             'adults': 1,
@@ -23,85 +103,14 @@ class FlightSearcher:
             'deep_search': True  # More accurate results
         }
         
-        # Comprehensive global airport code mapping
-        self.city_codes = {
-            # India
-            'mumbai': 'BOM', 'bombay': 'BOM',
-            'delhi': 'DEL', 'new delhi': 'DEL',
-            'bangalore': 'BLR', 'bengaluru': 'BLR',
-            'hyderabad': 'HYD', 'hyd': 'HYD',
-            'chennai': 'MAA', 'madras': 'MAA',
-            'kolkata': 'CCU', 'calcutta': 'CCU',
-            'pune': 'PNQ', 'poona': 'PNQ',
-            'goa': 'GOI', 'panaji': 'GOI',
-            'ahmedabad': 'AMD', 'kochi': 'COK', 'cochin': 'COK',
-            'trivandrum': 'TRV', 'thiruvananthapuram': 'TRV',
-            'jaipur': 'JAI', 'udaipur': 'UDR', 'jodhpur': 'JDH',
-            
-            # Southeast Asia
-            'singapore': 'SIN', 'bangkok': 'BKK', 'kuala lumpur': 'KUL',
-            'jakarta': 'CGK', 'manila': 'MNL', 'ho chi minh': 'SGN',
-            'hanoi': 'HAN', 'phnom penh': 'PNH', 'yangon': 'RGN',
-            'denpasar': 'DPS', 'bali': 'DPS',
-            
-            # Middle East
-            'dubai': 'DXB', 'abu dhabi': 'AUH', 'doha': 'DOH',
-            'kuwait': 'KWI', 'riyadh': 'RUH', 'jeddah': 'JED',
-            'muscat': 'MCT', 'tehran': 'IKA', 'baghdad': 'BGW',
-            'beirut': 'BEY', 'amman': 'AMM', 'tel aviv': 'TLV',
-            
-            # Europe
-            'london': 'LHR', 'heathrow': 'LHR', 'gatwick': 'LGW',
-            'manchester': 'MAN', 'edinburgh': 'EDI', 'glasgow': 'GLA',
-            'paris': 'CDG', 'charles de gaulle': 'CDG', 'orly': 'ORY',
-            'amsterdam': 'AMS', 'frankfurt': 'FRA', 'munich': 'MUC',
-            'berlin': 'BER', 'hamburg': 'HAM', 'cologne': 'CGN',
-            'zurich': 'ZUR', 'geneva': 'GVA', 'basel': 'BSL',
-            'madrid': 'MAD', 'barcelona': 'BCN', 'lisbon': 'LIS',
-            'rome': 'FCO', 'fiumicino': 'FCO', 'milan': 'MXP',
-            'venice': 'VCE', 'naples': 'NAP', 'vienna': 'VIE',
-            'brussels': 'BRU', 'stockholm': 'ARN', 'copenhagen': 'CPH',
-            'oslo': 'OSL', 'helsinki': 'HEL', 'reykjavik': 'KEF',
-            'athens': 'ATH', 'istanbul': 'IST', 'ankara': 'ESB',
-            'moscow': 'SVO', 'st petersburg': 'LED',
-            
-            # North America  
-            'new york': 'JFK', 'jfk': 'JFK', 'laguardia': 'LGA', 'newark': 'EWR',
-            'los angeles': 'LAX', 'san francisco': 'SFO', 'chicago': 'ORD',
-            'miami': 'MIA', 'las vegas': 'LAS', 'seattle': 'SEA',
-            'boston': 'BOS', 'washington': 'DCA', 'atlanta': 'ATL',
-            'denver': 'DEN', 'phoenix': 'PHX', 'dallas': 'DFW',
-            'houston': 'IAH', 'philadelphia': 'PHL', 'detroit': 'DTW',
-            'toronto': 'YYZ', 'vancouver': 'YVR', 'montreal': 'YUL',
-            'calgary': 'YYC', 'ottawa': 'YOW', 'winnipeg': 'YWG',
-            'mexico city': 'MEX', 'cancun': 'CUN', 'guadalajara': 'GDL',
-            
-            # East Asia
-            'tokyo': 'NRT', 'narita': 'NRT', 'haneda': 'HND',
-            'osaka': 'KIX', 'kyoto': 'KIX', 'nagoya': 'NGO',
-            'seoul': 'ICN', 'incheon': 'ICN', 'gimpo': 'GMP',
-            'busan': 'PUS', 'beijing': 'PEK', 'capital': 'PEK',
-            'shanghai': 'PVG', 'pudong': 'PVG', 'hongqiao': 'SHA',
-            'guangzhou': 'CAN', 'shenzhen': 'SZX', 'chengdu': 'CTU',
-            'hong kong': 'HKG', 'macau': 'MFM', 'taipei': 'TPE',
-            'kaohsiung': 'KHH',
-            
-            # Oceania
-            'sydney': 'SYD', 'melbourne': 'MEL', 'brisbane': 'BNE',
-            'perth': 'PER', 'adelaide': 'ADL', 'darwin': 'DRW',
-            'auckland': 'AKL', 'wellington': 'WLG', 'christchurch': 'CHC',
-            'fiji': 'NAN', 'nadi': 'NAN',
-            
-            # Africa
-            'cairo': 'CAI', 'casablanca': 'CMN', 'johannesburg': 'JNB',
-            'cape town': 'CPT', 'nairobi': 'NBO', 'lagos': 'LOS',
-            'addis ababa': 'ADD', 'tunis': 'TUN', 'algiers': 'ALG',
-            
-            # South America
-            'sao paulo': 'GRU', 'rio de janeiro': 'GIG', 'brasilia': 'BSB',
-            'buenos aires': 'EZE', 'lima': 'LIM', 'bogota': 'BOG',
-            'santiago': 'SCL', 'caracas': 'CCS', 'quito': 'UIO'
-        }
+        # Shared, read-only city name -> airport code index (airports.py)
+        self.city_codes = CITY_TO_CODE
+        # Trigram-indexed fuzzy matcher over those names, with memoized lookups
+        self.airport_matcher = AirportMatcher(
+            CITY_TO_CODE,
+            min_similarity=float(os.getenv('AIRPORT_MATCH_MIN_SIMILARITY', '0.5')),
+            cache_entries=int(os.getenv('AIRPORT_MATCH_CACHE_ENTRIES', '1024'))
+        )
     
     def search_flights(self, travel_details: Dict[str, str]) -> Dict:
         """
@@ -114,14 +123,7 @@ class FlightSearcher:
         Search for flights using SerpAPI Google Flights with separate outbound and return requests
         """
         try:
-            # Check if it's a round trip
-            departure_date = self._format_date(travel_details.get('departure', ''))
-            return_date = self._format_date(travel_details.get('return', ''))
-            is_round_trip = return_date and return_date != departure_date
-            
-            print(f"DEBUG: Trip type: {'Round-trip' if is_round_trip else 'One-way'}")
-            
-            if is_round_trip:
+            if self._is_round_trip(travel_details):
                 # Make two separate API requests for round trip
                 return self._search_round_trip_flights(travel_details, preferences)
             else:
@@ -131,74 +133,230 @@ class FlightSearcher:
         except Exception as e:
             return {"error": f"Flight search failed: {str(e)}"}
     
+    async def search_flights_with_preferences_async(self, travel_details: Dict[str, str], preferences: Dict = None) -> Dict:
+        """
+        Asyncio counterpart of search_flights_with_preferences (no worker thread is held during the API calls)
+        """
+        try:
+            if self._is_round_trip(travel_details):
+                return await self._search_round_trip_flights_async(travel_details, preferences)
+            else:
+                return await self._search_one_way_flights_async(travel_details, preferences)
+                
+        except Exception as e:
+            return {"error": f"Flight search failed: {str(e)}"}
+    
+    async def search_flights_progressive_async(self, travel_details: Dict[str, str], preferences: Dict = None):
+        """
+        Async generator of search results as the legs land, so the UI can show the outbound leg early
+        A round trip yields the round-trip result with only the outbound leg filled in (return marked
+        pending), then the complete result; a one-way search yields its result once
+        """
+        try:
+            if not self._is_round_trip(travel_details):
+                yield await self._search_one_way_flights_async(travel_details, preferences)
+                return
+            
+            started = time.perf_counter()
+            preferences = preferences or {}
+            return_travel_details, return_preferences = self._build_return_leg(travel_details, preferences)
+            
+            # Both legs are in flight at once; only the order they are shown in is fixed. Each leg runs as its
+            # own task awaited through a shield, so a consumer going away never cancels a leg other sessions
+            # may be coalesced onto
+            outbound_task = asyncio.ensure_future(self._timed_leg_search_async(travel_details, preferences, "outbound"))
+            return_task = asyncio.ensure_future(self._timed_leg_search_async(return_travel_details, return_preferences, "return"))
+            try:
+                outbound_result, outbound_seconds = await asyncio.shield(outbound_task)
+                logger.debug("Outbound leg ready after %.3fs", time.perf_counter() - started)
+                yield {
+                    "success": True,
+                    "trip_type": "round_trip",
+                    "outbound": outbound_result,
+                    "return": {"pending": True},
+                    "search_info": self._build_round_trip_search_info(travel_details, preferences)
+                }
+                return_result, return_seconds = await asyncio.shield(return_task)
+            finally:
+                # A failed, cancelled or abandoned search drops whichever leg it stopped waiting on; the
+                # coalesced API request itself is detached, so only this consumer's wait is cancelled
+                for task in (outbound_task, return_task):
+                    if not task.done():
+                        task.cancel()
+                    elif not task.cancelled():
+                        task.exception()
+            
+            yield self._combine_round_trip_results(travel_details, preferences, outbound_result, return_result,
+                                                   outbound_seconds, return_seconds, started)
+            
+        except Exception as e:
+            yield {"error": f"Flight search failed: {str(e)}"}
+    
+    def has_searchable_route(self, travel_details: Dict[str, str], preferences: Dict = None) -> bool:
+        """
+        Check whether the travel details resolve to a route worth searching (known destination, distinct endpoints)
+        """
+        destination = (travel_details or {}).get('destination', '')
+        if not destination or destination.strip().lower() == 'not specified':
+            return False
+        
+        params = self._build_one_way_search_params(travel_details, preferences)
+        return bool(params) and params['departure_id'] != params['arrival_id']
+    
+    def _is_round_trip(self, travel_details: Dict[str, str]) -> bool:
+        """
+        Check whether the travel details describe a round trip
+        """
+        departure_date = self._format_date(travel_details.get('departure', ''))
+        return_date = self._format_date(travel_details.get('return', ''))
+        is_round_trip = bool(return_date and return_date != departure_date)
+        
+        logger.debug("Trip type: %s", 'Round-trip' if is_round_trip else 'One-way')
+        return is_round_trip
+    
     def _search_round_trip_flights(self, travel_details: Dict[str, str], preferences: Dict = None) -> Dict:
         """
         Search for round-trip flights with separate outbound and return requests
+        Both legs are submitted to the shared worker pool so they run concurrently
         """
         try:
-            print("DEBUG: Making separate outbound and return flight requests...")
-            
-            # Search outbound flights
-            outbound_result = self._search_one_way_flights(travel_details, preferences, flight_type="outbound")
-            
-            # Search return flights (reverse the route)
-            return_travel_details = travel_details.copy()
-            return_travel_details['departure'] = travel_details.get('return', '')  # Return date
-            
-            # Fix: Properly handle empty from_location by defaulting to Bangalore
-            origin_location = preferences.get('from_location', 'Bangalore')
-            if not origin_location or not origin_location.strip():
-                origin_location = 'Bangalore'
-            return_travel_details['destination'] = origin_location.lower()  # Going back to origin
-            
-            return_preferences = preferences.copy() if preferences else {}
-            return_preferences['from_location'] = travel_details.get('destination', '')  # Starting from original destination
-            
-            print(f"DEBUG: Return flight setup - from {return_preferences.get('from_location')} to {return_travel_details.get('destination')} on {return_travel_details.get('departure')}")
-            
-            return_result = self._search_one_way_flights(return_travel_details, return_preferences, flight_type="return")
+            logger.debug("Making concurrent outbound and return flight requests...")
+            started = time.perf_counter()
+            preferences = preferences or {}
+            return_travel_details, return_preferences = self._build_return_leg(travel_details, preferences)
             
-            print(f"DEBUG: Return flight result: {return_result.get('success', False)}")
-            if not return_result.get('success'):
-                print(f"DEBUG: Return flight error: {return_result.get('error', 'Unknown error')}")
+            # Run both legs in parallel on the shared pool
+            outbound_future = self._executor.submit(self._timed_leg_search, travel_details, preferences, "outbound")
+            return_future = self._executor.submit(self._timed_leg_search, return_travel_details, return_preferences, "return")
+            outbound_result, outbound_seconds = outbound_future.result()
+            return_result, return_seconds = return_future.result()
             
-            # Combine results - fix from_location defaulting like in travel details
-            from_location = preferences.get('from_location', 'Bangalore')
-            if not from_location or not from_location.strip():
-                from_location = 'Bangalore'
-            
-            destination = travel_details.get('destination', 'Unknown')
-            from_code = self._get_airport_code(from_location.lower())
-            to_code = self._get_airport_code(destination.lower())
-            from_city_corrected = self._get_corrected_city_name(from_code) if from_code else from_location.title()
-            to_city_corrected = self._get_corrected_city_name(to_code) if to_code else destination.title()
-            
-            search_info = {
-                "from_city": from_city_corrected,
-                "to_city": to_city_corrected,
-                "departure_date": self._format_date(travel_details.get('departure', '')),
-                "return_date": self._format_date(travel_details.get('return', '')),
-                "passengers": {
-                    "adults": preferences.get('adults', self.search_preferences.get('adults', 1)),
-                    "children": preferences.get('children', self.search_preferences.get('children', 0)), 
-                    "infants": preferences.get('infants', self.search_preferences.get('infants', 0))
-                },
-                "cabin_class": self._map_travel_class_to_cabin(preferences.get('travel_class', self.search_preferences.get('travel_class', 1)))
-            }
+            return self._combine_round_trip_results(travel_details, preferences, outbound_result, return_result,
+                                                    outbound_seconds, return_seconds, started)
             
-            print(f"DEBUG: Round-trip search_info - from_city: '{search_info.get('from_city', 'Bangalore')}', to_city: '{search_info.get('to_city', 'Unknown')}'")
+        except Exception as e:
+            return {"error": f"Round-trip flight search failed: {str(e)}"}
+    
+    async def _search_round_trip_flights_async(self, travel_details: Dict[str, str], preferences: Dict = None) -> Dict:
+        """
+        Search for round-trip flights with both legs awaited concurrently on the event loop
+        """
+        try:
+            logger.debug("Making concurrent outbound and return flight requests (async)...")
+            started = time.perf_counter()
+            preferences = preferences or {}
+            return_travel_details, return_preferences = self._build_return_leg(travel_details, preferences)
+            
+            (outbound_result, outbound_seconds), (return_result, return_seconds) = await asyncio.gather(
+                self._timed_leg_search_async(travel_details, preferences, "outbound"),
+                self._timed_leg_search_async(return_travel_details, return_preferences, "return")
+            )
             
-            return {
-                "success": True,
-                "trip_type": "round_trip",
-                "outbound": outbound_result,
-                "return": return_result,
-                "search_info": search_info
-            }
+            return self._combine_round_trip_results(travel_details, preferences, outbound_result, return_result,
+                                                    outbound_seconds, return_seconds, started)
             
         except Exception as e:
             return {"error": f"Round-trip flight search failed: {str(e)}"}
     
+    def _build_return_leg(self, travel_details: Dict[str, str], preferences: Dict) -> tuple:
+        """
+        Build (travel_details, preferences) for the return leg by reversing the route
+        """
+        return_travel_details = travel_details.copy()
+        return_travel_details['departure'] = travel_details.get('return', '')  # Return date
+        
+        # Fix: Properly handle empty from_location by defaulting to Bangalore
+        origin_location = preferences.get('from_location', 'Bangalore')
+        if not origin_location or not origin_location.strip():
+            origin_location = 'Bangalore'
+        return_travel_details['destination'] = origin_location.lower()  # Going back to origin
+        
+        return_preferences = preferences.copy() if preferences else {}
+        return_preferences['from_location'] = travel_details.get('destination', '')  # Starting from original destination
+        
+        logger.debug("Return flight setup - from %s to %s on %s", return_preferences.get('from_location'), return_travel_details.get('destination'), return_travel_details.get('departure'))
+        return return_travel_details, return_preferences
+    
+    def _combine_round_trip_results(self, travel_details: Dict[str, str], preferences: Dict, outbound_result: Dict,
+                                    return_result: Dict, outbound_seconds: float, return_seconds: float,
+                                    started: float) -> Dict:
+        """
+        Combine outbound and return leg results into the round-trip result shape
+        """
+        logger.debug("Return flight result: %s", return_result.get('success', False))
+        if not return_result.get('success'):
+            logger.info("Return flight error: %s", return_result.get('error', 'Unknown error'))
+        
+        search_info = self._build_round_trip_search_info(travel_details, preferences)
+        
+        timings = {
+            "outbound": round(outbound_seconds, 3),
+            "return": round(return_seconds, 3),
+            "total": round(time.perf_counter() - started, 3)
+        }
+        
+        logger.debug("Round-trip search_info - from_city: '%s', to_city: '%s'", search_info.get('from_city', 'Bangalore'), search_info.get('to_city', 'Unknown'))
+        logger.info("Leg timings - outbound: %ss, return: %ss, wall clock: %ss", timings['outbound'], timings['return'], timings['total'])
+        
+        return {
+            "success": True,
+            "trip_type": "round_trip",
+            "outbound": outbound_result,
+            "return": return_result,
+            "search_info": search_info,
+            "timings": timings
+        }
+    
+    def _build_round_trip_search_info(self, travel_details: Dict[str, str], preferences: Dict) -> Dict:
+        """
+        Build the combined search info shown above round-trip results
+        """
+        # Combine results - fix from_location defaulting like in travel details
+        from_location = preferences.get('from_location', 'Bangalore')
+        if not from_location or not from_location.strip():
+            from_location = 'Bangalore'
+        
+        destination = travel_details.get('destination', 'Unknown')
+        from_code = self._get_airport_code(from_location.lower())
+        to_code = self._get_airport_code(destination.lower())
+        from_city_corrected = self._get_corrected_city_name(from_code) if from_code else from_location.title()
+        to_city_corrected = self._get_corrected_city_name(to_code) if to_code else destination.title()
+        
+        return {
+            "from_city": from_city_corrected,
+            "to_city": to_city_corrected,
+            "departure_date": self._format_date(travel_details.get('departure', '')),
+            "return_date": self._format_date(travel_details.get('return', '')),
+            "passengers": self._build_passengers(preferences),
+            "cabin_class": self._map_travel_class_to_cabin(preferences.get('travel_class', self.search_preferences.get('travel_class', 1)))
+        }
+    
+    def _build_passengers(self, preferences: Dict) -> Dict:
+        """
+        Passenger counts from preferences, falling back to searcher defaults
+        """
+        return {
+            "adults": preferences.get('adults', self.search_preferences.get('adults', 1)),
+            "children": preferences.get('children', self.search_preferences.get('children', 0)), 
+            "infants": preferences.get('infants', self.search_preferences.get('infants', 0))
+        }
+    
+    def _timed_leg_search(self, travel_details: Dict[str, str], preferences: Dict, flight_type: str) -> tuple:
+        """
+        Run a single leg search and return (result, elapsed_seconds)
+        """
+        started = time.perf_counter()
+        result = self._search_one_way_flights(travel_details, preferences, flight_type=flight_type)
+        return result, time.perf_counter() - started
+    
+    async def _timed_leg_search_async(self, travel_details: Dict[str, str], preferences: Dict, flight_type: str) -> tuple:
+        """
+        Async variant of _timed_leg_search
+        """
+        started = time.perf_counter()
+        result = await self._search_one_way_flights_async(travel_details, preferences, flight_type=flight_type)
+        return result, time.perf_counter() - started
+    
     def _search_one_way_flights(self, travel_details: Dict[str, str], preferences: Dict = None, flight_type: str = "outbound") -> Dict:
         """
         Search for one-way flights (used for both single trips and individual legs of round trips)
@@ -210,44 +368,143 @@ class FlightSearcher:
             if not search_params:
                 return {"error": "Could not build search parameters from travel details"}
             
-            # Make API request
-            response = self._make_api_request(search_params)
-            
-            if response.get('error'):
-                return {"error": response['error']}
+            # Fetch the widest stops setting once; identical concurrent fetches share one API request
+            fetch_params = self._superset_search_params(search_params)
+            leg = self.single_flight.do(
+                "search:" + request_fingerprint(fetch_params),
+                lambda: self._fetch_leg_flights(fetch_params)
+            )
+            return self._build_one_way_result(search_params, leg, preferences, flight_type)
             
-            # Parse and format results
-            flights = self._parse_flight_results(response)
+        except Exception as e:
+            return {"error": f"One-way flight search failed: {str(e)}"}
+    
+    async def _search_one_way_flights_async(self, travel_details: Dict[str, str], preferences: Dict = None, flight_type: str = "outbound") -> Dict:
+        """
+        Async variant of _search_one_way_flights sharing parameter building and parsing
+        """
+        try:
+            search_params = self._build_one_way_search_params(travel_details, preferences, flight_type)
             
-            # Build proper search info based on actual API parameters
-            departure_id = search_params.get('departure_id', self.default_departure_code)
-            arrival_id = search_params.get('arrival_id', 'Unknown')
-            departure_city = self._get_corrected_city_name(departure_id)
-            destination_city = self._get_corrected_city_name(arrival_id)
+            if not search_params:
+                return {"error": "Could not build search parameters from travel details"}
             
-            return {
-                "success": True,
-                "flights": flights,
-                "flight_type": flight_type,
-                "search_info": {
-                    "from": departure_id,
-                    "to": arrival_id,
-                    "from_city": departure_city,
-                    "to_city": destination_city,
-                    "departure_date": search_params.get('outbound_date', 'Unknown'),
-                    "return_date": 'One-way',
-                    "passengers": {
-                        "adults": preferences.get('adults', self.search_preferences.get('adults', 1)),
-                        "children": preferences.get('children', self.search_preferences.get('children', 0)), 
-                        "infants": preferences.get('infants', self.search_preferences.get('infants', 0))
-                    },
-                    "cabin_class": self._map_travel_class_to_cabin(preferences.get('travel_class', self.search_preferences.get('travel_class', 1)))
-                }
-            }
+            fetch_params = self._superset_search_params(search_params)
+            leg = await self.single_flight.do_async(
+                "search:" + request_fingerprint(fetch_params),
+                lambda: self._fetch_leg_flights_async(fetch_params)
+            )
+            return self._build_one_way_result(search_params, leg, preferences, flight_type)
             
         except Exception as e:
             return {"error": f"One-way flight search failed: {str(e)}"}
     
+    def _superset_search_params(self, search_params: Dict) -> Dict:
+        """
+        Parameters actually sent to SerpAPI for a leg: with SUPERSET_STOPS_SEARCH the widest stops
+        setting (0 = any) is fetched, since it contains the non-stop and max-1-stop results
+        """
+        if not self.superset_stops_search:
+            return search_params
+        return {**search_params, 'stops': 0}
+    
+    def _max_stops_for(self, stops) -> Optional[int]:
+        """
+        Map a SerpAPI stops value (0 any, 1 non-stop, 2 max 1 stop, 3 max 2 stops) to a stop count limit
+        """
+        try:
+            stops = int(stops)
+        except (TypeError, ValueError):
+            return None
+        return stops - 1 if stops > 0 else None
+    
+    def _fetch_leg_flights(self, fetch_params: Dict) -> Dict:
+        """
+        Fetch and parse one leg, returning {"table", "stale"} or {"error"}
+        Parsed results are cached per request so preference toggles skip both the API call and the re-parse
+        """
+        cache_key = request_fingerprint(fetch_params)
+        cached = self.parsed_results_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Parsed results cache hit for %s", cache_key[:12])
+            return cached
+        return self._parse_leg_response(self._make_api_request(fetch_params), cache_key)
+    
+    async def _fetch_leg_flights_async(self, fetch_params: Dict) -> Dict:
+        """
+        Async variant of _fetch_leg_flights
+        """
+        cache_key = request_fingerprint(fetch_params)
+        cached = self.parsed_results_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Parsed results cache hit for %s", cache_key[:12])
+            return cached
+        return self._parse_leg_response(await self._make_api_request_async(fetch_params), cache_key)
+    
+    def _parse_leg_response(self, response: Dict, cache_key: Optional[str] = None) -> Dict:
+        """
+        Parse an API response into a leg entry (stale responses served during an outage are not cached)
+        """
+        if response.get('error'):
+            return {"error": response['error']}
+        
+        leg = {"table": FlightTable(self._parse_flight_results(response)), "stale": bool(response.get('served_stale'))}
+        if cache_key and not leg["stale"]:
+            self.parsed_results_cache.set(cache_key, leg)
+        return leg
+    
+    def _build_one_way_result(self, search_params: Dict, leg: Dict, preferences: Dict, flight_type: str) -> Dict:
+        """
+        Build the one-way result shape for a leg, applying the requested stops limit locally
+        """
+        if leg.get('error'):
+            return {"error": leg['error']}
+        
+        preferences = preferences or {}
+        
+        # Narrow the (possibly superset) parsed flights to the requested stops
+        table = leg['table'].filter(max_stops=self._max_stops_for(search_params.get('stops')))
+        
+        # Either keep departure order or show only the top-ranked flights by value
+        sort_by = preferences.get('sort_by', 'departure')
+        if sort_by == 'best':
+            shown = self.ranker.top_k(table, self.ranked_display_limit)
+            sort_label = "Ranked By Value: Price, Duration & Stops"
+        else:
+            shown = table
+            sort_label = "Sorted By Departure Time, Earliest First"
+        
+        flights = shown.to_list()
+        value_badges = self.ranker.badges(table)
+        self._prefetch_booking_options(flights, search_params)
+        
+        # Build proper search info based on actual API parameters
+        departure_id = search_params.get('departure_id', self.default_departure_code)
+        arrival_id = search_params.get('arrival_id', 'Unknown')
+        departure_city = self._get_corrected_city_name(departure_id)
+        destination_city = self._get_corrected_city_name(arrival_id)
+        
+        return {
+            "success": True,
+            "flights": flights,
+            "badges": [value_badges.get(id(flight), []) for flight in flights],
+            "flight_type": flight_type,
+            "search_info": {
+                "from": departure_id,
+                "to": arrival_id,
+                "from_city": departure_city,
+                "to_city": destination_city,
+                "departure_date": search_params.get('outbound_date', 'Unknown'),
+                "return_date": 'One-way',
+                "passengers": self._build_passengers(preferences),
+                "cabin_class": self._map_travel_class_to_cabin(preferences.get('travel_class', self.search_preferences.get('travel_class', 1))),
+                "stale": leg.get('stale', False),
+                "sort_by": sort_by,
+                "sort_label": sort_label,
+                "total_flights": len(table)
+            }
+        }
+    
     def _build_one_way_search_params(self, travel_details: Dict[str, str], preferences: Dict = None, flight_type: str = "outbound") -> Optional[Dict]:
         """
         Build SerpAPI search parameters for one-way flights
@@ -294,12 +551,12 @@ class FlightSearcher:
                 'show_hidden': True  # Include hidden flight results for more flights
             }
             
-            print(f"DEBUG: {flight_type.title()} flight - {from_location.title()} ({departure_id}) → {destination.title()} ({destination_code}) on {flight_date}")
+            logger.debug("%s flight - %s (%s) → %s (%s) on %s", flight_type.title(), from_location.title(), departure_id, destination.title(), destination_code, flight_date)
             
             return params
             
         except Exception as e:
-            print(f"Error building {flight_type} search params: {e}")
+            logger.warning("Error building %s search params: %s", flight_type, e)
             return None
 
     def _build_search_params(self, travel_details: Dict[str, str], preferences: Dict = None) -> Optional[Dict]:
@@ -347,8 +604,8 @@ class FlightSearcher:
             }
             
             # Debug: Print search parameters
-            print(f"Search Parameters: From={from_location}, Stops={preferences.get('stops')}, Class={preferences.get('travel_class')}")
-            print(f"API Params: departure_id={departure_id}, stops={params['stops']}, travel_class={params['travel_class']}")
+            logger.debug("Search parameters: from=%s, stops=%s, class=%s", from_location, preferences.get('stops'), preferences.get('travel_class'))
+            logger.debug("API params: departure_id=%s, stops=%s, travel_class=%s", departure_id, params['stops'], params['travel_class'])
             
             # Add return date if available (round trip)
             if return_date and return_date != departure_date:
@@ -360,180 +617,44 @@ class FlightSearcher:
             return params
             
         except Exception as e:
-            print(f"Error building search params: {e}")
+            logger.warning("Error building search params: %s", e)
             return None
     
+    def match_airport(self, city_name: str) -> Optional[AirportMatch]:
+        """
+        Resolve a city/airport name to an AirportMatch (code, matched name, confidence, method), or None
+        """
+        match = self.airport_matcher.match(city_name)
+        if match is not None:
+            logger.debug("Airport match for '%s': %s via %s '%s' (confidence %.2f)", city_name, match.code, match.method, match.name, match.confidence)
+        return match
+    
     def _get_airport_code(self, city_name: str) -> Optional[str]:
         """
-        Get airport code for a city - enhanced with fuzzy matching for typos
+        Get airport code for a city - exact, partial or fuzzy (typo-tolerant) match
         """
-        if not city_name:
+        if not city_name or not city_name.strip():
             return None
         
-        # Clean the city name
-        clean_name = city_name.lower().strip()
-        print(f"DEBUG: Looking up airport code for: '{clean_name}'")
-        
-        # Direct lookup
-        code = self.city_codes.get(clean_name)
-        if code:
-            print(f"DEBUG: Direct match found: {clean_name} -> {code}")
-            return code
-        
-        # Try partial matching for common variations
-        for city, code in self.city_codes.items():
-            if clean_name in city or city in clean_name:
-                print(f"DEBUG: Partial match found: {clean_name} matches {city} -> {code}")
-                return code
-        
-        # Enhanced fuzzy matching for typos (like "hydrabad" -> "hyderabad")
-        best_match = None
-        best_score = 0
-        
-        for city, code in self.city_codes.items():
-            # Calculate similarity score
-            if len(clean_name) >= 3 and len(city) >= 3:
-                # Count matching characters in sequence
-                matches = 0
-                min_len = min(len(clean_name), len(city))
-                
-                for i in range(min_len):
-                    if clean_name[i] == city[i]:
-                        matches += 1
-                    else:
-                        break
-                
-                # Also check if most characters match (allowing for typos)
-                common_chars = set(clean_name) & set(city)
-                char_similarity = len(common_chars) / max(len(set(clean_name)), len(set(city)))
-                
-                # Combined score: prefix match + character similarity
-                score = (matches / min_len) * 0.7 + char_similarity * 0.3
-                
-                if score > best_score and score > 0.6:  # Threshold for match
-                    best_score = score
-                    best_match = (city, code)
-        
-        if best_match:
-            print(f"DEBUG: Fuzzy match found: {clean_name} -> {best_match[0]} -> {best_match[1]} (score: {best_score:.2f})")
-            return best_match[1]
+        match = self.match_airport(city_name)
+        if match is not None:
+            return match.code
         
-        print(f"DEBUG: No match found for '{clean_name}', using fallback BLR")
         # Fallback to BLR if nothing found
+        logger.info("No airport match for '%s', using fallback BLR", city_name)
         return 'BLR'
     
     def _get_corrected_city_name(self, airport_code: str) -> str:
         """
         Get proper city name from airport code
         """
-        code_to_city = {
-            'BLR': 'Bangalore', 'DEL': 'Delhi', 'BOM': 'Mumbai', 'MAA': 'Chennai',
-            'CCU': 'Kolkata', 'HYD': 'Hyderabad', 'AMD': 'Ahmedabad', 'COK': 'Kochi',
-            'SIN': 'Singapore', 'KUL': 'Kuala Lumpur', 'BKK': 'Bangkok', 'CGK': 'Jakarta',
-            'DXB': 'Dubai', 'DOH': 'Doha', 'LHR': 'London', 'CDG': 'Paris', 'FRA': 'Frankfurt'
-        }
-        return code_to_city.get(airport_code, airport_code)
+        return city_for_code(airport_code)
     
     def _get_destination_timezone(self, airport_code: str) -> str:
         """
         Get timezone display text based on airport code
         """
-        timezone_map = {
-            # India
-            'BOM': 'Indian Time (IST)',
-            'DEL': 'Indian Time (IST)', 
-            'BLR': 'Indian Time (IST)',
-            'HYD': 'Indian Time (IST)',
-            'MAA': 'Indian Time (IST)',
-            'CCU': 'Indian Time (IST)',
-            'PNQ': 'Indian Time (IST)',
-            'GOI': 'Indian Time (IST)',
-            'AMD': 'Indian Time (IST)',
-            'COK': 'Indian Time (IST)',
-            'JAI': 'Indian Time (IST)',
-            'TRV': 'Indian Time (IST)',
-            'UDR': 'Indian Time (IST)',
-            'JDH': 'Indian Time (IST)',
-            
-            # Southeast Asia
-            'SIN': 'Singapore Time (SGT)',
-            'BKK': 'Thailand Time (ICT)',
-            'KUL': 'Malaysia Time (MYT)',
-            'CGK': 'Indonesia Time (WIB)',
-            'MNL': 'Philippines Time (PHT)',
-            'HAN': 'Vietnam Time (ICT)',
-            'SGN': 'Vietnam Time (ICT)',
-            
-            # Middle East
-            'DXB': 'UAE Time (GST)',
-            'AUH': 'UAE Time (GST)',
-            'DOH': 'Qatar Time (AST)',
-            'KWI': 'Kuwait Time (AST)',
-            'RUH': 'Saudi Time (AST)',
-            'JED': 'Saudi Time (AST)',
-            'MCT': 'Oman Time (GST)',
-            'TLV': 'Israel Time (IST)',
-            'BEY': 'Lebanon Time (EET)',
-            'AMM': 'Jordan Time (EET)',
-            
-            # Europe
-            'LHR': 'UK Time (GMT/BST)',
-            'LGW': 'UK Time (GMT/BST)',
-            'MAN': 'UK Time (GMT/BST)',
-            'CDG': 'France Time (CET/CEST)',
-            'ORY': 'France Time (CET/CEST)',
-            'AMS': 'Netherlands Time (CET/CEST)',
-            'FRA': 'Germany Time (CET/CEST)',
-            'MUC': 'Germany Time (CET/CEST)',
-            'ZUR': 'Switzerland Time (CET/CEST)',
-            'VIE': 'Austria Time (CET/CEST)',
-            'FCO': 'Italy Time (CET/CEST)',
-            'MXP': 'Italy Time (CET/CEST)',
-            'MAD': 'Spain Time (CET/CEST)',
-            'BCN': 'Spain Time (CET/CEST)',
-            'IST': 'Turkey Time (TRT)',
-            'SVO': 'Russia Time (MSK)',
-            'ATH': 'Greece Time (EET)',
-            
-            # North America
-            'JFK': 'US Eastern Time (EST/EDT)',
-            'LGA': 'US Eastern Time (EST/EDT)',
-            'EWR': 'US Eastern Time (EST/EDT)',
-            'LAX': 'US Pacific Time (PST/PDT)',
-            'SFO': 'US Pacific Time (PST/PDT)',
-            'ORD': 'US Central Time (CST/CDT)',
-            'DFW': 'US Central Time (CST/CDT)',
-            'YYZ': 'Canada Eastern Time (EST/EDT)',
-            'YVR': 'Canada Pacific Time (PST/PDT)',
-            
-            # East Asia
-            'NRT': 'Japan Time (JST)',
-            'HND': 'Japan Time (JST)',
-            'KIX': 'Japan Time (JST)',
-            'ICN': 'Korea Time (KST)',
-            'GMP': 'Korea Time (KST)',
-            'PEK': 'China Time (CST)',
-            'PVG': 'China Time (CST)',
-            'SHA': 'China Time (CST)',
-            'HKG': 'Hong Kong Time (HKT)',
-            'TPE': 'Taiwan Time (CST)',
-            
-            # Oceania
-            'SYD': 'Australia Eastern Time (AEST/AEDT)',
-            'MEL': 'Australia Eastern Time (AEST/AEDT)',
-            'BNE': 'Australia Eastern Time (AEST/AEDT)',
-            'PER': 'Australia Western Time (AWST)',
-            'AKL': 'New Zealand Time (NZST/NZDT)',
-            
-            # Africa
-            'CAI': 'Egypt Time (EET)',
-            'JNB': 'South Africa Time (SAST)',
-            'CPT': 'South Africa Time (SAST)',
-            'NBO': 'Kenya Time (EAT)',
-            'ADD': 'Ethiopia Time (EAT)'
-        }
-        
-        return timezone_map.get(airport_code, 'Local Time')
+        return timezone_for_code(airport_code)
     
     def _format_date(self, date_str: str) -> str:
         """
@@ -559,36 +680,178 @@ class FlightSearcher:
         Make request to SerpAPI with proper error handling
         """
         try:
-            # Debug: Print what parameters we're sending
-            debug_params = {k: v for k, v in params.items() if k != 'api_key'}
-            print(f"DEBUG: SerpAPI request parameters: {debug_params}")
-            
-            response = requests.get(self.base_url, params=params, timeout=30)
-            
-            # Handle specific HTTP status codes
-            if response.status_code == 429:
-                return {"error": "Rate limit exceeded. Please wait a few minutes before searching again. SerpAPI has usage limits per minute."}
-            elif response.status_code == 401:
-                return {"error": "Invalid API key. Please check your SerpAPI configuration."}
-            elif response.status_code == 400:
-                try:
-                    error_data = response.json()
-                    error_msg = error_data.get('error', 'Invalid request parameters')
-                    return {"error": f"API request error: {error_msg}"}
-                except:
-                    return {"error": "Invalid request parameters sent to API"}
-            
-            response.raise_for_status()
-            return response.json()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("SerpAPI request parameters: %s", {k: v for k, v in params.items() if k != 'api_key'})
+            
+            # Serve identical searches from the response cache (memory first, then disk)
+            cache_key = request_fingerprint(params)
+            cached = self._lookup_cached_response(cache_key)
+            if cached is not None:
+                return cached
+            
+            response = self.transport.get(params, url=self.base_url)
+            result = self._interpret_api_response(response)
+            self._store_api_response(cache_key, result)
+            return result
             
         except requests.exceptions.Timeout:
             return {"error": "API request timed out. Please try again."}
+        except json.JSONDecodeError:
+            return {"error": "Invalid response format from API"}
         except requests.exceptions.RequestException as e:
             return {"error": f"Network error: {str(e)}"}
+        except CircuitOpenError as e:
+            # SerpAPI is down: fall back to an expired cached copy of this search if we have one
+            stale = self._lookup_stale_response(cache_key)
+            return stale if stale is not None else {"error": str(e)}
+        except TransportError as e:
+            return {"error": str(e)}
+    
+    async def _make_api_request_async(self, params: Dict) -> Dict:
+        """
+        Async variant of _make_api_request built on the transport's httpx client
+        """
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("SerpAPI async request parameters: %s", {k: v for k, v in params.items() if k != 'api_key'})
+            
+            cache_key = request_fingerprint(params)
+            cached = await self._lookup_cached_response_async(cache_key)
+            if cached is not None:
+                return cached
+            
+            response = await self.transport.get_async(params, url=self.base_url)
+            result = self._interpret_api_response(response)
+            await self._store_api_response_async(cache_key, result)
+            return result
+            
+        except httpx.TimeoutException:
+            return {"error": "API request timed out. Please try again."}
         except json.JSONDecodeError:
             return {"error": "Invalid response format from API"}
+        except httpx.HTTPError as e:
+            return {"error": f"Network error: {str(e)}"}
+        except CircuitOpenError as e:
+            # SerpAPI is down: fall back to an expired cached copy of this search if we have one
+            stale = await asyncio.get_running_loop().run_in_executor(None, self._lookup_stale_response, cache_key)
+            return stale if stale is not None else {"error": str(e)}
+        except TransportError as e:
+            return {"error": str(e)}
+    
+    def _lookup_cached_response(self, cache_key: str) -> Optional[Dict]:
+        """
+        Look a response up in the memory cache, then in the persistent store
+        Disk hits are promoted into the memory cache for their remaining lifetime
+        """
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Response cache hit for %s", cache_key[:12])
+            return cached
+        
+        return self._lookup_stored_response(cache_key)
     
-    def _parse_flight_results(self, response: Dict) -> List[Dict]:
+    def _lookup_stored_response(self, cache_key: str) -> Optional[Dict]:
+        """
+        Look a response up in the persistent store only, promoting a hit into the memory cache
+        """
+        if self.response_store is None:
+            return None
+        
+        stored = self.response_store.get(cache_key)
+        if stored is None:
+            return None
+        value, expires_at = stored
+        logger.debug("Response store hit for %s", cache_key[:12])
+        self.response_cache.set(cache_key, value, ttl=max(0.0, expires_at - time.time()))
+        return value
+    
+    async def _lookup_cached_response_async(self, cache_key: str) -> Optional[Dict]:
+        """
+        Async variant of _lookup_cached_response: the memory cache is checked inline, the SQLite store
+        (which can wait on another process's lock) on a worker thread so the event loop never blocks
+        """
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Response cache hit for %s", cache_key[:12])
+            return cached
+        
+        if self.response_store is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, self._lookup_stored_response, cache_key)
+    
+    def _lookup_stale_response(self, cache_key: str) -> Optional[Dict]:
+        """
+        Look up an expired response (memory, then disk) to serve while the circuit breaker is open
+        """
+        stale = self.response_cache.get(cache_key, allow_stale=True)
+        if stale is None and self.response_store is not None:
+            stored = self.response_store.get(cache_key, allow_stale=True)
+            stale = stored[0] if stored is not None else None
+        
+        if stale is None:
+            return None
+        logger.warning("Circuit open, serving stale response for %s", cache_key[:12])
+        return {**stale, "served_stale": True}
+    
+    def _store_api_response(self, cache_key: str, result: Dict):
+        """
+        Cache successful API responses (errors are never cached)
+        """
+        if isinstance(result, dict) and not result.get('error'):
+            self.response_cache.set(cache_key, result)
+            if self.response_store is not None:
+                self.response_store.set(cache_key, result)
+    
+    async def _store_api_response_async(self, cache_key: str, result: Dict):
+        """
+        Async variant of _store_api_response with the SQLite write on a worker thread
+        """
+        if self.response_store is None:
+            self._store_api_response(cache_key, result)
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self._store_api_response, cache_key, result)
+    
+    def get_transport_metrics(self) -> Dict:
+        """
+        Rate limiter, retry and timing counters of the SerpAPI transport
+        """
+        return self.transport.metrics()
+    
+    def get_cache_stats(self) -> Dict:
+        """
+        Hit/miss counters of the SerpAPI response cache (and persistent store when enabled)
+        """
+        stats = self.response_cache.stats()
+        if self.response_store is not None:
+            stats['disk'] = self.response_store.stats()
+        stats['parsed'] = self.parsed_results_cache.stats()
+        stats['booking'] = self.booking_cache.stats()
+        stats['airports'] = self.airport_matcher.cache.stats()
+        return stats
+    
+    def _interpret_api_response(self, response) -> Dict:
+        """
+        Map HTTP status codes to error dicts, otherwise return the decoded JSON body
+        Works with both requests and httpx responses
+        """
+        # Handle specific HTTP status codes
+        if response.status_code == 429:
+            return {"error": "Rate limit exceeded. Please wait a few minutes before searching again. SerpAPI has usage limits per minute."}
+        elif response.status_code == 401:
+            return {"error": "Invalid API key. Please check your SerpAPI configuration."}
+        elif response.status_code == 400:
+            try:
+                error_data = response.json()
+                error_msg = error_data.get('error', 'Invalid request parameters')
+                return {"error": f"API request error: {error_msg}"}
+            except:
+                return {"error": "Invalid request parameters sent to API"}
+        elif response.status_code >= 400:
+            return {"error": f"Network error: SerpAPI returned HTTP {response.status_code}"}
+        
+        return response.json()
+    
+    def _parse_flight_results(self, response: Dict) -> List[Flight]:
         """
         Parse flight results from SerpAPI response
         """
@@ -597,17 +860,17 @@ class FlightSearcher:
         other_flights = response.get('other_flights', [])
         flights = best_flights + other_flights
         
-        print(f"DEBUG: Found {len(best_flights)} best flights and {len(other_flights)} other flights")
-        print(f"DEBUG: Total {len(flights)} flights in API response")
+        logger.debug("Found %s best flights and %s other flights", len(best_flights), len(other_flights))
+        logger.debug("Total %s flights in API response", len(flights))
         
         # Add some debug info about the full response structure
         if flights and len(flights) > 0:
             sample_flight = flights[0]
-            print(f"DEBUG: Sample flight keys: {list(sample_flight.keys())}")
+            logger.debug("Sample flight keys: %s", list(sample_flight.keys()))
             if 'booking_token' in sample_flight:
-                print(f"DEBUG: Sample booking_token present: {bool(sample_flight.get('booking_token'))}")
+                logger.debug("Sample booking_token present: %s", bool(sample_flight.get('booking_token')))
             if 'departure_token' in sample_flight:
-                print(f"DEBUG: Sample departure_token present: {bool(sample_flight.get('departure_token'))}")
+                logger.debug("Sample departure_token present: %s", bool(sample_flight.get('departure_token')))
         
         parsed_flights = []
         for flight in flights:
@@ -615,37 +878,16 @@ class FlightSearcher:
             if parsed_flight:
                 parsed_flights.append(parsed_flight)
         
-        # Sort by departure time
+        # Sort by departure time of day (unknown times first) through the columnar table
         if parsed_flights:
-            def parse_time_for_sorting(time_str):
-                try:
-                    if not time_str or time_str == 'Unknown':
-                        return datetime.min
-                    
-                    # Handle various time formats from API
-                    if ' ' in time_str:
-                        time_part = time_str.split(' ')[1] if len(time_str.split(' ')) > 1 else time_str.split(' ')[0]
-                    else:
-                        time_part = time_str
-                    
-                    # Remove timezone info for parsing
-                    time_clean = time_part.split(' ')[0] if ' ' in time_part else time_part
-                    
-                    # Parse time
-                    if ':' in time_clean:
-                        return datetime.strptime(time_clean, '%H:%M')
-                    return datetime.min
-                except:
-                    return datetime.min
-            
-            parsed_flights.sort(key=lambda x: parse_time_for_sorting(x.get('raw_departure_time', '')))
-        
-        print(f"DEBUG: Successfully parsed {len(parsed_flights)} flights")
+            parsed_flights = FlightTable(parsed_flights).sort(('departure_minute',)).to_list()
+        
+        logger.debug("Successfully parsed %s flights", len(parsed_flights))
         return parsed_flights
     
-    def _extract_flight_info(self, flight_data: Dict) -> Optional[Dict]:
+    def _extract_flight_info(self, flight_data: Dict) -> Optional[Flight]:
         """
-        Extract relevant information from a single flight
+        Extract relevant information from a single flight into a compact Flight record
         """
         try:
             flights = flight_data.get('flights', [])
@@ -659,19 +901,19 @@ class FlightSearcher:
             # Extract basic info - ONLY from API, no fallbacks
             airline = first_flight.get('airline')
             if not airline:
-                print(f"DEBUG: No airline data in API response")
+                flight_logger.debug("No airline data in API response")
                 return None
                 
             flight_number = first_flight.get('flight_number')
             if not flight_number:
-                print(f"DEBUG: No flight_number in API response")
+                flight_logger.debug("No flight_number in API response")
                 return None
                 
             departure_time = first_flight.get('departure_airport', {}).get('time')
             arrival_time = last_flight.get('arrival_airport', {}).get('time')
             
             if not departure_time or not arrival_time:
-                print(f"DEBUG: Missing time data in API response")
+                flight_logger.debug("Missing time data in API response")
                 return None
             
             # Format duration - ONLY from API
@@ -681,12 +923,13 @@ class FlightSearcher:
                 minutes = total_duration % 60
                 duration = f"{hours}h {minutes}m"
             else:
-                print(f"DEBUG: No valid duration in API response: {total_duration}")
+                flight_logger.debug("No valid duration in API response: %s", total_duration)
                 return None
+            total_duration = int(total_duration)
             
             # Extract price - ONLY from API, no fallbacks
             price = flight_data.get('price')
-            print(f"DEBUG: Raw price from API: {price}, type: {type(price)}")
+            flight_logger.debug("Raw price from API: %r", price)
             
             if isinstance(price, (int, float)) and price > 0:
                 price_display = f"₹{price:,.0f}"
@@ -694,12 +937,12 @@ class FlightSearcher:
             else:
                 # Try alternative price field from API
                 alt_price = flight_data.get('total_price')
-                print(f"DEBUG: Alternative price: {alt_price}")
+                flight_logger.debug("Alternative price: %r", alt_price)
                 if isinstance(alt_price, (int, float)) and alt_price > 0:
                     price_display = f"₹{alt_price:,.0f}"
                     price_value = alt_price
                 else:
-                    print(f"DEBUG: No valid price in API response")
+                    flight_logger.debug("No valid price in API response")
                     return None
             
             # Determine stops and layover info
@@ -720,7 +963,7 @@ class FlightSearcher:
             arrival_id = last_flight.get('arrival_airport', {}).get('id')
             
             if not departure_id or not arrival_id:
-                print(f"DEBUG: Missing airport IDs in API response")
+                flight_logger.debug("Missing airport IDs in API response")
                 return None
                 
             route = f"{departure_id} → {arrival_id}"
@@ -749,40 +992,40 @@ class FlightSearcher:
             booking_token = flight_data.get('booking_token', '')
             departure_token = flight_data.get('departure_token', '')
             
-            print(f"DEBUG: Booking token extracted: '{booking_token}' (length: {len(booking_token) if booking_token else 0})")
-            print(f"DEBUG: Departure token extracted: '{departure_token}' (length: {len(departure_token) if departure_token else 0})")
-            
-            # Use booking_token if available, otherwise fall back to departure_token
-            primary_token = booking_token if booking_token else departure_token
-            
-            # If no real tokens available from API, set to None
-            if not primary_token:
-                print(f"DEBUG: No real tokens available from SerpAPI response")
-                primary_token = None
-            
-            return {
-                'airline': airline,
-                'flight_number': flight_number,
-                'route': route,
-                'departure_time': departure_time,
-                'arrival_time': arrival_time,
-                'duration': duration,
-                'price_display': price_display,
-                'price_value': price_value,
-                'stops': stops + layover_info,
-                'booking_token': booking_token,  # Primary token for booking
-                'departure_token': departure_token,  # Fallback token
-                'primary_token': primary_token,  # The token to actually use (None if unavailable)
-                'raw_departure_time': raw_departure_time,  # For sorting
-                'flight_data': flight_data,  # Keep original data for booking links
+            # Token values are never logged, only whether they are present
+            if booking_token or departure_token:
+                flight_logger.debug("%s %s tokens: booking=%s, departure=%s", airline, flight_number, bool(booking_token), bool(departure_token))
+            else:
+                # If no real tokens available from API, primary_token will be None
+                flight_logger.debug("No real tokens available from SerpAPI response")
+            
+            return Flight(
+                airline=airline,
+                flight_number=flight_number,
+                route=route,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+                duration=duration,
+                price_display=price_display,
+                price_value=price_value,
+                stops=stops + layover_info,
+                booking_token=booking_token,  # Primary token for booking
+                departure_token=departure_token,  # Fallback token
+                raw_departure_time=raw_departure_time,  # For sorting
+                raw_arrival_time=last_flight.get('arrival_airport', {}).get('time'),
                 # Store context needed for booking token requests (already validated)
-                'departure_id': departure_id,
-                'arrival_id': arrival_id
-            }
+                departure_id=departure_id,
+                arrival_id=arrival_id,
+                duration_minutes=total_duration,
+                stop_count=len(flights) - 1,
+                layover_ids=tuple(layover.get('id', 'Unknown') for layover in layovers),
+                # Original API object only when explicitly requested (it dominates retained memory)
+                flight_data=flight_data if self.keep_raw_flight_data else None
+            )
             
         except Exception as e:
-            print(f"ERROR: Failed to extract flight info: {e}")
-            print(f"DEBUG: Flight data was: {flight_data}")
+            logger.warning("Failed to extract flight info: %s", e)
+            logger.debug("Flight data keys were: %s", list(flight_data) if isinstance(flight_data, dict) else type(flight_data).__name__)
             return None
     
     def format_flights_for_display(self, search_result: Dict) -> str:
@@ -815,7 +1058,7 @@ class FlightSearcher:
             """
         
         # Build HTML for one-way flights
-        return self._format_one_way_flights(flights, search_info, search_result.get('flight_type', 'outbound'))
+        return self._format_one_way_flights(flights, search_info, search_result.get('flight_type', 'outbound'), search_result.get('badges'))
     
     def _format_round_trip_flights(self, search_result: Dict) -> str:
         """
@@ -825,7 +1068,7 @@ class FlightSearcher:
         return_result = search_result.get('return', {})
         search_info = search_result.get('search_info', {})
         
-        print(f"DEBUG: Round-trip search_info - from_city: '{search_info.get('from_city')}', to_city: '{search_info.get('to_city')}'")
+        logger.debug("Round-trip search_info - from_city: '%s', to_city: '%s'", search_info.get('from_city'), search_info.get('to_city'))
         
         # Only show route info if we have valid API data
         from_city = search_info.get('from_city') or 'API data missing'
@@ -849,7 +1092,7 @@ class FlightSearcher:
                 <h4 style="color: #27ae60; border-bottom: 2px solid #27ae60; padding-bottom: 5px;">🛫 Outbound Flights</h4>
             """
             outbound_search_info = outbound_result.get('search_info', {})
-            html += self._format_one_way_flights(outbound_result['flights'], outbound_search_info, 'outbound')
+            html += self._format_one_way_flights(outbound_result['flights'], outbound_search_info, 'outbound', outbound_result.get('badges'))
             html += "</div>"
         else:
             html += """
@@ -861,14 +1104,23 @@ class FlightSearcher:
             </div>
             """
         
-        # Return flights section
-        if return_result.get('success') and return_result.get('flights'):
+        # Return flights section (still pending while a progressive search waits on that leg)
+        if return_result.get('pending'):
+            html += """
+            <div>
+                <h4 style="color: #8e44ad; border-bottom: 2px solid #8e44ad; padding-bottom: 5px;">🛬 Return Flights</h4>
+                <div class="loading-indicator">
+                    <span class="loading-spinner"></span> Searching return flights...
+                </div>
+            </div>
+            """
+        elif return_result.get('success') and return_result.get('flights'):
             html += """
             <div>
                 <h4 style="color: #8e44ad; border-bottom: 2px solid #8e44ad; padding-bottom: 5px;">🛬 Return Flights</h4>
             """
             return_search_info = return_result.get('search_info', {})
-            html += self._format_one_way_flights(return_result['flights'], return_search_info, 'return')
+            html += self._format_one_way_flights(return_result['flights'], return_search_info, 'return', return_result.get('badges'))
             html += "</div>"
         else:
             html += """
@@ -885,9 +1137,10 @@ class FlightSearcher:
         html += "</div>"
         return html
     
-    def _format_one_way_flights(self, flights: list, search_info: Dict, flight_type: str = 'outbound') -> str:
+    def _format_one_way_flights(self, flights: list, search_info: Dict, flight_type: str = 'outbound', badges: List[List[str]] = None) -> str:
         """
         Format one-way flights for display
+        badges holds the value badges (BEST VALUE, CHEAPEST, FASTEST, OPTIMAL) for each flight
         """
         if not flights:
             return """
@@ -905,20 +1158,28 @@ class FlightSearcher:
         from_display = f"{from_city} ({from_code})"
         to_display = f"{to_city} ({to_code})"
         
+        stale_note = ""
+        if search_info.get('stale'):
+            stale_note = '<p style="font-size: 12px; color: #e67e22;">⚠️ Flight search is temporarily unavailable - showing previously fetched results, prices may have changed.</p>'
+        
+        sort_label = search_info.get('sort_label', 'Sorted By Departure Time, Earliest First')
+        total_flights = search_info.get('total_flights', len(flights))
+        shown_note = f" <span style=\"font-size: 12px; color: #666;\">(showing top {len(flights)})</span>" if len(flights) < total_flights else ""
+        
         html = f"""
         <div style="margin-bottom: 15px;">
-            <p><strong>{from_display} → {to_display}</strong> <span style="font-size: 12px; color: #666;">(Sorted By Departure Time, Earliest First)</span></p>
-            <p><strong>📊 Total Flights Found:</strong> {len(flights)}</p>
+            <p><strong>{from_display} → {to_display}</strong> <span style="font-size: 12px; color: #666;">({sort_label})</span></p>
+            <p><strong>📊 Total Flights Found:</strong> {total_flights}{shown_note}</p>
+            {stale_note}
             <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 12px; margin-top: 15px;">
         """
         
         for i, flight in enumerate(flights, 1):
-            # Determine flight badge (now based on departure time)
-            badge = ""
-            if i == 1:
-                badge = '<span style="background: #3498db; color: white; padding: 2px 8px; border-radius: 12px; font-size: 12px; margin-left: 10px;">EARLIEST</span>'
-            elif i <= 3:
-                badge = '<span style="background: #9b59b6; color: white; padding: 2px 8px; border-radius: 12px; font-size: 12px; margin-left: 10px;">MORNING</span>'
+            # Badges: earliest departure (departure order only) plus value badges from the ranking engine
+            labels = list(badges[i - 1]) if badges and i <= len(badges) else []
+            if i == 1 and search_info.get('sort_by', 'departure') != 'best':
+                labels.insert(0, 'EARLIEST')
+            badge = "".join(self._format_badge(label) for label in labels)
             
             # Set border color based on flight type
             border_color = "#27ae60" if flight_type == "outbound" else "#8e44ad"
@@ -985,92 +1246,217 @@ class FlightSearcher:
         
         return html
     
+    def _format_badge(self, label: str) -> str:
+        """
+        Coloured pill for a flight card badge (grey for unknown labels)
+        """
+        colors = {
+            'EARLIEST': '#3498db',
+            'BEST VALUE': '#27ae60',
+            'CHEAPEST': '#e67e22',
+            'FASTEST': '#16a085',
+            'OPTIMAL': '#9b59b6'
+        }
+        return f'<span style="background: {colors.get(label, "#7f8c8d")}; color: white; padding: 2px 8px; border-radius: 12px; font-size: 12px; margin-left: 10px;">{label}</span>'
+    
     def get_price_insights(self, travel_details: Dict[str, str]) -> Dict:
         """
         Get price insights and trends for the route
         """
         try:
-            search_params = self._build_search_params(travel_details)
+            search_params = self._build_price_insights_params(travel_details)
             if not search_params:
                 return {"error": "Could not build search parameters"}
             
-            # Add price insights parameter
-            search_params['show_price_insights'] = True
-            
             response = self._make_api_request(search_params)
+            return self._build_price_insights_result(response)
             
-            if response.get('error'):
-                return {"error": response['error']}
+        except Exception as e:
+            return {"error": f"Price insights failed: {str(e)}"}
+    
+    async def get_price_insights_async(self, travel_details: Dict[str, str]) -> Dict:
+        """
+        Asyncio counterpart of get_price_insights
+        """
+        try:
+            search_params = self._build_price_insights_params(travel_details)
+            if not search_params:
+                return {"error": "Could not build search parameters"}
             
-            price_insights = response.get('price_insights', {})
-            return {
-                "success": True,
-                "insights": price_insights
-            }
+            response = await self._make_api_request_async(search_params)
+            return self._build_price_insights_result(response)
             
         except Exception as e:
             return {"error": f"Price insights failed: {str(e)}"}
     
+    def _build_price_insights_params(self, travel_details: Dict[str, str]) -> Optional[Dict]:
+        """
+        Build search parameters with price insights enabled
+        """
+        search_params = self._build_search_params(travel_details)
+        if not search_params:
+            return None
+        
+        # Add price insights parameter
+        search_params['show_price_insights'] = True
+        return search_params
+    
+    def _build_price_insights_result(self, response: Dict) -> Dict:
+        """
+        Extract price insights from an API response
+        """
+        if response.get('error'):
+            return {"error": response['error']}
+        
+        price_insights = response.get('price_insights', {})
+        return {
+            "success": True,
+            "insights": price_insights
+        }
+    
     def get_booking_options(self, enriched_token: str, departure_id: str = None, arrival_id: str = None, outbound_date: str = None) -> Dict:
         """
         Get booking options for a specific flight using enriched token (includes context)
-        Ensures fresh data with no caching or stored tokens
+        Served from the booking cache when the token was prefetched or looked up recently (BOOKING_CACHE_TTL_SECONDS)
         """
         try:
-            if not enriched_token or not enriched_token.strip():
-                return {"error": "No booking token provided"}
-            
-            # Clean the token to ensure no whitespace issues
-            enriched_token = enriched_token.strip()
-            
-            print(f"DEBUG: Processing fresh booking token request...")
-            print(f"DEBUG: Enriched token starts with: {enriched_token[:20]}...")
-            print(f"DEBUG: Enriched token ends with: ...{enriched_token[-20:]}")
+            booking_request = self._prepare_booking_request(enriched_token, departure_id, arrival_id, outbound_date)
+            if booking_request.get('error'):
+                return booking_request
             
-            # Try to decode enriched token with context
-            actual_token = enriched_token
-            context_departure_id = departure_id
-            context_arrival_id = arrival_id
-            context_outbound_date = outbound_date
-            context_return_date = None
-            context_trip_type = 'one_way'  # Default to one-way for individual flights
+            cached = self.booking_cache.get(booking_request['token'])
+            if cached is not None:
+                logger.debug("Booking cache hit")
+                return cached
             
-            try:
-                import json
-                import base64
-                # Try to decode as enriched token
-                decoded_context = json.loads(base64.b64decode(enriched_token).decode())
-                actual_token = decoded_context.get('token', '')
-                context_departure_id = decoded_context.get('departure_id', departure_id)
-                context_arrival_id = decoded_context.get('arrival_id', arrival_id)
-                context_outbound_date = decoded_context.get('outbound_date', outbound_date)
-                context_return_date = decoded_context.get('return_date', None)
-                context_trip_type = decoded_context.get('trip_type', 'one_way')
-                print(f"DEBUG: Successfully decoded enriched token with context:")
-                print(f"DEBUG: - departure_id: {context_departure_id}")
-                print(f"DEBUG: - arrival_id: {context_arrival_id}")
-                print(f"DEBUG: - outbound_date: {context_outbound_date}")
-                print(f"DEBUG: - return_date: {context_return_date}")
-                print(f"DEBUG: - trip_type: {context_trip_type}")
-            except:
-                # If decoding fails, treat as regular token
-                print(f"DEBUG: Token is not enriched, treating as regular booking token")
-                actual_token = enriched_token
+            result = self._handle_booking_request(booking_request['token'], self.api_key, booking_request['departure_id'], booking_request['arrival_id'], booking_request['outbound_date'], booking_request['return_date'], booking_request['trip_type'])
+            self._store_booking_options(booking_request['token'], result)
+            return result
             
-            # Validate token format integrity
-            validation_error = self._validate_booking_token(actual_token)
-            if validation_error:
-                print(f"DEBUG: Token validation failed: {validation_error}")
-                return {"error": validation_error}
+        except Exception as e:
+            logger.warning("Booking options error: %s", e)
+            return {"error": f"Booking options failed: {str(e)}"}
+    
+    async def get_booking_options_async(self, enriched_token: str, departure_id: str = None, arrival_id: str = None, outbound_date: str = None) -> Dict:
+        """
+        Asyncio counterpart of get_booking_options
+        """
+        try:
+            booking_request = self._prepare_booking_request(enriched_token, departure_id, arrival_id, outbound_date)
+            if booking_request.get('error'):
+                return booking_request
             
-            print(f"DEBUG: Token validation passed, making API request...")
+            cached = self.booking_cache.get(booking_request['token'])
+            if cached is not None:
+                logger.debug("Booking cache hit")
+                return cached
             
-            return self._handle_booking_request(actual_token, self.api_key, context_departure_id, context_arrival_id, context_outbound_date, context_return_date, context_trip_type)
+            result = await self._handle_booking_request_async(booking_request['token'], self.api_key, booking_request['departure_id'], booking_request['arrival_id'], booking_request['outbound_date'], booking_request['return_date'], booking_request['trip_type'])
+            self._store_booking_options(booking_request['token'], result)
+            return result
             
         except Exception as e:
-            print(f"DEBUG: Booking options error: {str(e)}")
+            logger.warning("Booking options error: %s", e)
             return {"error": f"Booking options failed: {str(e)}"}
     
+    def _store_booking_options(self, booking_token: str, result: Dict):
+        """
+        Cache successful booking lookups by token (errors are never cached)
+        """
+        if isinstance(result, dict) and not result.get('error'):
+            self.booking_cache.set(booking_token, result)
+    
+    def _prefetch_booking_options(self, flights: List[Dict], search_params: Dict):
+        """
+        Queue background booking lookups for the first booking_prefetch_top_n flights of a leg
+        Submissions stop once booking_prefetch_max_pending lookups are queued, to protect quota
+        """
+        if self._booking_prefetch_executor is None or not search_params:
+            return
+        
+        for flight in flights[:self.booking_prefetch_top_n]:
+            booking_token = flight.get('booking_token')
+            if not booking_token or self.booking_cache.contains(booking_token):
+                continue
+            
+            with self._booking_prefetch_lock:
+                if self._booking_prefetch_pending >= self.booking_prefetch_max_pending:
+                    logger.debug("Booking prefetch budget exhausted, skipping remaining flights")
+                    return
+                self._booking_prefetch_pending += 1
+            
+            future = self._booking_prefetch_executor.submit(
+                self._run_booking_prefetch, booking_token,
+                search_params.get('departure_id'), search_params.get('arrival_id'), search_params.get('outbound_date')
+            )
+            future.add_done_callback(self._booking_prefetch_done)
+    
+    def _run_booking_prefetch(self, booking_token: str, departure_id: str, arrival_id: str, outbound_date: str):
+        if self.booking_cache.contains(booking_token):
+            return
+        result = self._handle_booking_request(booking_token, self.api_key, departure_id, arrival_id, outbound_date)
+        self._store_booking_options(booking_token, result)
+    
+    def _booking_prefetch_done(self, future):
+        with self._booking_prefetch_lock:
+            self._booking_prefetch_pending -= 1
+        if future.exception() is not None:
+            logger.warning("Booking prefetch failed: %s", future.exception())
+    
+    def _prepare_booking_request(self, enriched_token: str, departure_id: str = None, arrival_id: str = None, outbound_date: str = None) -> Dict:
+        """
+        Decode an enriched booking token into the actual token plus flight context and validate it
+        Returns a dict with token/context keys, or {"error": ...}
+        """
+        if not enriched_token or not enriched_token.strip():
+            return {"error": "No booking token provided"}
+        
+        # Clean the token to ensure no whitespace issues
+        enriched_token = enriched_token.strip()
+        
+        logger.debug("Processing fresh booking token request...")
+        logger.debug("Booking token length: %s", len(enriched_token))
+        
+        # Try to decode enriched token with context
+        booking_request = {
+            'token': enriched_token,
+            'departure_id': departure_id,
+            'arrival_id': arrival_id,
+            'outbound_date': outbound_date,
+            'return_date': None,
+            'trip_type': 'one_way'  # Default to one-way for individual flights
+        }
+        
+        try:
+            import base64
+            # Try to decode as enriched token
+            decoded_context = json.loads(base64.b64decode(enriched_token).decode())
+            booking_request['token'] = decoded_context.get('token', '')
+            booking_request['departure_id'] = decoded_context.get('departure_id', departure_id)
+            booking_request['arrival_id'] = decoded_context.get('arrival_id', arrival_id)
+            booking_request['outbound_date'] = decoded_context.get('outbound_date', outbound_date)
+            booking_request['return_date'] = decoded_context.get('return_date', None)
+            booking_request['trip_type'] = decoded_context.get('trip_type', 'one_way')
+            logger.debug("Successfully decoded enriched token with context:")
+            logger.debug("- departure_id: %s", booking_request['departure_id'])
+            logger.debug("- arrival_id: %s", booking_request['arrival_id'])
+            logger.debug("- outbound_date: %s", booking_request['outbound_date'])
+            logger.debug("- return_date: %s", booking_request['return_date'])
+            logger.debug("- trip_type: %s", booking_request['trip_type'])
+        except:
+            # If decoding fails, treat as regular token
+            logger.debug("Token is not enriched, treating as regular booking token")
+            booking_request['token'] = enriched_token
+        
+        # Validate token format integrity
+        validation_error = self._validate_booking_token(booking_request['token'])
+        if validation_error:
+            logger.info("Token validation failed: %s", validation_error)
+            return {"error": validation_error}
+        
+        logger.debug("Token validation passed, making API request...")
+        return booking_request
+    
     def _validate_booking_token(self, booking_token: str) -> Optional[str]:
         """
         Validate booking token format integrity
@@ -1092,7 +1478,7 @@ class FlightSearcher:
             except Exception:
                 return "Token appears to be corrupted (invalid Base64 encoding)"
             
-            print(f"DEBUG: Token validation passed - length: {len(booking_token)}, format: valid")
+            logger.debug("Token validation passed - length: %s, format: valid", len(booking_token))
             return None  # No validation errors
             
         except Exception as e:
@@ -1103,6 +1489,48 @@ class FlightSearcher:
         Handle booking request - use standard google_flights engine with booking_token
         This ensures we get fresh data and properly handle the token context
         """
+        params = self._build_booking_params(booking_token, api_key, departure_id, arrival_id, outbound_date, return_date, trip_type)
+        
+        def fetch_booking_options():
+            # Make API request through the shared pooled transport
+            try:
+                response = self.transport.get(params, url=self.base_url)
+                return self._process_booking_response(response, departure_id, arrival_id, outbound_date, trip_type)
+                
+            except requests.exceptions.RequestException as e:
+                return {"error": f"Network error: {str(e)}"}
+            except TransportError as e:
+                return {"error": str(e)}
+            except Exception as e:
+                return {"error": f"Request processing failed: {str(e)}"}
+        
+        # Concurrent lookups of the same token share one API request
+        return self.single_flight.do("booking:" + request_fingerprint(params), fetch_booking_options)
+    
+    async def _handle_booking_request_async(self, booking_token: str, api_key: str, departure_id: str = None, arrival_id: str = None, outbound_date: str = None, return_date: str = None, trip_type: str = 'one_way') -> Dict:
+        """
+        Async variant of _handle_booking_request
+        """
+        params = self._build_booking_params(booking_token, api_key, departure_id, arrival_id, outbound_date, return_date, trip_type)
+        
+        async def fetch_booking_options():
+            try:
+                response = await self.transport.get_async(params, url=self.base_url)
+                return self._process_booking_response(response, departure_id, arrival_id, outbound_date, trip_type)
+                
+            except httpx.HTTPError as e:
+                return {"error": f"Network error: {str(e)}"}
+            except TransportError as e:
+                return {"error": str(e)}
+            except Exception as e:
+                return {"error": f"Request processing failed: {str(e)}"}
+        
+        return await self.single_flight.do_async("booking:" + request_fingerprint(params), fetch_booking_options)
+    
+    def _build_booking_params(self, booking_token: str, api_key: str, departure_id: str = None, arrival_id: str = None, outbound_date: str = None, return_date: str = None, trip_type: str = 'one_way') -> Dict:
+        """
+        Build google_flights parameters for a booking_token lookup
+        """
         # Use the original working approach - booking tokens need flight context
         # Build complete parameters including required departure_id and arrival_id
         params = {
@@ -1129,108 +1557,86 @@ class FlightSearcher:
         else:
             params['type'] = '2'  # One way
         
-        print(f"DEBUG: Making booking request with token: {booking_token[:50]}...")
-        print(f"DEBUG: Token length: {len(booking_token)}")
-        print(f"DEBUG: Parameters: {list(params.keys())}")
+        logger.debug("Making booking request (token length %s) with parameters: %s", len(booking_token), list(params.keys()))
         
-        # Make direct API request
-        import requests
-        try:
-            response = requests.get('https://serpapi.com/search.json', params=params, timeout=30)
-            
-            print(f"DEBUG: Response status code: {response.status_code}")
-            
-            # Handle specific HTTP status codes
-            if response.status_code == 429:
-                return {"error": "⚠️ Rate limit exceeded! Please wait 2-3 minutes before trying booking options again. SerpAPI has strict usage limits."}
-            elif response.status_code == 401:
-                return {"error": "Invalid API key. Please check your SerpAPI configuration."}
-            elif response.status_code == 400:
-                try:
-                    error_data = response.json()
-                    error_msg = error_data.get('error', 'Unknown API error')
-                    print(f"DEBUG: 400 error details: {error_msg}")
-                    
-                    # Check if it's specifically a token issue
-                    if 'token' in error_msg.lower() or 'expired' in error_msg.lower():
-                        return {"error": "Booking token has expired or is invalid - please get fresh booking options from a new flight search"}
-                    else:
-                        return {"error": f"API validation error: {error_msg}"}
-                except:
-                    return {"error": "API request validation failed - token may be expired or malformed"}
-            
-            if response.status_code != 200:
-                return {"error": f"API request failed with status {response.status_code}"}
-            
-            result = response.json()
-            
-            print(f"DEBUG: Response keys: {list(result.keys()) if result else 'None'}")
-            
-            if result.get('error'):
-                return {"error": f"SerpAPI Error: {result['error']}"}
-            
-            # Extract booking options from the response
-            booking_options = result.get('booking_options', [])
-            selected_flights = result.get('selected_flights', [])
-            
-            print(f"DEBUG: Found {len(booking_options)} booking options")
-            print(f"DEBUG: Found {len(selected_flights)} selected flights")
-            
-            # Show ALL available booking sources from API with flight context
-            print(f"DEBUG: === ALL AVAILABLE BOOKING SOURCES FROM API ===")
-            print(f"DEBUG: Flight Date: {outbound_date}")
-            print(f"DEBUG: Route: {departure_id} → {arrival_id}")
-            print(f"DEBUG: Trip Type: {trip_type}")
-            
+        return params
+    
+    def _process_booking_response(self, response, departure_id: str = None, arrival_id: str = None, outbound_date: str = None, trip_type: str = 'one_way') -> Dict:
+        """
+        Turn a booking_token lookup response (requests or httpx) into booking options
+        """
+        logger.debug("Response status code: %s", response.status_code)
+        
+        # Handle specific HTTP status codes
+        if response.status_code == 429:
+            return {"error": "⚠️ Rate limit exceeded! Please wait 2-3 minutes before trying booking options again. SerpAPI has strict usage limits."}
+        elif response.status_code == 401:
+            return {"error": "Invalid API key. Please check your SerpAPI configuration."}
+        elif response.status_code == 400:
+            try:
+                error_data = response.json()
+                error_msg = error_data.get('error', 'Unknown API error')
+                logger.warning("Booking lookup rejected (400): %s", error_msg)
+                
+                # Check if it's specifically a token issue
+                if 'token' in error_msg.lower() or 'expired' in error_msg.lower():
+                    return {"error": "Booking token has expired or is invalid - please get fresh booking options from a new flight search"}
+                else:
+                    return {"error": f"API validation error: {error_msg}"}
+            except:
+                return {"error": "API request validation failed - token may be expired or malformed"}
+        
+        if response.status_code != 200:
+            return {"error": f"API request failed with status {response.status_code}"}
+        
+        result = response.json()
+        
+        logger.debug("Response keys: %s", list(result.keys()) if result else 'None')
+        
+        if result.get('error'):
+            return {"error": f"SerpAPI Error: {result['error']}"}
+        
+        # Extract booking options from the response
+        booking_options = result.get('booking_options', [])
+        selected_flights = result.get('selected_flights', [])
+        
+        logger.debug("Found %s booking options", len(booking_options))
+        logger.debug("Found %s selected flights", len(selected_flights))
+        
+        # Show ALL available booking sources from API with flight context (skipped entirely unless DEBUG)
+        logger.debug("Booking sources for %s → %s on %s (%s)", departure_id, arrival_id, outbound_date, trip_type)
+        if source_logger.isEnabledFor(logging.DEBUG):
             for i, option in enumerate(booking_options):
                 if 'together' in option:
                     together = option['together']
-                    book_with = together.get('book_with', 'Unknown')
-                    marketed_as = together.get('marketed_as', 'Unknown')
-                    price = together.get('price', 'Unknown')
-                    print(f"DEBUG: Source {i+1}: '{book_with}' (marketed as: '{marketed_as}', price: {price})")
-                    print(f"DEBUG:   -> Date: {outbound_date}, Route: {departure_id}→{arrival_id}")
-                    
-                    # Check if there's a booking_request with URL
-                    if 'booking_request' in together:
-                        booking_req = together['booking_request']
-                        if 'url' in booking_req:
-                            print(f"DEBUG:   -> URL: {booking_req['url'][:100]}...")
+                    source_logger.debug("Source %s: '%s' (marketed as: '%s', price: %s)", i+1, together.get('book_with', 'Unknown'), together.get('marketed_as', 'Unknown'), together.get('price', 'Unknown'))
                 else:
-                    book_with = option.get('book_with', 'Unknown')
-                    print(f"DEBUG: Source {i+1}: '{book_with}' (direct structure)")
-                    print(f"DEBUG:   -> Date: {outbound_date}, Route: {departure_id}→{arrival_id}")
-            print(f"DEBUG: === END OF ALL AVAILABLE SOURCES ===")
-            
-            if booking_options and len(booking_options) > 0:
-                sample_option = booking_options[0]
-                print(f"DEBUG: Sample booking option keys: {list(sample_option.keys())}")
-                if 'together' in sample_option:
-                    print(f"DEBUG: Together option keys: {list(sample_option['together'].keys())}")
-            
-            # If no booking options found, return error
-            if not booking_options:
-                return {"error": "No booking options available from SerpAPI for this flight (token may have expired)"}
-            
-            # Filter and prioritize preferred Indian booking platforms
-            preferred_sources = self._filter_preferred_booking_sources(booking_options)
-            
-            print(f"DEBUG: Filtered to {len(preferred_sources)} preferred sources")
-            
-            return {
-                "success": True,
-                "booking_options": preferred_sources,
-                "selected_flights": selected_flights,
-                "additional_details": result.get('search_metadata', {}),
-                "baggage_prices": result.get('baggage_prices', []),
-                "booking_phone": result.get('booking_phone', ''),
-                "price_insights": result.get('price_insights', {})
-            }
-            
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Network error: {str(e)}"}
-        except Exception as e:
-            return {"error": f"Request processing failed: {str(e)}"}
+                    source_logger.debug("Source %s: '%s' (direct structure)", i+1, option.get('book_with', 'Unknown'))
+        
+        if booking_options and len(booking_options) > 0:
+            sample_option = booking_options[0]
+            logger.debug("Sample booking option keys: %s", list(sample_option.keys()))
+            if 'together' in sample_option:
+                logger.debug("Together option keys: %s", list(sample_option['together'].keys()))
+        
+        # If no booking options found, return error
+        if not booking_options:
+            return {"error": "No booking options available from SerpAPI for this flight (token may have expired)"}
+        
+        # Filter and prioritize preferred Indian booking platforms
+        preferred_sources = self._filter_preferred_booking_sources(booking_options)
+        
+        logger.debug("Filtered to %s preferred sources", len(preferred_sources))
+        
+        return {
+            "success": True,
+            "booking_options": preferred_sources,
+            "selected_flights": selected_flights,
+            "additional_details": result.get('search_metadata', {}),
+            "baggage_prices": result.get('baggage_prices', []),
+            "booking_phone": result.get('booking_phone', ''),
+            "price_insights": result.get('price_insights', {})
+        }
 
     def get_booking_options_with_departure_token(self, departure_token: str) -> Dict:
         """
@@ -1255,12 +1661,12 @@ class FlightSearcher:
             preferred_sources = self._filter_preferred_booking_sources(booking_options)
             
             # Add fallback Indian OTA links when Google doesn't provide them
-            print(f"DEBUG: About to add fallback Indian OTAs - departure_id: {departure_id}, arrival_id: {arrival_id}, date: {outbound_date}")
+            logger.debug("About to add fallback Indian OTAs - departure_id: %s, arrival_id: %s, date: %s", departure_id, arrival_id, outbound_date)
             try:
                 enhanced_sources = self._add_fallback_indian_otas(preferred_sources, departure_id, arrival_id, outbound_date)
-                print(f"DEBUG: Fallback complete - Enhanced sources: {len(enhanced_sources)}")
+                logger.debug("Fallback complete - Enhanced sources: %s", len(enhanced_sources))
             except Exception as e:
-                print(f"DEBUG: ERROR in fallback method: {e}")
+                logger.warning("Fallback OTA links failed: %s", e)
                 enhanced_sources = preferred_sources  # Fallback to original sources
             
             return {
@@ -1288,9 +1694,8 @@ class FlightSearcher:
         airline_direct = []
         other_platforms = []
         
-        print(f"DEBUG: ⚠️  IMPORTANT: SerpAPI only returns booking platforms that Google Flights provides")
-        print(f"DEBUG: Google Flights may not show Indian OTAs for all routes/airlines")
-        print(f"DEBUG: Processing {len(booking_options)} total booking options from Google...")
+        # SerpAPI only returns booking platforms that Google Flights provides, which may not include Indian OTAs
+        logger.debug("Processing %s total booking options from Google...", len(booking_options))
         
         for i, option in enumerate(booking_options):
             # Get platform name from different possible fields
@@ -1302,23 +1707,23 @@ class FlightSearcher:
             elif 'together' in option and 'marketed_as' in option['together']:
                 book_with = option['together'].get('marketed_as', '').lower()
             
-            print(f"DEBUG: Option {i+1}: '{book_with}' (structure: {list(option.keys())})")
+            source_logger.debug("Option %s: '%s' (structure: %s)", i+1, book_with, list(option))
             
             # MakeMyTrip gets highest priority (check multiple variations)
             if any(term in book_with for term in ['makemytrip', 'make my trip', 'mmt']):
                 makemytrip_options.append(option)
-                print(f"DEBUG: ✅ Found MakeMyTrip: {book_with}")
+                source_logger.debug("✅ Found MakeMyTrip: %s", book_with)
             # Other preferred Indian platforms
             elif any(platform in book_with for platform in ['cleartrip', 'goibibo', 'yatra', 'ixigo', 'easemytrip']):
                 other_priority_platforms.append(option)
-                print(f"DEBUG: ✅ Found Indian OTA: {book_with}")
+                source_logger.debug("✅ Found Indian OTA: %s", book_with)
             # Airline direct booking
             elif any(airline in book_with for airline in ['air india', 'indigo', '6e', 'spicejet', 'vistara', 'jet airways', 'akasa', 'lufthansa', 'emirates', 'singapore airlines', 'thai airways', 'ai']):
                 airline_direct.append(option)
-                print(f"DEBUG: ✅ Found airline direct: {book_with}")
+                source_logger.debug("✅ Found airline direct: %s", book_with)
             else:
                 other_platforms.append(option)
-                print(f"DEBUG: ➡️ Found other platform: {book_with}")
+                source_logger.debug("➡️ Found other platform: %s", book_with)
         
         # Build final list with prioritized order
         final_sources = []
@@ -1326,47 +1731,47 @@ class FlightSearcher:
         # 1. MakeMyTrip first (highest priority)
         if makemytrip_options:
             final_sources.extend(makemytrip_options[:1])
-            print(f"DEBUG: ✅ Added MakeMyTrip as #1 priority")
+            logger.debug("✅ Added MakeMyTrip as #1 priority")
         else:
-            print(f"DEBUG: ❌ MakeMyTrip not available from Google for this route")
+            logger.debug("❌ MakeMyTrip not available from Google for this route")
         
         # 2. Other Indian OTAs (Cleartrip, Goibibo, etc.)
         remaining_slots = 4 - len(final_sources)
         if remaining_slots > 0 and other_priority_platforms:
             final_sources.extend(other_priority_platforms[:min(remaining_slots, 2)])
-            print(f"DEBUG: ✅ Added {len(other_priority_platforms[:min(remaining_slots, 2)])} Indian OTA(s)")
+            logger.debug("✅ Added %s Indian OTA(s)", len(other_priority_platforms[:min(remaining_slots, 2)]))
         else:
-            print(f"DEBUG: ❌ Other Indian OTAs not available from Google for this route")
+            logger.debug("❌ Other Indian OTAs not available from Google for this route")
         
         # 3. Airline Direct 
         remaining_slots = 4 - len(final_sources)
         if remaining_slots > 0 and airline_direct:
             final_sources.extend(airline_direct[:min(1, remaining_slots)])
-            print(f"DEBUG: ✅ Added Airline Direct booking")
+            logger.debug("✅ Added Airline Direct booking")
         
         # 4. Fill remaining slots with any other platforms
         remaining_slots = 4 - len(final_sources)
         if remaining_slots > 0:
             final_sources.extend(other_platforms[:remaining_slots])
-            print(f"DEBUG: ➡️ Added {len(other_platforms[:remaining_slots])} other platform(s)")
+            logger.debug("➡️ Added %s other platform(s)", len(other_platforms[:remaining_slots]))
         
         # If we don't have enough options, return all available options
         if len(final_sources) == 0 and len(booking_options) > 0:
-            print("DEBUG: ⚠️  No preferred platforms found, showing what Google Flights provides")
+            logger.debug("⚠️  No preferred platforms found, showing what Google Flights provides")
             final_sources = booking_options[:4]
         
         # Summary for user
         indian_ota_count = len(makemytrip_options) + len(other_priority_platforms)
         if indian_ota_count == 0:
-            print(f"DEBUG: 🔍 RECOMMENDATION: Google Flights doesn't show Indian OTAs for this route.")
-            print(f"DEBUG: 💡 Try different dates, airlines, or search directly on MakeMyTrip/Cleartrip")
+            logger.debug("Google Flights doesn't show Indian OTAs for this route")
         
-        print(f"DEBUG: Final booking sources returned: {len(final_sources)}")
-        for i, source in enumerate(final_sources):
-            book_with = source.get('book_with', 'Unknown')
-            if 'together' in source:
-                book_with = source['together'].get('book_with', book_with)
-            print(f"DEBUG: Final source {i+1}: {book_with}")
+        logger.debug("Final booking sources returned: %s", len(final_sources))
+        if source_logger.isEnabledFor(logging.DEBUG):
+            for i, source in enumerate(final_sources):
+                book_with = source.get('book_with', 'Unknown')
+                if 'together' in source:
+                    book_with = source['together'].get('book_with', book_with)
+                source_logger.debug("Final source %s: %s", i+1, book_with)
         
         return final_sources[:4]  # Ensure maximum 4 sources
 
@@ -1375,9 +1780,9 @@ class FlightSearcher:
         Add direct links to Indian OTAs when Google Flights doesn't provide them
         Implements hybrid approach as recommended for comprehensive booking coverage
         """
-        print(f"DEBUG: === FALLBACK INDIAN OTA METHOD CALLED ===")
-        print(f"DEBUG: Input booking_options: {len(booking_options)}")
-        print(f"DEBUG: Route: {departure_id} → {arrival_id} on {outbound_date}")
+        logger.debug("=== FALLBACK INDIAN OTA METHOD CALLED ===")
+        logger.debug("Input booking_options: %s", len(booking_options))
+        logger.debug("Route: %s → %s on %s", departure_id, arrival_id, outbound_date)
         
         # Check if we already have Indian OTAs
         has_makemytrip = False
@@ -1413,7 +1818,7 @@ class FlightSearcher:
                 'platform_priority': 'highest'
             }
             enhanced_options.insert(0, mmt_option)  # Add as first option
-            print(f"DEBUG: ✅ Added MakeMyTrip fallback link: {mmt_url}")
+            logger.debug("✅ Added MakeMyTrip fallback link: %s", mmt_url)
         
         # Add Cleartrip direct link if missing
         if not has_cleartrip and len(enhanced_options) < 4:
@@ -1431,9 +1836,9 @@ class FlightSearcher:
                 'platform_priority': 'high'
             }
             enhanced_options.insert(1 if has_makemytrip else 0, cleartrip_option)
-            print(f"DEBUG: ✅ Added Cleartrip fallback link: {cleartrip_url}")
+            logger.debug("✅ Added Cleartrip fallback link: %s", cleartrip_url)
         
-        print(f"DEBUG: Enhanced booking options: {len(enhanced_options)} total (original: {len(booking_options)})")
+        logger.debug("Enhanced booking options: %s total (original: %s)", len(enhanced_options), len(booking_options))
         return enhanced_options[:4]  # Ensure maximum 4 options
 
     def _generate_makemytrip_url(self, from_code: str, to_code: str, date: str, passengers: dict = None, cabin_class: str = "E", airline_code: str = None) -> str:
@@ -1468,8 +1873,7 @@ class FlightSearcher:
         infants = passengers.get('infants', 0)
         
         # Determine if international flight
-        indian_airports = ['BLR', 'DEL', 'BOM', 'MAA', 'CCU', 'HYD', 'AMD', 'COK', 'GOI', 'PNQ', 'JAI', 'IXC', 'LKO', 'NAG', 'IXB']
-        is_international = from_code not in indian_airports or to_code not in indian_airports
+        is_international = country_for_code(from_code) != 'India' or country_for_code(to_code) != 'India'
         intl_flag = "true" if is_international else "false"
         
         # Build base URL with core parameters
@@ -1543,62 +1947,7 @@ class FlightSearcher:
         """
         Get proper city name from airport code (reverse lookup)
         """
-        code_to_city = {
-            # India
-            'BLR': 'Bangalore', 'DEL': 'Delhi', 'BOM': 'Mumbai', 'MAA': 'Chennai',
-            'CCU': 'Kolkata', 'HYD': 'Hyderabad', 'AMD': 'Ahmedabad', 'COK': 'Kochi',
-            'GOI': 'Goa', 'PNQ': 'Pune', 'IXC': 'Chandigarh', 'JAI': 'Jaipur',
-            'LKO': 'Lucknow', 'NAG': 'Nagpur', 'IXB': 'Bagdogra',
-            
-            # Southeast Asia
-            'SIN': 'Singapore', 'KUL': 'Kuala Lumpur', 'BKK': 'Bangkok', 'CGK': 'Jakarta',
-            'MNL': 'Manila', 'HAN': 'Hanoi', 'SGN': 'Ho Chi Minh City', 'RGN': 'Yangon',
-            'PNH': 'Phnom Penh', 'VTE': 'Vientiane', 'BWN': 'Bandar Seri Begawan',
-            
-            # Middle East
-            'DXB': 'Dubai', 'AUH': 'Abu Dhabi', 'DOH': 'Doha', 'KWI': 'Kuwait City',
-            'RUH': 'Riyadh', 'JED': 'Jeddah', 'BAH': 'Manama', 'MCT': 'Muscat',
-            'AMM': 'Amman', 'BEY': 'Beirut', 'DAM': 'Damascus', 'BGW': 'Baghdad',
-            'IKA': 'Tehran', 'TBS': 'Tbilisi', 'EVN': 'Yerevan',
-            
-            # Europe
-            'LHR': 'London', 'CDG': 'Paris', 'FRA': 'Frankfurt', 'AMS': 'Amsterdam',
-            'MAD': 'Madrid', 'FCO': 'Rome', 'MUC': 'Munich', 'VIE': 'Vienna',
-            'ZUR': 'Zurich', 'CPH': 'Copenhagen', 'ARN': 'Stockholm', 'OSL': 'Oslo',
-            'HEL': 'Helsinki', 'WAW': 'Warsaw', 'PRG': 'Prague', 'BUD': 'Budapest',
-            'ATH': 'Athens', 'IST': 'Istanbul', 'SVO': 'Moscow', 'LED': 'St Petersburg',
-            
-            # North America
-            'JFK': 'New York', 'LAX': 'Los Angeles', 'ORD': 'Chicago', 'MIA': 'Miami',
-            'LAS': 'Las Vegas', 'SEA': 'Seattle', 'BOS': 'Boston', 'DCA': 'Washington',
-            'ATL': 'Atlanta', 'DEN': 'Denver', 'PHX': 'Phoenix', 'DFW': 'Dallas',
-            'IAH': 'Houston', 'PHL': 'Philadelphia', 'DTW': 'Detroit', 'YYZ': 'Toronto',
-            'YVR': 'Vancouver', 'YUL': 'Montreal', 'YYC': 'Calgary', 'YOW': 'Ottawa',
-            'YWG': 'Winnipeg', 'MEX': 'Mexico City', 'CUN': 'Cancun', 'GDL': 'Guadalajara',
-            
-            # East Asia
-            'NRT': 'Tokyo', 'HND': 'Tokyo', 'KIX': 'Osaka', 'NGO': 'Nagoya',
-            'ICN': 'Seoul', 'GMP': 'Seoul', 'PUS': 'Busan', 'PEK': 'Beijing',
-            'PVG': 'Shanghai', 'SHA': 'Shanghai', 'CAN': 'Guangzhou', 'SZX': 'Shenzhen',
-            'CTU': 'Chengdu', 'HKG': 'Hong Kong', 'MFM': 'Macau', 'TPE': 'Taipei',
-            'KHH': 'Kaohsiung',
-            
-            # Oceania
-            'SYD': 'Sydney', 'MEL': 'Melbourne', 'BNE': 'Brisbane', 'PER': 'Perth',
-            'ADL': 'Adelaide', 'DRW': 'Darwin', 'AKL': 'Auckland', 'WLG': 'Wellington',
-            'CHC': 'Christchurch', 'NAN': 'Nadi',
-            
-            # Africa
-            'CAI': 'Cairo', 'CMN': 'Casablanca', 'JNB': 'Johannesburg', 'CPT': 'Cape Town',
-            'NBO': 'Nairobi', 'LOS': 'Lagos', 'ADD': 'Addis Ababa', 'TUN': 'Tunis',
-            'ALG': 'Algiers',
-            
-            # South America
-            'GRU': 'Sao Paulo', 'GIG': 'Rio de Janeiro', 'BSB': 'Brasilia',
-            'EZE': 'Buenos Aires', 'LIM': 'Lima', 'BOG': 'Bogota', 'SCL': 'Santiago',
-            'CCS': 'Caracas', 'UIO': 'Quito'
-        }
-        return code_to_city.get(airport_code, airport_code)
+        return city_for_code(airport_code)
 
     def _get_airport_code_and_city(self, city_name: str) -> tuple:
         """
@@ -1608,26 +1957,15 @@ class FlightSearcher:
         if not city_name:
             return None, None
         
-        # Clean the city name
-        clean_name = city_name.lower().strip()
-        print(f"DEBUG: Looking up airport code for: '{clean_name}'")
-        
-        # Direct lookup
-        code = self.city_codes.get(clean_name)
-        if code:
-            corrected_city = self._get_city_name_from_code(code)
-            print(f"DEBUG: Direct match found: {clean_name} -> {code} ({corrected_city})")
-            return code, corrected_city
-        
-        # Try partial matching for common variations
-        for city, code in self.city_codes.items():
-            if clean_name in city or city in clean_name:
-                corrected_city = self._get_city_name_from_code(code)
-                print(f"DEBUG: Partial match found: {clean_name} matches {city} -> {code} ({corrected_city})")
-                return code, corrected_city
+        match = self.match_airport(city_name)
+        if match is None:
+            return None, None
+        return match.code, self._get_city_name_from_code(match.code)
 
 # Usage example for testing
 if __name__ == "__main__":
+    from logging_config import configure_logging
+    configure_logging()
     searcher = FlightSearcher()
     
     # Sample travel details (like what comes from text_parser)
@@ -1639,4 +1977,4 @@ if __name__ == "__main__":
     
     print("Testing flight search...")
     result = searcher.search_flights(sample_details)
-    print(json.dumps(result, indent=2)) 
\ No newline at end of file
+    print(json.dumps(result, indent=2, default=lambda o: o.to_dict() if isinstance(o, Flight) else str(o))) 
\ No newline at end of file
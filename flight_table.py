@@ -0,0 +1,109 @@
+import numpy as np
+from typing import Iterable, List, Optional, Sequence, Tuple
+from flight_record import Flight
+
+def departure_minute_of_day(raw_time: Optional[str]) -> int:
+    """
+    Minute of day (0-1439) of a SerpAPI time like '2025-06-15 08:30', or -1 when unknown
+    """
+    if not raw_time:
+        return -1
+    time_part = raw_time.split(' ')[-1]
+    try:
+        hours, minutes = time_part.split(':')[:2]
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return -1
+
+
+class FlightTable:
+    """
+    Columnar view over parsed flights backed by NumPy arrays
+    Columns: price, duration (minutes), departure_minute (minute of day, -1 unknown), stops, airline (id).
+    Filtering and sorting only produce a new row order over the shared columns, so re-slicing a
+    result set for a different filter or sort costs microseconds and never re-parses the response.
+    """
+    COLUMNS = ('price', 'duration', 'departure_minute', 'stops', 'airline')
+
+    def __init__(self, flights: Sequence[Flight], _columns: Optional[dict] = None,
+                 _airlines: Optional[Tuple[str, ...]] = None, _order: Optional[np.ndarray] = None):
+        self.flights = flights if isinstance(flights, list) else list(flights)
+        if _columns is None:
+            _airlines = tuple(sorted({flight.airline for flight in self.flights}))
+            airline_ids = {name: i for i, name in enumerate(_airlines)}
+            _columns = {
+                'price': np.fromiter((f.price_value for f in self.flights), dtype=np.float64, count=len(self.flights)),
+                'duration': np.fromiter((f.duration_minutes for f in self.flights), dtype=np.int32, count=len(self.flights)),
+                'departure_minute': np.fromiter((departure_minute_of_day(f.raw_departure_time) for f in self.flights), dtype=np.int16, count=len(self.flights)),
+                'stops': np.fromiter((f.stop_count for f in self.flights), dtype=np.int8, count=len(self.flights)),
+                'airline': np.fromiter((airline_ids[f.airline] for f in self.flights), dtype=np.int16, count=len(self.flights))
+            }
+        self._columns = _columns
+        self.airlines = _airlines
+        self._order = np.arange(len(self.flights), dtype=np.intp) if _order is None else _order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Values of a column in the current row order
+        """
+        return self._columns[name][self._order]
+
+    def filter(self, max_stops: Optional[int] = None, airlines: Optional[Iterable[str]] = None,
+               max_price: Optional[float] = None, departure_window: Optional[Tuple[int, int]] = None) -> 'FlightTable':
+        """
+        Rows matching every given condition; departure_window is (start, end) in minutes of day, inclusive
+        """
+        mask = np.ones(len(self._order), dtype=bool)
+        if max_stops is not None:
+            mask &= self.column('stops') <= max_stops
+        if airlines is not None:
+            wanted = [self.airlines.index(name) for name in airlines if name in self.airlines]
+            mask &= np.isin(self.column('airline'), wanted)
+        if max_price is not None:
+            mask &= self.column('price') <= max_price
+        if departure_window is not None:
+            start, end = departure_window
+            departure = self.column('departure_minute')
+            if start <= end:
+                mask &= (departure >= start) & (departure <= end)
+            else:
+                # Window wrapping midnight, e.g. (22:00, 02:00)
+                mask &= (departure >= start) | ((departure >= 0) & (departure <= end))
+        return self._with_order(self._order[mask])
+
+    def sort(self, keys: Sequence[str] = ('departure_minute',), descending: Sequence[bool] = ()) -> 'FlightTable':
+        """
+        Stable multi-key sort; keys are column names, most significant first
+        """
+        if not len(self._order) or not keys:
+            return self
+        sort_columns = []
+        for i, name in enumerate(keys):
+            values = self.column(name)
+            if i < len(descending) and descending[i]:
+                values = -values.astype(np.float64)
+            sort_columns.append(values)
+        # np.lexsort treats the last key as the primary one
+        return self._with_order(self._order[np.lexsort(sort_columns[::-1])])
+
+    def take(self, positions: np.ndarray) -> 'FlightTable':
+        """
+        Rows at the given positions of the current order (e.g. from argsort/argpartition over column())
+        """
+        return self._with_order(self._order[positions])
+
+    def head(self, count: int) -> 'FlightTable':
+        return self._with_order(self._order[:count])
+
+    def to_list(self) -> List[Flight]:
+        """
+        Flight records in the current row order
+        """
+        flights = self.flights
+        return [flights[i] for i in self._order]
+
+    def _with_order(self, order: np.ndarray) -> 'FlightTable':
+        return FlightTable(self.flights, _columns=self._columns, _airlines=self.airlines, _order=order)
@@ -0,0 +1,130 @@
+"""
+Offline load test for the FlightAI search path
+Runs concurrent round-trip searches through FlightSearcher (async API) against a SerpAPI
+stand-in and reports throughput and latency percentiles.
+With --stub the client rate limiter and the response/parsed caches are off by default, so the numbers
+measure the app's concurrency against the stub rather than the 5 req/s throttle or cache hits; pass
+--rate / --cache to measure those regimes instead. The report prints the settings that were in effect.
+
+Usage:
+    python load_test.py --stub --requests 200 --concurrency 20 --latency-ms 300 --jitter-ms 300
+    SERPAPI_BASE_URL=http://127.0.0.1:8765/search python load_test.py --requests 200
+"""
+import os
+import time
+import asyncio
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+DESTINATIONS = ['Singapore', 'Dubai', 'London', 'Paris', 'Tokyo', 'New York', 'Bangkok', 'Frankfurt']
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_load(searcher, total: int, concurrency: int, distinct: int) -> Dict:
+    """
+    Issue total searches with at most concurrency in flight; distinct controls how many unique routes are used
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one_search(i: int):
+        nonlocal errors
+        route = i % max(1, distinct)
+        travel_details = {
+            'destination': DESTINATIONS[route % len(DESTINATIONS)],
+            'departure': f"{1 + (route // len(DESTINATIONS)) % 27:02d} Jun 2027",
+            'return': '28 Jun 2027'
+        }
+        preferences = {'from_location': 'Bangalore', 'stops': 0, 'travel_class': 1}
+        async with semaphore:
+            started = time.perf_counter()
+            result = await searcher.search_flights_with_preferences_async(travel_details, preferences)
+            latencies.append(time.perf_counter() - started)
+            if result.get('error') or not result.get('success'):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_search(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': total,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_per_second': round(total / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'max_ms': round(max(latencies, default=0) * 1000, 1)
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Offline FlightAI search load test')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--distinct', type=int, default=len(DESTINATIONS), help='Number of unique routes (lower = more cache hits)')
+    parser.add_argument('--stub', action='store_true', help='Start serpapi_stub in-process on a free port')
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=200)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0)
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Client token bucket rate (req/s, 0 = unthrottled); default 0 with --stub, else SERPAPI_RATE_PER_SEC')
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep the response/parsed caches and disk store enabled (off by default with --stub)')
+    args = parser.parse_args(argv)
+
+    from logging_config import configure_logging
+    configure_logging()
+
+    server = None
+    if args.stub:
+        from serpapi_stub import StubConfig, make_server
+        config = StubConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                            error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate)
+        server = make_server(config, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        os.environ['SERPAPI_BASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}/search"
+        os.environ.setdefault('SERPAPI_KEY', 'stub')
+        if args.rate is None:
+            args.rate = 0
+        if not args.cache:
+            os.environ['CACHE_TTL_SECONDS'] = '0'
+            os.environ.pop('RESPONSE_STORE_PATH', None)
+    if args.rate is not None:
+        os.environ['SERPAPI_RATE_PER_SEC'] = str(args.rate)
+
+    if not os.getenv('SERPAPI_BASE_URL'):
+        parser.error("Set SERPAPI_BASE_URL to a stub server or pass --stub (refusing to spend real SerpAPI quota)")
+
+    from flight_search import FlightSearcher
+    searcher = FlightSearcher()
+    report = asyncio.run(run_load(searcher, args.requests, args.concurrency, args.distinct))
+
+    limiter = searcher.transport.rate_limiter
+    report['rate_limiter'] = f"{limiter.rate:g} req/s, burst {limiter.capacity:g}" if limiter.enabled else 'off'
+    report['response_cache'] = f"ttl {searcher.response_cache.ttl:g}s" if searcher.response_cache.enabled else 'off'
+    report['parsed_cache'] = f"ttl {searcher.parsed_results_cache.ttl:g}s" if searcher.parsed_results_cache.enabled else 'off'
+    report['response_store'] = searcher.response_store.path if searcher.response_store is not None else 'off'
+    report['single_flight'] = searcher.single_flight.stats()
+
+    for name, value in report.items():
+        print(f"{name:>22}: {value}")
+    print(f"{'transport':>22}: {searcher.get_transport_metrics()}")
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
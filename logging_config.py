@@ -0,0 +1,110 @@
+"""
+Logging setup for FlightAI
+Every module logs through logging.getLogger(__name__) with %-style arguments, so messages are only
+formatted when a handler actually emits them. configure_logging() is called once by the entry points
+(app.py, flight_search.py, load_test.py) and reads:
+
+    LOG_LEVEL         DEBUG, INFO (default), WARNING, ...
+    LOG_FORMAT        text (default) or json (one JSON object per line)
+    LOG_SAMPLE_RATE   fraction of per-flight DEBUG lines to keep (default 0.05; 1 keeps all)
+"""
+import os
+import json
+import time
+import logging
+import threading
+from typing import Optional
+
+# Per-flight detail (one line per parsed flight / booking source) goes to these loggers and is sampled
+SAMPLED_LOGGERS = ('flight_search.flights', 'flight_search.booking_sources')
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps roughly `rate` of the records below WARNING (evenly spaced, not random); warnings always pass
+    """
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+        self._credit = 1.0  # the first record always passes
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        with self._lock:
+            self._credit += self.rate
+            if self._credit >= 1.0:
+                self._credit -= 1.0
+                return True
+            self.dropped += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: ts, level, logger, message, any `extra=` fields, and exc_info when present
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      sample_rate: Optional[float] = None, force: bool = False):
+    """
+    Install a single stderr handler on the root logger (idempotent unless force=True)
+    """
+    global _configured
+    with _configure_lock:
+        if _configured and not force:
+            return
+        level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+        fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+        if sample_rate is None:
+            sample_rate = float(os.getenv('LOG_SAMPLE_RATE', '0.05'))
+
+        handler = logging.StreamHandler()
+        if fmt == 'json':
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s: %(message)s'))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            if getattr(existing, '_flightai_handler', False):
+                root.removeHandler(existing)
+        handler._flightai_handler = True
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, level, logging.INFO))
+
+        for name in SAMPLED_LOGGERS:
+            sampled = logging.getLogger(name)
+            for existing in list(sampled.filters):
+                if isinstance(existing, SamplingFilter):
+                    sampled.removeFilter(existing)
+            sampled.addFilter(SamplingFilter(sample_rate))
+
+        # Third-party HTTP clients log every request at INFO/DEBUG
+        for noisy in ('httpx', 'httpcore', 'urllib3'):
+            logging.getLogger(noisy).setLevel(max(root.level, logging.WARNING))
+
+        _configured = True
@@ -0,0 +1,391 @@
+import json
+import time
+import asyncio
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def request_fingerprint(params: Dict) -> str:
+    """
+    Stable fingerprint of a SerpAPI parameter dict
+    The api_key is excluded so the same search made with different keys shares one entry
+    """
+    canonical = {str(k): str(v) for k, v in params.items() if k != 'api_key' and v is not None}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe in-process TTL cache with an LRU bound on entry count and (optionally) total bytes
+    Expired entries are kept until evicted so they can still be served as stale data on demand
+    """
+    def __init__(self, ttl: Optional[float] = 900, max_entries: int = 256, max_bytes: int = 0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and (self.ttl is None or self.ttl > 0)
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Return the cached value for key, or None on a miss
+        With allow_stale=True an expired entry is returned instead of a miss
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                if not allow_stale:
+                    self.misses += 1
+                    return None
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+
+            self._entries.move_to_end(key)
+            return value
+
+    def contains(self, key: str) -> bool:
+        """
+        Whether key holds a fresh entry, without touching the hit/miss counters or the LRU order
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[0] is None or entry[0] > time.time())
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, size: Optional[int] = None):
+        """
+        Store value under key, evicting least recently used entries beyond the bounds
+        """
+        if not self.enabled:
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        if size is None:
+            size = self._estimate_size(value) if self.max_bytes else 0
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            self._evict_locked()
+
+    def pop(self, key: str) -> Optional[Any]:
+        """
+        Remove and return an entry
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._bytes -= entry[2]
+            return entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """
+        Hit/miss counters and current size
+        """
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale_hits
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+            }
+
+    def _evict_locked(self):
+        while self._entries and (len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes)):
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def _estimate_size(self, value: Any) -> int:
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return 0
+
+
+class DiskResponseStore:
+    """
+    Persistent SerpAPI response store backed by SQLite so cached searches survive restarts
+    Bodies are zlib-compressed JSON keyed by request fingerprint with fetch and expiry times.
+    WAL mode plus a busy timeout lets several app processes on one host share the same file.
+    Expired rows are compacted by a background thread after a grace period (kept for stale serving).
+    """
+    def __init__(self, path: str, ttl: float = 3600, max_rows: int = 10000,
+                 compact_interval: float = 300, stale_grace: float = 86400):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.compact_interval = compact_interval
+        self.stale_grace = stale_grace
+        self._local = threading.local()
+        self._stop = threading.Event()
+
+        # Counters exposed through stats(); updated from request threads and the compactor
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.compactions = 0
+        self._stats_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "fingerprint TEXT PRIMARY KEY, fetched_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL, body BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_expires_at ON responses(expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_fetched_at ON responses(fetched_at)")
+
+        self._compactor = None
+        if self.compact_interval and self.compact_interval > 0:
+            self._compactor = threading.Thread(target=self._compact_loop, name='response-store-compactor', daemon=True)
+            self._compactor.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        One connection per thread (sqlite3 connections are not shareable across threads)
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, fingerprint: str, allow_stale: bool = False) -> Optional[Tuple[Any, float]]:
+        """
+        Return (value, expires_at) for a fingerprint, or None on a miss
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT body, expires_at FROM responses WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Response store read failed: %s", e)
+            return None
+
+        if row is None or (row[1] <= time.time() and not allow_stale):
+            with self._stats_lock:
+                self.misses += 1
+            return None
+
+        try:
+            value = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+        except (zlib.error, ValueError) as e:
+            # A truncated/corrupt row (e.g. another process crashed mid-write) would fail every lookup until compaction
+            logger.warning("Dropping corrupt response store row %s: %s", fingerprint[:12], e)
+            self.delete(fingerprint)
+            with self._stats_lock:
+                self.misses += 1
+            return None
+
+        with self._stats_lock:
+            self.hits += 1
+        return value, row[1]
+
+    def delete(self, fingerprint: str):
+        """
+        Remove the stored response for a fingerprint
+        """
+        try:
+            self._connect().execute("DELETE FROM responses WHERE fingerprint = ?", (fingerprint,))
+        except sqlite3.Error as e:
+            logger.warning("Response store delete failed: %s", e)
+
+    def set(self, fingerprint: str, value: Any, ttl: Optional[float] = None):
+        """
+        Insert or replace the stored response for a fingerprint
+        """
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        body = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO responses (fingerprint, fetched_at, expires_at, body) VALUES (?, ?, ?, ?)",
+                (fingerprint, now, now + ttl, body)
+            )
+            with self._stats_lock:
+                self.writes += 1
+        except sqlite3.Error as e:
+            logger.warning("Response store write failed: %s", e)
+
+    def compact(self) -> int:
+        """
+        Delete rows expired longer than the stale grace period and trim to max_rows (oldest first)
+        """
+        conn = self._connect()
+        deleted = conn.execute(
+            "DELETE FROM responses WHERE expires_at < ?", (time.time() - self.stale_grace,)
+        ).rowcount
+        if self.max_rows:
+            deleted += conn.execute(
+                "DELETE FROM responses WHERE fingerprint IN ("
+                "SELECT fingerprint FROM responses ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,)
+            ).rowcount
+        with self._stats_lock:
+            self.compactions += 1
+        return deleted
+
+    def _compact_loop(self):
+        while not self._stop.wait(self.compact_interval):
+            try:
+                deleted = self.compact()
+                if deleted:
+                    logger.debug("Response store compaction removed %s rows", deleted)
+            except sqlite3.Error as e:
+                logger.warning("Response store compaction failed: %s", e)
+
+    def stats(self) -> Dict:
+        try:
+            rows = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            rows = None
+        return {
+            "path": self.path,
+            "rows": rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "compactions": self.compactions
+        }
+
+    def close(self):
+        self._stop.set()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a fingerprint into one in-flight execution
+    The first caller (leader) runs the function; callers arriving while it runs wait for and share its result.
+    Threaded and asyncio callers share one map of concurrent.futures.Future, so a sync speculative search
+    and an async button click for the same leg make one request. Async work runs in a detached task that
+    every caller awaits through a shield: cancelling any caller (leader included) never cancels the others.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> concurrent.futures.Future
+        self._tasks = set()  # detached asyncio executions, referenced until done
+
+        # Counters exposed through stats()
+        self.executions = 0
+        self.coalesced = 0
+
+    def _join_or_lead(self, key: str) -> Tuple[Future, bool]:
+        """
+        (future, leader): the in-flight future for key, or a new one the caller must resolve
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                logger.debug("Joining in-flight request %s", key[:20])
+                return future, False
+            future = Future()
+            # Running futures cannot be cancelled, so no waiter can cancel the shared result
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+            self.executions += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key
+        """
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asyncio variant of do(): fn() is awaited once, in a task detached from any caller
+        """
+        future, leader = self._join_or_lead(key)
+        if leader:
+            task = asyncio.ensure_future(self._run_detached(key, future, fn))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        # Shield so a cancelled caller only stops waiting
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def _run_detached(self, key: str, future: Future, fn: Callable[[], Awaitable[Any]]):
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            return
+        self._finish(key, future, result)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls)
+            }
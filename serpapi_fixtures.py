@@ -0,0 +1,64 @@
+import json
+import gzip
+import time
+import threading
+from typing import Dict, Iterator, Optional
+from response_cache import request_fingerprint
+
+class FixtureArchive:
+    """
+    Gzip-compressed JSON Lines archive of SerpAPI request/response pairs
+    Each line holds the request fingerprint, the parameters (api_key stripped), the HTTP status
+    and the decoded response body. Appends add a new gzip member, which gzip readers handle
+    transparently, so recording never rewrites the file. Later records for a fingerprint win.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict]] = None
+
+    def append(self, params: Dict, status_code: int, body) -> str:
+        """
+        Record one response and return its fingerprint
+        """
+        fingerprint = request_fingerprint(params)
+        record = {
+            "fingerprint": fingerprint,
+            "params": {k: v for k, v in params.items() if k != 'api_key'},
+            "status": status_code,
+            "body": body,
+            "recorded_at": time.time()
+        }
+        line = (json.dumps(record, separators=(',', ':')) + "\n").encode('utf-8')
+        with self._lock:
+            with gzip.open(self.path, 'ab') as f:
+                f.write(line)
+            if self._index is not None:
+                self._index[fingerprint] = record
+        return fingerprint
+
+    def records(self) -> Iterator[Dict]:
+        """
+        Iterate over every record in file order
+        """
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def lookup(self, params: Dict) -> Optional[Dict]:
+        """
+        Return the recorded record for these parameters, or None
+        """
+        with self._lock:
+            return self._load_index_locked().get(request_fingerprint(params))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load_index_locked())
+
+    def _load_index_locked(self) -> Dict[str, Dict]:
+        if self._index is None:
+            self._index = {record["fingerprint"]: record for record in self.records()}
+        return self._index
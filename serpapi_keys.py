@@ -0,0 +1,327 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from serpapi_transport import TransportError
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+class NoApiKeyAvailable(TransportError):
+    """
+    Raised when every SerpAPI key in the pool is disabled or out of quota
+    """
+
+
+class ApiKey:
+    """
+    One SerpAPI key plus its usage counters
+    Only the key id (a hash of the key) is ever persisted or shown in stats
+    """
+    def __init__(self, value: str):
+        self.value = value
+        self.key_id = hashlib.sha256(value.encode('utf-8')).hexdigest()[:12]
+        self.hour_window = 0
+        self.hour_count = 0
+        self.month = ""
+        self.month_count = 0
+        self.total_count = 0
+        self.rate_limited_at: List[float] = []
+        self.cooldown_until = 0.0
+        self.disabled_until = 0.0
+        # Requests counted by this process since the last save, merged into the shared usage file
+        self.unsaved_hour = 0
+        self.unsaved_month = 0
+        self.unsaved_total = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "hour_window": self.hour_window,
+            "hour_count": self.hour_count,
+            "month": self.month,
+            "month_count": self.month_count,
+            "total_count": self.total_count,
+            "rate_limited_at": self.rate_limited_at,
+            "cooldown_until": self.cooldown_until,
+            "disabled_until": self.disabled_until
+        }
+
+    def load(self, data: Dict):
+        self.hour_window = int(data.get("hour_window", 0))
+        self.hour_count = int(data.get("hour_count", 0))
+        self.month = data.get("month", "")
+        self.month_count = int(data.get("month_count", 0))
+        self.total_count = int(data.get("total_count", 0))
+        self.rate_limited_at = [float(t) for t in data.get("rate_limited_at", [])]
+        self.cooldown_until = float(data.get("cooldown_until", 0.0))
+        self.disabled_until = float(data.get("disabled_until", 0.0))
+
+
+class SerpApiKeyPool:
+    """
+    Pool of SerpAPI keys shared by every request made through the transport
+    Picks the key with the most remaining hourly/monthly quota (fewest recent 429s on ties),
+    takes keys out of rotation on 401 (disabled) and 429 (cool-down), and persists per-key
+    usage counters to a JSON file so quotas are respected across restarts.
+    Usage is stored by key id (a hash of the key), so a key whose value changes starts fresh. Saves
+    merge this process's new requests into the file under a file lock, so processes sharing the file
+    add up their counts instead of overwriting each other. A single-key pool is only disabled
+    briefly and never persistently: there is no other key to fall back to, and the user fixing
+    .env must take effect on restart.
+    """
+    def __init__(self, keys: List[str], hourly_limit: int = 0, monthly_limit: int = 0,
+                 cooldown_seconds: float = 60, disable_seconds: float = 86400,
+                 usage_path: Optional[str] = None, save_interval: float = 5, single_key_disable_seconds: float = 60):
+        unique_keys = list(dict.fromkeys(k.strip() for k in keys if k and k.strip()))
+        self.keys = [ApiKey(k) for k in unique_keys]
+        self.hourly_limit = hourly_limit
+        self.monthly_limit = monthly_limit
+        self.cooldown_seconds = cooldown_seconds
+        self.disable_seconds = disable_seconds if len(self.keys) > 1 else min(disable_seconds, single_key_disable_seconds)
+        self.persist_disabled = len(self.keys) > 1
+        self.usage_path = usage_path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._last_saved = 0.0
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> 'SerpApiKeyPool':
+        """
+        Build the pool from SERPAPI_KEYS (comma-separated), falling back to SERPAPI_KEY
+        """
+        keys = [k for k in os.getenv('SERPAPI_KEYS', '').split(',') if k.strip()]
+        if not keys:
+            keys = [os.getenv('SERPAPI_KEY', 'your_serpapi_key_here')]
+        return cls(
+            keys,
+            hourly_limit=int(os.getenv('SERPAPI_KEY_HOURLY_LIMIT', '0')),
+            monthly_limit=int(os.getenv('SERPAPI_KEY_MONTHLY_LIMIT', '0')),
+            cooldown_seconds=float(os.getenv('SERPAPI_KEY_COOLDOWN_SECONDS', '60')),
+            disable_seconds=float(os.getenv('SERPAPI_KEY_DISABLE_SECONDS', '86400')),
+            usage_path=os.getenv('SERPAPI_KEY_USAGE_PATH', '').strip() or None
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def primary_key(self) -> str:
+        return self.keys[0].value if self.keys else ''
+
+    def acquire(self) -> ApiKey:
+        """
+        Pick the best key for the next request and count the request against it
+        Keys cooling down after a 429 are only used when no other key is available
+        """
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for key in self.keys:
+                self._roll_windows(key, now)
+                if key.disabled_until > now or self._remaining(key) <= 0:
+                    continue
+                candidates.append(key)
+
+            if not candidates:
+                if self.keys and all(key.disabled_until > now for key in self.keys):
+                    raise NoApiKeyAvailable(
+                        "Invalid API key. SerpAPI rejected every configured key (401), please check SERPAPI_KEY/SERPAPI_KEYS in your .env."
+                    )
+                raise NoApiKeyAvailable(
+                    "All SerpAPI keys are disabled or out of quota. Please check your SerpAPI plan or add keys to SERPAPI_KEYS."
+                )
+
+            key = min(candidates, key=lambda k: (
+                k.cooldown_until > now,
+                -self._remaining(k),
+                self._recent_rate_limits(k, now),
+                k.month_count
+            ))
+            key.hour_count += 1
+            key.month_count += 1
+            key.total_count += 1
+            key.unsaved_hour += 1
+            key.unsaved_month += 1
+            key.unsaved_total += 1
+            self._dirty = True
+
+        self._maybe_save()
+        return key
+
+    def report(self, key: ApiKey, status_code: int) -> bool:
+        """
+        Record the response status for a key
+        Returns True when the key was taken out of rotation and another key can be tried right away
+        """
+        if status_code not in (401, 429):
+            return False
+
+        now = time.time()
+        with self._lock:
+            if status_code == 401:
+                logger.warning("SerpAPI key %s rejected (401), disabling it for %.0fs", key.key_id, self.disable_seconds)
+                key.disabled_until = now + self.disable_seconds
+            else:
+                logger.info("SerpAPI key %s rate limited (429), cooling it down for %.0fs", key.key_id, self.cooldown_seconds)
+                key.cooldown_until = now + self.cooldown_seconds
+                key.rate_limited_at = [t for t in key.rate_limited_at if t > now - 3600] + [now]
+            self._dirty = True
+            has_alternative = any(
+                k is not key and k.disabled_until <= now and k.cooldown_until <= now and self._remaining(k) > 0
+                for k in self.keys
+            )
+
+        self.save()
+        return has_alternative
+
+    def stats(self) -> Dict:
+        """
+        Per-key usage keyed by key id (never the key itself)
+        """
+        now = time.time()
+        with self._lock:
+            return {
+                key.key_id: {
+                    "hour_count": key.hour_count,
+                    "month_count": key.month_count,
+                    "total_count": key.total_count,
+                    "recent_rate_limits": self._recent_rate_limits(key, now),
+                    "cooling_down": key.cooldown_until > now,
+                    "disabled": key.disabled_until > now
+                }
+                for key in self.keys
+            }
+
+    def save(self):
+        """
+        Merge usage counters into usage_path (file lock + atomic replace)
+        Counts made by this process since the last save are added to what other processes stored
+        """
+        if not self.usage_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self._last_saved = time.time()
+
+        try:
+            with _locked_file(f"{self.usage_path}.lock"):
+                stored = self._read_usage()
+                with self._lock:
+                    for key in self.keys:
+                        if key.key_id in stored:
+                            self._merge_stored(key, stored[key.key_id])
+                        key.unsaved_hour = key.unsaved_month = key.unsaved_total = 0
+                        entry = key.to_dict()
+                        if not self.persist_disabled:
+                            entry["disabled_until"] = 0.0
+                        stored[key.key_id] = entry
+
+                tmp_path = f"{self.usage_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(stored, f)
+                os.replace(tmp_path, self.usage_path)
+        except OSError as e:
+            logger.warning("Could not save SerpAPI key usage: %s", e)
+
+    def _merge_stored(self, key: ApiKey, data: Dict):
+        """
+        Fold another process's saved usage into key: stored counts plus this process's unsaved requests
+        """
+        other = ApiKey(key.value)
+        try:
+            other.load(data)
+        except (TypeError, ValueError):
+            return
+        now = time.time()
+        self._roll_windows(key, now)
+        self._roll_windows(other, now)
+        key.hour_count = other.hour_count + key.unsaved_hour
+        key.month_count = other.month_count + key.unsaved_month
+        key.total_count = other.total_count + key.unsaved_total
+        key.rate_limited_at = sorted(t for t in set(key.rate_limited_at) | set(other.rate_limited_at) if t > now - 3600)
+        key.cooldown_until = max(key.cooldown_until, other.cooldown_until)
+        if self.persist_disabled:
+            key.disabled_until = max(key.disabled_until, other.disabled_until)
+
+    def _read_usage(self) -> Dict:
+        if not os.path.exists(self.usage_path):
+            return {}
+        try:
+            with open(self.usage_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load SerpAPI key usage: %s", e)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _maybe_save(self):
+        if self.usage_path and time.time() - self._last_saved >= self.save_interval:
+            self.save()
+
+    def _load(self):
+        if not self.usage_path:
+            return
+        data = self._read_usage()
+        for key in self.keys:
+            if key.key_id in data:
+                key.load(data[key.key_id])
+                if not self.persist_disabled:
+                    # Files written before single-key disables stopped being persisted
+                    key.disabled_until = 0.0
+
+    def _roll_windows(self, key: ApiKey, now: float):
+        hour_window = int(now // 3600)
+        if key.hour_window != hour_window:
+            key.hour_window = hour_window
+            key.hour_count = 0
+            key.unsaved_hour = 0
+        month = time.strftime('%Y-%m', time.gmtime(now))
+        if key.month != month:
+            key.month = month
+            key.month_count = 0
+            key.unsaved_month = 0
+
+    def _remaining(self, key: ApiKey) -> float:
+        hourly = self.hourly_limit - key.hour_count if self.hourly_limit else float('inf')
+        monthly = self.monthly_limit - key.month_count if self.monthly_limit else float('inf')
+        return min(hourly, monthly)
+
+    def _recent_rate_limits(self, key: ApiKey, now: float) -> int:
+        return sum(1 for t in key.rate_limited_at if t > now - 3600)
+
+
+@contextmanager
+def _locked_file(path: str):
+    """
+    Hold an exclusive lock on path for the duration of the block (best effort where locking is unavailable)
+    """
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,288 @@
+"""
+Local stand-in for the SerpAPI google_flights endpoints used by FlightAI
+Serves synthetic (or recorded) best_flights/other_flights search payloads and booking_options
+lookups with configurable latency, 5xx error and 429 injection, so the app can be load-tested
+without network access or SerpAPI quota. With --replay-archive, responses captured through
+SERPAPI_RECORD_PATH are served for matching requests (synthetic payloads otherwise).
+
+Usage:
+    python serpapi_stub.py --port 8765 --latency-ms 400 --jitter-ms 200 --error-rate 0.02 --rate-limit-rate 0.05
+    SERPAPI_BASE_URL=http://127.0.0.1:8765/search python app.py
+"""
+import json
+import time
+import random
+import base64
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+from typing import Dict, List, Optional
+from serpapi_fixtures import FixtureArchive
+
+AIRLINES = [
+    ('IndiGo', '6E'), ('Air India', 'AI'), ('Vistara', 'UK'), ('Singapore Airlines', 'SQ'),
+    ('Emirates', 'EK'), ('Qatar Airways', 'QR'), ('Lufthansa', 'LH'), ('British Airways', 'BA')
+]
+HUBS = ['DXB', 'DOH', 'SIN', 'BOM', 'DEL', 'FRA', 'LHR', 'IST']
+BOOKING_SOURCES = ['MakeMyTrip', 'Cleartrip', 'Goibibo', 'Yatra', 'Air India', 'IndiGo']
+
+
+class StubConfig:
+    """
+    Fault injection and payload settings shared by all handler threads
+    """
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 rate_limit_rate: float = 0, retry_after: float = 1, flights: int = 12,
+                 search_fixture: Optional[Dict] = None, booking_fixture: Optional[Dict] = None,
+                 replay_archive: Optional[FixtureArchive] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.flights = flights
+        self.search_fixture = search_fixture
+        self.booking_fixture = booking_fixture
+        self.replay_archive = replay_archive
+
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "searches": 0, "bookings": 0, "replayed": 0, "errors": 0, "rate_limited": 0}
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+
+def _seeded_random(params: Dict) -> random.Random:
+    """
+    Deterministic RNG per request so repeated searches return identical payloads
+    """
+    seed_source = json.dumps({k: v for k, v in params.items() if k != 'api_key'}, sort_keys=True)
+    return random.Random(hashlib.sha256(seed_source.encode('utf-8')).hexdigest())
+
+
+def _booking_token(rng: random.Random) -> str:
+    """
+    240-character base64 token, inside the length window FlightSearcher validates
+    """
+    return base64.b64encode(bytes(rng.getrandbits(8) for _ in range(180))).decode('ascii')
+
+
+def synthetic_search(params: Dict, count: int = 12) -> Dict:
+    """
+    Build a google_flights search payload for the requested leg
+    """
+    rng = _seeded_random(params)
+    departure_id = params.get('departure_id', 'BLR')
+    arrival_id = params.get('arrival_id', 'SIN')
+    outbound_date = params.get('outbound_date') or datetime.now().strftime('%Y-%m-%d')
+    max_stops = int(params.get('stops', 0) or 0)  # SerpAPI: 0 any, 1 nonstop, 2 <=1 stop, 3 <=2 stops
+    start = datetime.strptime(outbound_date, '%Y-%m-%d')
+    cabin_multiplier = {1: 1.0, 2: 1.6, 3: 3.2, 4: 5.5}.get(int(params.get('travel_class', 1) or 1), 1.0)
+
+    results = []
+    for _ in range(count):
+        stop_count = rng.choice([0, 0, 1, 1, 2])
+        if max_stops and stop_count > max_stops - 1:
+            stop_count = max_stops - 1
+        airline, code = rng.choice(AIRLINES)
+        route = [departure_id] + rng.sample([h for h in HUBS if h not in (departure_id, arrival_id)], stop_count) + [arrival_id]
+
+        departure = start + timedelta(minutes=rng.randrange(0, 24 * 60, 5))
+        segments = []
+        layovers = []
+        for origin, destination in zip(route, route[1:]):
+            duration = rng.randrange(60, 480, 5)
+            arrival = departure + timedelta(minutes=duration)
+            segments.append({
+                'departure_airport': {'id': origin, 'name': f'{origin} Airport', 'time': departure.strftime('%Y-%m-%d %H:%M')},
+                'arrival_airport': {'id': destination, 'name': f'{destination} Airport', 'time': arrival.strftime('%Y-%m-%d %H:%M')},
+                'duration': duration,
+                'airline': airline,
+                'flight_number': f'{code} {rng.randint(100, 9999)}',
+                'travel_class': 'Economy'
+            })
+            if destination != arrival_id:
+                layover = rng.randrange(45, 300, 5)
+                layovers.append({'id': destination, 'name': f'{destination} Airport', 'duration': layover})
+                departure = arrival + timedelta(minutes=layover)
+
+        total_duration = sum(s['duration'] for s in segments) + sum(l['duration'] for l in layovers)
+        results.append({
+            'flights': segments,
+            'layovers': layovers,
+            'total_duration': total_duration,
+            'price': int((6000 + total_duration * 18 + rng.randint(0, 9000)) * cabin_multiplier),
+            'type': 'One way',
+            'booking_token': _booking_token(rng)
+        })
+
+    best_count = min(3, len(results))
+    return {
+        'search_metadata': {'id': hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:24], 'status': 'Success'},
+        'search_parameters': {k: v for k, v in params.items() if k != 'api_key'},
+        'best_flights': results[:best_count],
+        'other_flights': results[best_count:],
+        'price_insights': {'lowest_price': min((r['price'] for r in results), default=0), 'price_level': 'typical'}
+    }
+
+
+def synthetic_booking(params: Dict) -> Dict:
+    """
+    Build a booking_options payload for a booking_token lookup
+    """
+    rng = _seeded_random(params)
+    base_price = rng.randint(8000, 40000)
+    options = []
+    for source in rng.sample(BOOKING_SOURCES, 4):
+        options.append({
+            'together': {
+                'book_with': source,
+                'price': base_price + rng.randint(-500, 1500),
+                'booking_request': {
+                    'url': 'https://www.google.com/travel/clk/f',
+                    'post_data': f"u={base64.urlsafe_b64encode(source.encode()).decode()}"
+                }
+            }
+        })
+    return {
+        'search_metadata': {'status': 'Success'},
+        'selected_flights': [],
+        'booking_options': options,
+        'baggage_prices': {'together': ['1 free carry-on']}
+    }
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /search?engine=google_flights&... (search, or booking lookup when booking_token is set)
+    GET /stats returns the request counters
+    """
+    config: StubConfig = StubConfig()
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = dict(parse_qsl(parsed.query))
+
+        if parsed.path == '/stats':
+            return self._send_json(200, self.config.counters)
+        if parsed.path != '/search':
+            return self._send_json(404, {'error': f'Unknown path {parsed.path}'})
+
+        config = self.config
+        config.count('requests')
+        self._simulate_latency()
+
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            config.count('rate_limited')
+            return self._send_json(429, {'error': 'Your account has run out of searches.'},
+                                   headers={'Retry-After': f'{config.retry_after:g}'})
+        if roll < config.rate_limit_rate + config.error_rate:
+            config.count('errors')
+            return self._send_json(503, {'error': 'Injected upstream failure'})
+
+        if params.get('engine', 'google_flights') != 'google_flights':
+            return self._send_json(400, {'error': f"Unsupported engine: {params.get('engine')}"})
+
+        record = self._lookup_recorded(params)
+        if record is not None:
+            config.count('replayed')
+            return self._send_json(record['status'], record['body'])
+
+        if params.get('booking_token'):
+            config.count('bookings')
+            return self._send_json(200, config.booking_fixture or synthetic_booking(params))
+
+        config.count('searches')
+        return self._send_json(200, config.search_fixture or synthetic_search(params, config.flights))
+
+    def _lookup_recorded(self, params: Dict) -> Optional[Dict]:
+        """
+        Find a recorded response; query strings carry booleans as 'true' (httpx) or 'True' (requests)
+        """
+        archive = self.config.replay_archive
+        if archive is None:
+            return None
+        record = archive.lookup(params)
+        if record is None:
+            normalized = {k: {'true': 'True', 'false': 'False'}.get(v, v) for k, v in params.items()}
+            record = archive.lookup(normalized)
+        return record
+
+    def _simulate_latency(self):
+        delay_ms = self.config.latency_ms + random.uniform(0, self.config.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict] = None):
+        body = payload.encode('utf-8') if isinstance(payload, str) else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate load tests
+        pass
+
+
+def make_server(config: StubConfig, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    """
+    Create (but do not start) a threaded stub server; port 0 picks a free port
+    """
+    handler = type('ConfiguredStubRequestHandler', (StubRequestHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def _load_fixture(path: Optional[str]) -> Optional[Dict]:
+    if not path:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Local SerpAPI google_flights stand-in for offline load testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Base latency added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Uniform random latency added on top of the base')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with 503')
+    parser.add_argument('--rate-limit-rate', type=float, default=0, help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=float, default=1, help='Retry-After seconds sent with injected 429s')
+    parser.add_argument('--flights', type=int, default=12, help='Synthetic flights per search')
+    parser.add_argument('--search-fixture', help='Recorded search response JSON served for every search')
+    parser.add_argument('--booking-fixture', help='Recorded booking_options response JSON served for every booking lookup')
+    parser.add_argument('--replay-archive', help='Fixture archive (SERPAPI_RECORD_PATH output) served for matching requests')
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, flights=args.flights,
+        search_fixture=_load_fixture(args.search_fixture), booking_fixture=_load_fixture(args.booking_fixture),
+        replay_archive=FixtureArchive(args.replay_archive) if args.replay_archive else None
+    )
+    server = make_server(config, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"SerpAPI stub listening on http://{host}:{port}/search")
+    print(f"Point FlightAI at it with SERPAPI_BASE_URL=http://{host}:{port}/search")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
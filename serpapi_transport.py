@@ -0,0 +1,513 @@
+import os
+import json
+import time
+import random
+import asyncio
+import weakref
+import logging
+import threading
+import httpx
+import requests
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+from serpapi_fixtures import FixtureArchive
+
+logger = logging.getLogger(__name__)
+
+class TransportError(Exception):
+    """
+    Raised when the transport refuses to send a request (e.g. rate limit queue wait exceeded)
+    """
+
+
+class RateLimitQueueTimeout(TransportError):
+    """
+    Raised when a request would have to wait longer than the queue-wait limit for a rate limit token
+    """
+
+
+class FixtureMissError(TransportError):
+    """
+    Raised in replay mode when the archive holds no response for a request
+    """
+
+
+class CircuitOpenError(TransportError):
+    """
+    Raised without touching the network while the SerpAPI circuit breaker is open
+    """
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker around SerpAPI calls
+    Network errors, 5xx responses and calls slower than the latency threshold count as failures.
+    After failure_threshold consecutive failures the circuit opens and calls fail fast; once
+    reset_timeout has passed a limited number of trial calls are let through (half-open) and a
+    success closes the circuit again while a failure re-opens it.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, slow_call_seconds: float = 0,
+                 half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_generation = 0
+
+        # Counters exposed through snapshot()
+        self.times_opened = 0
+        self.short_circuited = 0
+        self.slow_calls = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def before_call(self) -> Optional[int]:
+        """
+        Raise CircuitOpenError if the call must not reach SerpAPI right now
+        Returns a slot id when the call took a half-open trial slot (else None); pass it to release()
+        if the call ends without record_success/record_failure
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(
+                        f"SerpAPI is currently unavailable (circuit open after repeated failures). Retrying automatically in {remaining:.0f}s."
+                    )
+                logger.info("Circuit breaker half-open, letting a trial SerpAPI request through")
+                self.state = self.HALF_OPEN
+                self._half_open_in_flight = 0
+                self._half_open_generation += 1
+
+            if self.state == self.HALF_OPEN:
+                if self._half_open_in_flight >= self.half_open_max_calls:
+                    self.short_circuited += 1
+                    raise CircuitOpenError("SerpAPI is recovering from an outage. Please try again in a few seconds.")
+                self._half_open_in_flight += 1
+                return self._half_open_generation
+        return None
+
+    def release(self, slot: Optional[int]):
+        """
+        Give back a half-open trial slot when the call never reached SerpAPI or was cancelled
+        (rate limit queue timeout, no API key available), so the breaker cannot stay stuck half-open
+        """
+        if slot is None:
+            return
+        with self._lock:
+            if self.state == self.HALF_OPEN and slot == self._half_open_generation and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def record_response(self, status_code: int, elapsed: float):
+        """
+        Record the outcome of a call that produced an HTTP response
+        """
+        if status_code >= 500:
+            self.record_failure()
+        elif self.slow_call_seconds and elapsed > self.slow_call_seconds:
+            self.slow_calls += 1
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_success(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._consecutive_failures = 0
+            if self.state == self.HALF_OPEN:
+                logger.info("Circuit breaker closed, SerpAPI has recovered")
+                self.state = self.CLOSED
+                self._half_open_in_flight = 0
+
+    def record_failure(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning("Circuit breaker opened after %s consecutive failures", self._consecutive_failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_in_flight = 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._consecutive_failures,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+                "slow_calls": self.slow_calls
+            }
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all SerpAPI calls
+    Callers reserve a token up front and are told how long to wait for it, so the same bucket
+    serves both blocking (time.sleep) and asyncio (asyncio.sleep) callers.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def reserve(self, max_wait: Optional[float] = None) -> float:
+        """
+        Reserve one token and return the seconds to wait before using it
+        Raises RateLimitQueueTimeout (without consuming a token) if the wait would exceed max_wait
+        """
+        if not self.enabled:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Tokens may go negative: that debt is the queue of callers already waiting
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitQueueTimeout(
+                    f"Too many flight searches in progress (SerpAPI slot wait {wait:.2f}s exceeds {max_wait:.2f}s). Please try again shortly."
+                )
+            self._tokens -= 1.0
+            return wait
+
+
+class SerpApiTransport:
+    """
+    Shared HTTP transport for all SerpAPI traffic
+    Owns a pooled keep-alive requests.Session so searches and booking lookups reuse connections,
+    a token bucket with 429-aware retries so bursts are smoothed to the plan's rate limit,
+    and a circuit breaker so outages fail fast
+    When a key pool is given, every request is sent with a key drawn from it (see serpapi_keys.py)
+    SERPAPI_RECORD_PATH captures every response to a fixture archive; SERPAPI_REPLAY_PATH serves
+    responses from one instead of the network (see serpapi_fixtures.py)
+    """
+    def __init__(self, base_url: str = "https://serpapi.com/search", timeout: Optional[float] = None,
+                 pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None, key_pool=None):
+        self.base_url = base_url
+        self.key_pool = key_pool
+        self.timeout = timeout if timeout is not None else float(os.getenv('API_TIMEOUT', '30'))
+        self.pool_connections = pool_connections or int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))
+        self.pool_maxsize = pool_maxsize or int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+
+        # Keep-alive session: one TCP+TLS handshake per pooled connection instead of per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # One httpx.AsyncClient per running event loop (clients cannot be shared across loops)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+        # Client-side rate limiting and 429 retry policy
+        self.rate_limiter = TokenBucket(
+            rate=float(os.getenv('SERPAPI_RATE_PER_SEC', '5')),
+            capacity=float(os.getenv('SERPAPI_BURST', '5'))
+        )
+        self.max_queue_wait = float(os.getenv('SERPAPI_MAX_QUEUE_WAIT', '10'))
+        self.max_retries = int(os.getenv('SERPAPI_MAX_RETRIES', '2'))
+        self.backoff_base = float(os.getenv('SERPAPI_BACKOFF_BASE', '0.5'))
+        self.backoff_max = float(os.getenv('SERPAPI_BACKOFF_MAX', '10'))
+
+        # Circuit breaker so an outage fails fast instead of every search waiting out the timeout
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('SERPAPI_BREAKER_FAILURES', '5')),
+            reset_timeout=float(os.getenv('SERPAPI_BREAKER_RESET_SECONDS', '30')),
+            slow_call_seconds=float(os.getenv('SERPAPI_BREAKER_SLOW_SECONDS', '15')),
+            half_open_max_calls=int(os.getenv('SERPAPI_BREAKER_HALF_OPEN_CALLS', '1'))
+        )
+
+        # Record/replay of SerpAPI traffic as fixtures (replay wins if both are set)
+        replay_path = os.getenv('SERPAPI_REPLAY_PATH', '').strip()
+        record_path = os.getenv('SERPAPI_RECORD_PATH', '').strip()
+        self.replay_archive = FixtureArchive(replay_path) if replay_path else None
+        self.record_archive = FixtureArchive(record_path) if record_path and not replay_path else None
+
+        # Metrics keep time spent queued for a token apart from time spent in the API
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "retries": 0,
+            "key_rotations": 0,
+            "replayed": 0,
+            "rate_limited_responses": 0,
+            "queue_timeouts": 0,
+            "queue_wait_seconds": 0.0,
+            "backoff_seconds": 0.0,
+            "api_seconds": 0.0
+        }
+
+    def get(self, params: Dict, url: Optional[str] = None) -> requests.Response:
+        """
+        Send a GET request to SerpAPI through the pooled session
+        Waits for a rate limit token and retries 429 responses with jittered exponential backoff
+        Raises requests.exceptions.RequestException on network failures, TransportError when refused
+        """
+        if self.replay_archive is not None:
+            status_code, content = self._replay(params)
+            response = requests.models.Response()
+            response.status_code = status_code
+            response._content = content
+            response.headers['Content-Type'] = 'application/json'
+            response.url = url or self.base_url
+            return response
+
+        attempt = 0
+        rotations = 0
+        while True:
+            slot = self.breaker.before_call()
+            try:
+                wait = self._reserve_token()
+                if wait > 0:
+                    time.sleep(wait)
+
+                api_key, request_params = self._with_api_key(params)
+                started = time.perf_counter()
+                try:
+                    response = self.session.get(url or self.base_url, params=request_params, timeout=self.timeout)
+                except requests.exceptions.RequestException:
+                    slot = None
+                    self.breaker.record_failure()
+                    raise
+                slot = None
+            finally:
+                # Queue timeout, no key or interruption: no outcome to record, hand the trial slot back
+                self.breaker.release(slot)
+            elapsed = time.perf_counter() - started
+            self._record_request(elapsed)
+            self.breaker.record_response(response.status_code, elapsed)
+
+            if self._rotate_key(api_key, response, rotations):
+                rotations += 1
+                continue
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                self._record_fixture(params, response)
+                return response
+            time.sleep(delay)
+            attempt += 1
+
+    async def get_async(self, params: Dict, url: Optional[str] = None) -> httpx.Response:
+        """
+        Send a GET request to SerpAPI through the pooled async client of the running loop
+        Same rate limiting and retry policy as get(), without blocking the event loop
+        Raises httpx.HTTPError on network failures, TransportError when refused
+        """
+        loop = asyncio.get_running_loop()
+        if self.replay_archive is not None:
+            # The first lookup reads and indexes the whole archive, so keep it off the event loop
+            status_code, content = await loop.run_in_executor(None, self._replay, params)
+            return httpx.Response(status_code, content=content, headers={'Content-Type': 'application/json'},
+                                  request=httpx.Request('GET', url or self.base_url))
+
+        client = self._get_async_client()
+        attempt = 0
+        rotations = 0
+        while True:
+            slot = self.breaker.before_call()
+            try:
+                wait = self._reserve_token()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                api_key, request_params = self._with_api_key(params)
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url or self.base_url, params=request_params)
+                except httpx.HTTPError:
+                    slot = None
+                    self.breaker.record_failure()
+                    raise
+                slot = None
+            finally:
+                # Queue timeout, no key or cancellation: no outcome to record, hand the trial slot back
+                self.breaker.release(slot)
+            elapsed = time.perf_counter() - started
+            self._record_request(elapsed)
+            self.breaker.record_response(response.status_code, elapsed)
+
+            if self._rotate_key(api_key, response, rotations):
+                rotations += 1
+                continue
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                if self.record_archive is not None:
+                    # Gzip append (and its file lock) on a worker thread, not the event loop
+                    await loop.run_in_executor(None, self._record_fixture, params, response)
+                return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _replay(self, params: Dict):
+        """
+        Return (status, body bytes) recorded for these parameters
+        """
+        try:
+            record = self.replay_archive.lookup(params)
+        except (OSError, ValueError) as e:
+            # Missing, truncated or corrupt archive: surface it like any other transport failure
+            raise FixtureMissError(f"Could not read SerpAPI replay archive {self.replay_archive.path}: {e}")
+        if record is None:
+            raise FixtureMissError("No recorded SerpAPI response for this request in the replay archive.")
+        self._add_metric("replayed", 1)
+        body = record["body"]
+        content = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+        return record["status"], content
+
+    def _record_fixture(self, params: Dict, response):
+        if self.record_archive is None:
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        try:
+            self.record_archive.append(params, response.status_code, body)
+        except OSError as e:
+            logger.warning("Could not record SerpAPI fixture: %s", e)
+
+    def _with_api_key(self, params: Dict):
+        """
+        Draw a key from the pool and return (key, params with that api_key)
+        """
+        if self.key_pool is None:
+            return None, params
+        api_key = self.key_pool.acquire()
+        return api_key, {**params, 'api_key': api_key.value}
+
+    def _rotate_key(self, api_key, response, rotations: int) -> bool:
+        """
+        Report the response to the key pool; True when the request should be resent at once with another key
+        """
+        if api_key is None or not self.key_pool.report(api_key, response.status_code):
+            return False
+        if rotations >= len(self.key_pool) - 1:
+            return False
+        if response.status_code == 429:
+            self._add_metric("rate_limited_responses", 1)
+        self._add_metric("key_rotations", 1)
+        return True
+
+    def _reserve_token(self) -> float:
+        try:
+            wait = self.rate_limiter.reserve(max_wait=self.max_queue_wait)
+        except RateLimitQueueTimeout:
+            self._add_metric("queue_timeouts", 1)
+            raise
+        self._add_metric("queue_wait_seconds", wait)
+        return wait
+
+    def _retry_delay(self, response, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a 429 response, or None if the response should be returned
+        Honours Retry-After (seconds or HTTP date), otherwise uses full-jitter exponential backoff
+        """
+        if response.status_code != 429:
+            return None
+
+        self._add_metric("rate_limited_responses", 1)
+        if attempt >= self.max_retries:
+            return None
+
+        delay = self._parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+        else:
+            delay += random.uniform(0, self.backoff_base)
+
+        # Give up rather than hold the caller longer than the backoff cap
+        if delay > self.backoff_max:
+            return None
+
+        logger.info("SerpAPI returned 429, retrying in %.2fs (attempt %s/%s)", delay, attempt + 1, self.max_retries)
+        self._add_metric("retries", 1)
+        self._add_metric("backoff_seconds", delay)
+        return delay
+
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _record_request(self, api_seconds: float):
+        with self._metrics_lock:
+            self._metrics["requests"] += 1
+            self._metrics["api_seconds"] += api_seconds
+
+    def _add_metric(self, name: str, value):
+        with self._metrics_lock:
+            self._metrics[name] += value
+
+    def metrics(self) -> Dict:
+        """
+        Snapshot of transport counters (queue wait and API time are tracked separately)
+        """
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        for name in ("queue_wait_seconds", "backoff_seconds", "api_seconds"):
+            snapshot[name] = round(snapshot[name], 3)
+        snapshot["circuit"] = self.breaker.snapshot()
+        if self.key_pool is not None:
+            snapshot["keys"] = self.key_pool.stats()
+        return snapshot
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """
+        Get (or lazily create) the keep-alive async client bound to the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None or client.is_closed:
+            limits = httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize)
+            client = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+            self._async_clients[loop] = client
+        return client
+
+    def close(self):
+        """
+        Release pooled connections
+        """
+        self.session.close()
+
+    async def aclose(self):
+        """
+        Release pooled connections of the async client bound to the running loop
+        """
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
@@ -1,37 +1,104 @@
 import re
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Tuple
+
+# (field, label pattern, value pattern matched right after the label; group 1 is the value)
+# More approval templates can add rules, including extra labels for an existing field
+FIELD_RULES = (
+    ('name', r'Dear', r'\s+([^,]+(?:,\s*[^,\n]+)?)'),  # Capture full name including last name after comma
+    ('reference', r'Ref\s*No', r'[:\.]?\s*(\d+\/\d+)'),
+    ('departure_date', r'Departure\s*Date', r'[:\.]?\s*(\d{1,2}\s+\w+\s+\d{4})'),
+    ('return_date', r'Return\s*Date', r'[:\.]?\s*(\d{1,2}\s+\w+\s+\d{4})'),
+    ('duration', r'Duration', r'[:\.]?\s*(\d+\s+days?)'),
+    ('trip_type', r'Trip\s*Type', r'[:\.]?\s*(\w+)'),
+    ('location', r'Location', r'[:\.]?\s*([^\n]+)'),
+)
+
+
+class FieldScanner:
+    """
+    Extracts labelled fields in a single pass over the text
+    Rules are indexed by the first three letters of their label, so the scan walks the words of the
+    text once and only tries the (precompiled, anchored) rules whose label starts like the current
+    word. Cost grows with the text length, not with the number of fields or templates. As with one
+    re.search per field, the first label occurrence followed by a valid value wins; labels must start
+    at a word boundary.
+    """
+    PREFIX_LENGTH = 3
+    _WORD = re.compile(r'[A-Za-z]+')
+
+    def __init__(self, rules: Sequence[Tuple[str, str, str]] = FIELD_RULES, flags: int = re.IGNORECASE):
+        self.rules = tuple(rules)
+        self.fields = frozenset(field for field, _, _ in self.rules)
+        self._patterns = tuple(re.compile(label + value, flags) for _, label, value in self.rules)
+        self._by_prefix: Dict[str, Tuple[int, ...]] = {}
+        self._unindexed: Tuple[int, ...] = ()
+
+        for i, (_, label, _) in enumerate(self.rules):
+            literal = self._WORD.match(label)
+            if literal and len(literal.group()) >= self.PREFIX_LENGTH:
+                key = literal.group()[:self.PREFIX_LENGTH].lower()
+                self._by_prefix[key] = self._by_prefix.get(key, ()) + (i,)
+            else:
+                # Labels without a literal leading word are tried at every word
+                self._unindexed += (i,)
+
+        # Only visit words that can start an indexed label: a letter from the key set at a word start
+        first_letters = {key[0] for key in self._by_prefix}
+        if flags & re.IGNORECASE:
+            first_letters |= {letter.upper() for letter in first_letters}
+        if self._unindexed or not first_letters:
+            self._candidates = re.compile(r'(?<![A-Za-z])[A-Za-z]+')
+        else:
+            self._candidates = re.compile(rf"(?<![A-Za-z])[{''.join(sorted(first_letters))}][A-Za-z]{{{self.PREFIX_LENGTH - 1}}}")
+
+    def scan(self, text: str) -> Dict[str, str]:
+        found = {}
+        by_prefix, unindexed, prefix_length = self._by_prefix, self._unindexed, self.PREFIX_LENGTH
+        for word in self._candidates.finditer(text):
+            candidates = by_prefix.get(word.group()[:prefix_length].lower(), ())
+            if unindexed:
+                candidates += unindexed
+            for rule in candidates:
+                field = self.rules[rule][0]
+                if field in found:
+                    continue
+                match = self._patterns[rule].match(text, word.start())
+                if match:
+                    found[field] = match.group(1).strip()
+                    if len(found) == len(self.fields):
+                        return found
+        return found
+
 
 class TravelTextParser:
-    def __init__(self):
-        # Import here to avoid circular import
-        from flight_search import FlightSearcher
-        self.flight_searcher = FlightSearcher()
-        
-        self.patterns = {
-            'name': r'Dear\s+([^,]+(?:,\s*[^,\n]+)?)',  # Capture full name including last name after comma
-            'reference': r'Ref\s*No[:\.]?\s*(\d+\/\d+)',
-            'departure_date': r'Departure\s*Date[:\.]?\s*(\d{1,2}\s+\w+\s+\d{4})',
-            'return_date': r'Return\s*Date[:\.]?\s*(\d{1,2}\s+\w+\s+\d{4})',
-            'duration': r'Duration[:\.]?\s*(\d+\s+days?)',
-            'trip_type': r'Trip\s*Type[:\.]?\s*(\w+)',
-            'location': r'Location[:\.]?\s*([^\n]+)',
-        }
+    # Compiled once and shared by every parser instance
+    scanner = FieldScanner()
+    
+    def __init__(self, flight_searcher=None):
+        # Reuse the caller's FlightSearcher (one transport, cache and airport index per process)
+        self._flight_searcher = flight_searcher
+
+    @property
+    def flight_searcher(self):
+        """
+        FlightSearcher used for airport lookups, created on first use (text extraction alone never needs it)
+        """
+        if self._flight_searcher is None:
+            # Import here to avoid circular import
+            from flight_search import FlightSearcher
+            self._flight_searcher = FlightSearcher()
+        return self._flight_searcher
 
     def extract_travel_details(self, text: str) -> Dict[str, str]:
         """
         Extract travel details from the approval text
         """
-        details = {}
-        
         # Clean the text
         text = text.strip()
         
-        # Extract each field using regex patterns
-        for field, pattern in self.patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                details[field] = match.group(1).strip()
+        # Extract all fields in one pass over the text
+        details = self.scanner.scan(text)
         
         # Additional processing for specific fields
         details = self._process_extracted_details(details, text)
@@ -102,7 +169,13 @@ class TravelTextParser:
         """
         if not details:
             return "No travel details found. Please paste valid travel approval text."
-        
+        return self.render_details(details, self.resolve_route(details, from_location), flight_preference, travel_class)
+
+    def resolve_route(self, details: Dict[str, str], from_location: str = "Bangalore") -> Dict[str, str]:
+        """
+        Airport codes and display names for the route (the airport lookups of format_details_for_display)
+        Depends only on the details and the from location, so callers can reuse it across preference changes
+        """
         # Clean and format from_location - default to Bangalore if empty
         from_city = from_location.strip().title() if from_location.strip() else "Bangalore"
         destination = details.get('destination', 'Not specified')
@@ -111,6 +184,15 @@ class TravelTextParser:
         from_code = self.flight_searcher._get_airport_code(from_city.lower())
         dest_code = self.flight_searcher._get_airport_code(destination.lower())
         
+        # Tell the user when the destination was guessed rather than recognised
+        match_note = ""
+        if destination != 'Not specified':
+            dest_match = self.flight_searcher.match_airport(destination)
+            if dest_match is None:
+                match_note = f"\n**Note:** ⚠️ Destination '{destination}' was not recognised, please check the spelling"
+            elif dest_match.method == 'fuzzy':
+                match_note = f"\n**Note:** Destination '{destination}' matched to {dest_match.name.title()} ({dest_match.code}), confidence {dest_match.confidence:.0%}"
+        
         # Use corrected city names from flight searcher
         from_city_corrected = self.flight_searcher._get_corrected_city_name(from_code) if from_code else from_city
         destination_corrected = self.flight_searcher._get_corrected_city_name(dest_code) if dest_code else destination.title()
@@ -123,6 +205,13 @@ class TravelTextParser:
         else:
             route = "Not specified"
         
+        return {'route': route, 'destination': destination_corrected, 'match_note': match_note}
+
+    def render_details(self, details: Dict[str, str], resolved_route: Dict[str, str],
+                       flight_preference: str = "0", travel_class: str = "1") -> str:
+        """
+        Markdown summary of the details, a resolve_route() result and the search preferences (no lookups)
+        """
         # Map preference values to readable text
         preference_map = {
             "0": "Any flights (Best prices)",
@@ -142,12 +231,12 @@ class TravelTextParser:
         
         formatted = f"""
 **Traveler:** {details.get('traveler', 'Not specified')} 
-**Route:** {route}
+**Route:** {resolved_route['route']}
 **Departure:** {details.get('departure', 'Not specified')} 
 **Return:** {details.get('return', 'Not specified')} 
 **Trip Type:** {details.get('trip_type', 'Not specified')}
-**Destination:** {destination_corrected}
+**Destination:** {resolved_route['destination']}
 **Flight Preference:** {readable_preference}
-**Travel Class:** {readable_class}
+**Travel Class:** {readable_class}{resolved_route['match_note']}
 """
         return formatted.strip() 
\ No newline at end of file